@@ -0,0 +1,237 @@
+"""
+Production server: a preforking supervisor around uvicorn workers.
+
+The supervisor binds the listening socket, runs backend.startup.on_startup
+once (schema, seed and backfill, under its startup lock), imports the app
+and only then forks, so workers share the loaded code and data copy-on-write
+and never race each other on startup. Each worker serves the shared socket
+until it has handled about --max-requests requests, then finishes what it
+has in flight and exits, and the supervisor forks a fresh one. SIGTERM or
+SIGINT stops every worker gracefully.
+
+Caches, metrics and background tasks are per worker and share nothing.
+
+    pdm run backend --workers 4
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import time
+from types import FrameType
+
+import uvicorn
+from fastapi import FastAPI
+
+from backend.constants import (
+    SERVER_GRACEFUL_TIMEOUT,
+    SERVER_HOST,
+    SERVER_MAX_REQUESTS,
+    SERVER_MAX_REQUESTS_JITTER,
+    SERVER_PORT,
+    WEB_CONCURRENCY,
+)
+from backend.logger import LOG
+
+# A worker that dies sooner than this after being forked is failing to boot,
+# so it is replaced only after a pause rather than in a tight loop.
+MIN_WORKER_LIFETIME = 1.0
+
+
+def default_workers() -> int:
+    """
+    One worker per CPU this process may run on, which honours taskset and
+    container CPU sets where os.cpu_count() would not.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Supervisor:
+    def __init__(
+        self,
+        sock: socket.socket,
+        workers: int,
+        max_requests: int,
+        max_requests_jitter: int,
+        graceful_timeout: float,
+        log_level: str = "info",
+    ):
+        self.sock = sock
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.graceful_timeout = graceful_timeout
+        self.log_level = log_level
+        self.app: FastAPI | None = None
+        self.children: dict[int, float] = {}
+        self.stopping = False
+
+    def preload(self) -> None:
+        from backend.app import app
+        from backend.auth.database import engine
+        from backend.startup import on_startup
+
+        on_startup()
+        # Connections must not be shared across fork; workers open their own.
+        engine.dispose()
+
+        self.app = app
+        # Keep the objects created so far out of the collector's reach, so
+        # that collections in the workers do not write to (and so copy) the
+        # pages they share with the supervisor.
+        gc.freeze()
+
+    def spawn(self) -> None:
+        # Jittered so that workers started together are not recycled together.
+        limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+        pid = os.fork()
+
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        code = 0
+
+        try:
+            self.serve(limit if self.max_requests else None)
+        except BaseException:
+            LOG.exception("Worker failed")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def serve(self, limit: int | None) -> None:
+        from backend.auth.database import async_engine, engine
+        from backend.database.routing import REPLICA_ENGINE
+
+        # Out of the terminal's process group, so Ctrl-C reaches only the
+        # supervisor; a second signal would make uvicorn skip the graceful
+        # shutdown the supervisor asks for.
+        os.setpgid(0, 0)
+        _ = signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        _ = signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+        engines = [engine, async_engine.sync_engine]
+
+        if REPLICA_ENGINE is not None:
+            engines.append(REPLICA_ENGINE.sync_engine)
+
+        # Drop pool state inherited from the supervisor without closing
+        # connections that belong to it.
+        for inherited in engines:
+            inherited.dispose(close=False)
+
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            limit_max_requests=limit,
+            timeout_graceful_shutdown=int(self.graceful_timeout),
+            log_level=self.log_level,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+    def stop(self, signum: int, _: FrameType | None) -> None:
+        LOG.info(f"Received {signal.Signals(signum).name}, stopping workers")
+        self.stopping = True
+
+    def reap(self) -> None:
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+
+            if not pid:
+                return
+
+            started = self.children.pop(pid, time.monotonic())
+            code = os.waitstatus_to_exitcode(status)
+
+            if self.stopping:
+                continue
+
+            if code:
+                LOG.warning(f"Worker {pid} exited with {code}, replacing it")
+
+                if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                    time.sleep(MIN_WORKER_LIFETIME)
+            else:
+                LOG.info(f"Worker {pid} recycled")
+
+    def run(self) -> None:
+        self.preload()
+        _ = signal.signal(signal.SIGTERM, self.stop)
+        _ = signal.signal(signal.SIGINT, self.stop)
+        LOG.info(f"Serving on {self.sock.getsockname()} with {self.workers} workers")
+
+        while not self.stopping:
+            while len(self.children) < self.workers and not self.stopping:
+                self.spawn()
+
+            time.sleep(0.5)
+            self.reap()
+
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+
+        while self.children and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self.reap()
+
+        for pid in list(self.children):
+            LOG.warning(f"Worker {pid} did not stop in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+            _ = os.waitpid(pid, 0)
+
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    _ = parser.add_argument("--host", default=SERVER_HOST)
+    _ = parser.add_argument("--port", type=int, default=SERVER_PORT)
+    _ = parser.add_argument(
+        "--workers", type=int, default=WEB_CONCURRENCY or default_workers()
+    )
+    _ = parser.add_argument("--max-requests", type=int, default=SERVER_MAX_REQUESTS)
+    _ = parser.add_argument(
+        "--max-requests-jitter", type=int, default=SERVER_MAX_REQUESTS_JITTER
+    )
+    _ = parser.add_argument(
+        "--graceful-timeout", type=float, default=SERVER_GRACEFUL_TIMEOUT
+    )
+    _ = parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    Supervisor(
+        bind(args.host, args.port),
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=args.max_requests_jitter,
+        graceful_timeout=args.graceful_timeout,
+        log_level=args.log_level,
+    ).run()
+
+
+if __name__ == "__main__":
+    main()
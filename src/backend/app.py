@@ -1,8 +1,22 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
+from backend.auth.credit_ledger import CREDIT_LEDGER
+from backend.auth.database import AsyncSessionLocal, async_engine
+from backend.auth.jwt_handler import JwtHandler
+from backend.auth.revocation_filter import REVOCATION_FILTER
 from backend.auth.router import router as auth_router
+from backend.database.changes import CHANGE_FEED
+from backend.database.pool_metrics import POOL_METRICS
+from backend.database.routing import REPLICA_ENGINE, ReadYourWritesMiddleware
+from backend.events.router import router as events_router
+from backend.metrics import REGISTRY, MeteredJSONResponse, MetricsMiddleware
+from backend.metrics.collectors import register_collectors
 from backend.products.router import router as product_router
 from backend.request.router import router as request_router
 from backend.startup import on_startup
@@ -10,26 +24,67 @@ from backend.suggestion.router import router as suggestion_router
 
 _ = load_dotenv()
 
-app = FastAPI()
 
-app.include_router(auth_router)
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    on_startup()
+    background_tasks = [
+        asyncio.create_task(CREDIT_LEDGER.run_flusher()),
+        asyncio.create_task(REVOCATION_FILTER.run_refresher()),
+        asyncio.create_task(JwtHandler.run_blacklist_compaction()),
+        asyncio.create_task(CHANGE_FEED.run_poller()),
+        asyncio.create_task(CHANGE_FEED.run_listener()),
+        asyncio.create_task(CHANGE_FEED.run_compaction()),
+    ]
+
+    yield
+
+    for task in background_tasks:
+        _ = task.cancel()
+
+    async with AsyncSessionLocal() as db:
+        await CREDIT_LEDGER.flush(db, idle_only=False)
+
+    await async_engine.dispose()
+
+    if REPLICA_ENGINE is not None:
+        await REPLICA_ENGINE.dispose()
+
+
+def create_app() -> FastAPI:
+    app = FastAPI(lifespan=lifespan, default_response_class=MeteredJSONResponse)
+
+    app.include_router(auth_router)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(request_router)
+    app.include_router(suggestion_router)
+    app.include_router(product_router)
+    app.include_router(events_router)
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    @app.get("/health")
+    def health_check():
+        return {"message": "OK"}
 
+    @app.get("/health/pool")
+    def pool_health_check():
+        return POOL_METRICS.snapshot(async_engine.pool)
 
-on_startup()
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
-app.include_router(request_router)
-app.include_router(suggestion_router)
-app.include_router(product_router)
+    return app
 
 
-@app.get("/health")
-def health_check():
-    return {"message": "OK"}
+register_collectors()
+app = create_app()
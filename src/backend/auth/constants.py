@@ -10,3 +10,16 @@ def get_secret():
 
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 24000))
+
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 60))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", 10000))
+
+CREDIT_LEASE_SIZE = int(os.getenv("CREDIT_LEASE_SIZE", 10))
+CREDIT_LEASE_IDLE_SECONDS = float(os.getenv("CREDIT_LEASE_IDLE_SECONDS", 30))
+
+REVOCATION_REFRESH_SECONDS = float(os.getenv("REVOCATION_REFRESH_SECONDS", 5))
+REVOCATION_FULL_RELOAD_EVERY = int(os.getenv("REVOCATION_FULL_RELOAD_EVERY", 12))
+BLACKLIST_COMPACTION_SECONDS = float(os.getenv("BLACKLIST_COMPACTION_SECONDS", 3600))
+BLACKLIST_COMPACTION_BATCH_SIZE = int(
+    os.getenv("BLACKLIST_COMPACTION_BATCH_SIZE", 1000)
+)
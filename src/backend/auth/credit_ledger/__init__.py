@@ -0,0 +1,3 @@
+from .credit_ledger import CREDIT_LEDGER, CreditLedger
+
+__all__ = ["CREDIT_LEDGER", "CreditLedger"]
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from dataclasses import dataclass
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.constants import CREDIT_LEASE_IDLE_SECONDS, CREDIT_LEASE_SIZE
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.user_manager import UserManager
+from backend.logger import LOG
+
+# Users share this many locks, so the ledger holds a fixed number however
+# many users it has seen.
+LOCK_STRIPES = 256
+
+
+@dataclass
+class Lease:
+    remaining: int
+    database_credits: int
+    last_used: float
+
+
+class CreditLedger:
+    """
+    Batched credit accounting for high-QPS callers.
+
+    Rather than one UPDATE per call, the worker leases up to `lease_size`
+    credits from the user's row in one atomic UPDATE and spends them from
+    memory. Leased credits are already deducted in the database, so workers
+    can never overspend between them. Leases that sit idle for
+    `idle_seconds` are handed back by the periodic flush.
+    """
+
+    def __init__(self, lease_size: int, idle_seconds: float):
+        self.lease_size = lease_size
+        self.idle_seconds = idle_seconds
+        self._leases: dict[int, Lease] = {}
+        self._locks = [asyncio.Lock() for _ in range(LOCK_STRIPES)]
+
+    async def spend(self, db: AsyncSession, user_id: int) -> int | None:
+        """
+        Spend one credit. Returns the user's remaining credits including the
+        unspent part of the lease, or None if the user has no credits.
+        """
+        async with self._lock(user_id):
+            lease = self._leases.get(user_id)
+
+            if lease is None or lease.remaining == 0:
+                lease = await self._take_lease(db, user_id)
+
+                if lease is None:
+                    return None
+
+            lease.remaining -= 1
+            lease.last_used = time.monotonic()
+
+            return lease.database_credits + lease.remaining
+
+    async def refund(self, db: AsyncSession, user_id: int):
+        async with self._lock(user_id):
+            lease = self._leases.get(user_id)
+
+            if lease is not None:
+                lease.remaining += 1
+                return
+
+        await UserManager.refund_user_credits(db, user_id)
+
+    async def flush(self, db: AsyncSession, idle_only: bool = True):
+        now = time.monotonic()
+
+        for user_id, lease in list(self._leases.items()):
+            if idle_only and now - lease.last_used < self.idle_seconds:
+                continue
+
+            async with self._lock(user_id):
+                lease = self._leases.pop(user_id, None)
+
+                if lease is not None and lease.remaining:
+                    await UserManager.refund_user_credits(db, user_id, lease.remaining)
+
+    async def run_flusher(self):
+        while True:
+            await asyncio.sleep(self.idle_seconds)
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.flush(db)
+            except Exception as e:
+                LOG.error(f"Error flushing credit leases: {e}")
+
+    def _lock(self, user_id: int) -> asyncio.Lock:
+        return self._locks[user_id % LOCK_STRIPES]
+
+    async def _take_lease(self, db: AsyncSession, user_id: int) -> Lease | None:
+        granted = self.lease_size
+        credits = await UserManager.decrement_user_credits(db, user_id, granted)
+
+        if credits is None:
+            granted = 1
+            credits = await UserManager.decrement_user_credits(db, user_id, granted)
+
+        if credits is None:
+            _ = self._leases.pop(user_id, None)
+            return None
+
+        lease = Lease(
+            remaining=granted, database_credits=credits, last_used=time.monotonic()
+        )
+        self._leases[user_id] = lease
+
+        return lease
+
+
+CREDIT_LEDGER = CreditLedger(
+    lease_size=CREDIT_LEASE_SIZE, idle_seconds=CREDIT_LEASE_IDLE_SECONDS
+)
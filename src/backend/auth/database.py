@@ -1,26 +1,61 @@
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import create_engine
-from collections.abc import Generator
+from sqlalchemy import make_url
+from collections.abc import AsyncGenerator, Generator
 import os
 
 from dotenv import load_dotenv
 
+from backend.database.engine import make_async_engine, make_engine
+
 _ = load_dotenv()
 
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
 
-engine = create_engine(
-    DATABASE_URL,
-    pool_size=10,
-    max_overflow=20,
-    pool_timeout=30,
-    pool_recycle=1800,
-)
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "cockroachdb": "cockroachdb+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the sync driver in a DATABASE_URL for its asyncio counterpart.
+
+    asyncpg does not understand libpq's sslmode/sslrootcert query arguments,
+    so sslmode is passed through as asyncpg's ssl argument and the root
+    certificate is picked up from ~/.postgresql/root.crt.
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    if backend not in ASYNC_DRIVERS:
+        return url
+
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+
+    if backend != "sqlite" and "sslmode" in parsed.query:
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        _ = query.pop("sslrootcert", None)
+        parsed = parsed.set(query=query)
+
+    return parsed.render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL", to_async_url(DATABASE_URL))
+
+engine = make_engine(DATABASE_URL)
+async_engine = make_async_engine(ASYNC_DATABASE_URL)
 
 Base = declarative_base()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -29,3 +64,8 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,20 +1,26 @@
 from functools import wraps
 from typing import Any, Callable, TypeVar, cast
 
+from backend.auth.credit_ledger import CREDIT_LEDGER
 from backend.auth.models import User
 from backend.auth.user_manager.user_manager import UserManager
 from backend.logger import LOG
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 F = TypeVar("F", bound=Callable[..., Any])
 
 
-def requires_credit(decrement: bool = True) -> Callable[[F], F]:
+def requires_credit(decrement: bool = True, batched: bool = False) -> Callable[[F], F]:
     """
     Decorator factory that requires a user to have credits to use the function.
 
-    If decrement is True, the user's credits will be decremented.
+    If decrement is True, a credit is taken atomically before the function runs
+    (using the wrapped route's request-scoped `db` session) and refunded if it
+    raises, so concurrent calls can never overspend.
+    If batched is True, credits are spent from a per-worker lease instead of
+    one UPDATE per call, for high-QPS API key clients.
     Attaches the user's credits to the response.
     """
 
@@ -22,6 +28,7 @@ def requires_credit(decrement: bool = True) -> Callable[[F], F]:
         @wraps(func)
         async def wrapper(*args: Any, **kwargs: Any) -> Any:
             user = kwargs.get("user")
+            db = kwargs.get("db")
 
             if user is None:
                 raise HTTPException(status_code=401, detail="Invalid token")
@@ -30,16 +37,43 @@ def requires_credit(decrement: bool = True) -> Callable[[F], F]:
 
             LOG.info(f"User: {user.username}, has {user.credits} credits")
 
-            if user.credits == 0:
-                raise HTTPException(status_code=403, detail="User has no credits")
+            if not decrement:
+                if user.credits == 0:
+                    raise HTTPException(status_code=403, detail="User has no credits")
+
+                result = await func(*args, **kwargs)
+                result["credits"] = user.credits
 
-            result = await func(*args, **kwargs)
+                return JSONResponse(content=result)
 
-            if decrement:
-                UserManager.decrement_user_credits(user.id)
-                result["credits"] = user.credits - 1
+            if db is None:
+                raise HTTPException(
+                    status_code=500, detail="Route is missing a db session"
+                )
+
+            db = cast(AsyncSession, db)
+
+            if batched:
+                credits = await CREDIT_LEDGER.spend(db, user.id)
             else:
-                result["credits"] = user.credits
+                credits = await UserManager.decrement_user_credits(db, user.id)
+
+            if credits is None:
+                raise HTTPException(status_code=403, detail="User has no credits")
+
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                await db.rollback()
+
+                if batched:
+                    await CREDIT_LEDGER.refund(db, user.id)
+                else:
+                    await UserManager.refund_user_credits(db, user.id)
+
+                raise
+
+            result["credits"] = credits
 
             return JSONResponse(content=result)
 
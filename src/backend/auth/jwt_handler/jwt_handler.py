@@ -1,12 +1,26 @@
-from datetime import datetime, timedelta
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import jwt
-from backend.auth.constants import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, get_secret
-from backend.auth.database import get_db
+from backend.auth.constants import (
+    ACCESS_TOKEN_EXPIRE_MINUTES,
+    ALGORITHM,
+    BLACKLIST_COMPACTION_BATCH_SIZE,
+    BLACKLIST_COMPACTION_SECONDS,
+    get_secret,
+)
+from backend.auth.database import AsyncSessionLocal
 from backend.auth.models import Blacklist
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+from backend.auth.principal_cache.principal_cache import hash_credential
+from backend.auth.revocation_filter import REVOCATION_FILTER
 from backend.logger import LOG
 from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class JwtHandler:
@@ -44,50 +58,65 @@ class JwtHandler:
         if expires_delta:
             expire = datetime.now() + expires_delta
 
-        to_encode.update({"exp": expire})
+        # jti keeps tokens issued within the same second distinct
+        to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
         encoded_jwt = jwt.encode(to_encode, get_secret(), algorithm=ALGORITHM)
 
-        JwtHandler.blacklist_token(encoded_jwt, expires_at=expire)
-
         return encoded_jwt
 
     @staticmethod
-    def expire_token(jti: str):
-        db = next(get_db())
-        _ = (
-            db.query(Blacklist)
-            .filter(Blacklist.jti == jti)
-            .update({"expires_at": datetime.now()})
-        )
+    def token_hash(token: str) -> str:
+        """
+        Blacklist key for a token: its sha256, which is much shorter to index
+        than the JWT itself and matches the principal cache key.
+        """
+        token = token.split(" ")[1] if " " in token else token
+        return hash_credential(token)
+
+    @staticmethod
+    def token_expiry(token: str) -> datetime:
+        token = token.split(" ")[1] if " " in token else token
 
-        db.commit()
+        try:
+            exp = jwt.decode(token, options={"verify_signature": False})["exp"]
+            return datetime.fromtimestamp(exp, tz=timezone.utc).replace(tzinfo=None)
+        except (jwt.exceptions.InvalidTokenError, KeyError):
+            return datetime.now() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
 
     @staticmethod
-    def blacklist_token(jti: str, expires_at: datetime):
-        db = next(get_db())
-        _ = (
-            db.query(Blacklist)
-            .filter(Blacklist.jti == jti)
-            .update({"expires_at": expires_at})
+    async def expire_token(db: AsyncSession, token: str):
+        await JwtHandler.blacklist_token(
+            db, JwtHandler.token_hash(token), JwtHandler.token_expiry(token)
         )
 
-        db.commit()
+        PRINCIPAL_CACHE.invalidate_token(token)
 
     @staticmethod
-    def remove_token(jti: str):
-        db = next(get_db())
-        _ = db.query(Blacklist).filter(Blacklist.jti == jti).delete()
-        db.commit()
+    async def blacklist_token(db: AsyncSession, token_hash: str, expires_at: datetime):
+        try:
+            db.add(Blacklist(jti=token_hash, expires_at=expires_at))
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()  # already revoked
+
+        REVOCATION_FILTER.add(token_hash, expires_at)
 
     @staticmethod
-    def is_expired(jti: str):
-        db = next(get_db())
-        blacklist = db.query(Blacklist).filter(Blacklist.jti == jti).first()
+    async def remove_token(db: AsyncSession, token: str):
+        token_hash = JwtHandler.token_hash(token)
 
-        if blacklist is None:
-            return False
+        _ = await db.execute(delete(Blacklist).filter(Blacklist.jti == token_hash))
+        await db.commit()
 
-        if blacklist.expires_at < datetime.now():
+        REVOCATION_FILTER.discard(token_hash)
+        PRINCIPAL_CACHE.invalidate_token(token)
+
+    @staticmethod
+    async def is_expired(db: AsyncSession, token: str):
+        if REVOCATION_FILTER.is_stale():
+            await REVOCATION_FILTER.refresh(db)
+
+        if not REVOCATION_FILTER.is_revoked(JwtHandler.token_hash(token)):
             return False
 
         raise HTTPException(
@@ -95,3 +124,41 @@ class JwtHandler:
             detail="Token expired",
             headers={"expired": "true"},
         )
+
+    @staticmethod
+    async def compact_blacklist(
+        db: AsyncSession, batch_size: int = BLACKLIST_COMPACTION_BATCH_SIZE
+    ) -> int:
+        """
+        Delete blacklist rows whose token has expired anyway, in batches so
+        no single statement holds locks for long. Returns the rows deleted.
+        """
+        deleted = 0
+
+        while True:
+            expired = select(Blacklist.id).filter(Blacklist.expires_at < datetime.now())
+            result = await db.execute(
+                delete(Blacklist).filter(
+                    Blacklist.id.in_(expired.limit(batch_size).scalar_subquery())
+                )
+            )
+            await db.commit()
+
+            deleted += result.rowcount
+
+            if result.rowcount < batch_size:
+                return deleted
+
+    @staticmethod
+    async def run_blacklist_compaction():
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    deleted = await JwtHandler.compact_blacklist(db)
+
+                if deleted:
+                    LOG.info(f"Compacted {deleted} expired blacklist rows")
+            except Exception as e:
+                LOG.error(f"Error compacting blacklist: {e}")
+
+            await asyncio.sleep(BLACKLIST_COMPACTION_SECONDS)
@@ -1,11 +1,38 @@
 from datetime import datetime
-from typing import final
+from typing import Any, final
 
 from pydantic import BaseModel
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    Sequence,
+    String,
+    func,
+    literal_column,
+)
 from sqlalchemy.orm import relationship
 
-from backend.auth.database import Base, engine
+from backend.auth.database import Base
+
+# Rows without a created_at sort as if created at the epoch, after every other
+# row, instead of falling outside every keyset cursor.
+SORT_EPOCH = datetime(1970, 1, 1)
+
+
+def created_at_sort_key(created_at: Any) -> Any:
+    """
+    The expression list endpoints page on. The epoch is rendered inline so
+    queries spell it exactly as the indexes below do, or SQLite ignores them.
+    """
+    return func.coalesce(
+        created_at, literal_column(f"'{SORT_EPOCH:%Y-%m-%d %H:%M:%S.%f}'")
+    )
 
 
 class BaseUser(BaseModel):
@@ -33,8 +60,8 @@ class User(Base):
 class APIKey(Base):
     __tablename__ = "api_key"
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("user.id"))
-    api_key = Column(String)
+    user_id = Column(Integer, ForeignKey("user.id"), index=True)
+    api_key = Column(String, index=True)
 
 
 @final
@@ -63,6 +90,12 @@ class Suggestion(Base):
 
     user = relationship("User", backref="suggestions")  # Relationship to User
 
+    __table_args__ = (
+        Index("ix_suggestion_user_id_created_at", "user_id", "created_at"),
+        Index("ix_suggestion_created_at_id", "created_at", "id"),
+        Index("ix_suggestion_sort_key_id", created_at_sort_key(created_at), id),
+    )
+
 
 @final
 class Request(Base):
@@ -85,17 +118,87 @@ class Request(Base):
     user_name = Column(String)
     admin_name = Column(String)
 
+    __table_args__ = (
+        Index("ix_request_user_id_created_at", "user_id", "created_at"),
+        Index(
+            "ix_request_status_sort_key_id",
+            "status",
+            created_at_sort_key(created_at),
+            id,
+        ),
+        Index("ix_request_created_at_id", "created_at", "id"),
+        Index("ix_request_sort_key_id", created_at_sort_key(created_at), id),
+    )
+
 
 @final
 class Product(Base):
     __tablename__ = "product"
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String)
+    title = Column(String, index=True)
     description = Column(String)
-    category = Column(String)
+    category = Column(String, index=True)
     price = Column(Float)
     stock = Column(Integer)
     thumbnail = Column(String)
 
 
-Base.metadata.create_all(bind=engine)
+# Stock expected from an approved supply request, maintained by
+# backend.database.inventory
+@final
+class StockReservation(Base):
+    __tablename__ = "stock_reservation"
+    id = Column(Integer, primary_key=True)
+    request_id = Column(
+        Integer, ForeignKey("request.id", ondelete="CASCADE"), unique=True
+    )
+    product_id = Column(Integer, ForeignKey("product.id"), index=True)
+    quantity = Column(Integer)
+    status = Column(String, default="reserved")  # reserved | committed | released
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now)
+
+
+# Daily request totals per status and type, maintained by backend.database.rollup
+@final
+class RequestRollup(Base):
+    __tablename__ = "request_rollup"
+    day = Column(Date, primary_key=True)
+    status = Column(String, primary_key=True)
+    request_type = Column(String, primary_key=True)
+    count = Column(Integer, default=0)
+    cost_total = Column(Float, default=0)
+    response_count = Column(Integer, default=0)
+    response_seconds_total = Column(Float, default=0)
+    completed_count = Column(Integer, default=0)
+    completion_seconds_total = Column(Float, default=0)
+
+
+# Writes to requests and suggestions, streamed and then compacted by
+# backend.database.changes
+@final
+class ChangeLog(Base):
+    __tablename__ = "change_log"
+    # A sequence rather than SERIAL (unique_rowid() on CockroachDB), and no
+    # reuse of deleted ids on SQLite: pollers rely on ids that only grow and
+    # have gaps only where a transaction has yet to commit or rolled back.
+    id = Column(Integer, Sequence("change_log_id_seq"), primary_key=True)
+    table_name = Column(String)
+    operation = Column(String)  # created | updated | deleted
+    row_id = Column(Integer)
+    user_id = Column(Integer)
+    data = Column(String)  # the event's JSON payload
+    created_at = Column(DateTime, default=datetime.now, index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}
+
+
+# Startup Models
+
+
+@final
+class SeedMarker(Base):
+    __tablename__ = "seed_marker"
+    name = Column(String, primary_key=True)
+    content_hash = Column(String)
+    applied_at = Column(DateTime, default=datetime.now)
@@ -0,0 +1,3 @@
+from .principal_cache import PRINCIPAL_CACHE, PrincipalCache, hash_credential
+
+__all__ = ["PRINCIPAL_CACHE", "PrincipalCache", "hash_credential"]
@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from backend.auth.constants import AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS
+
+
+def hash_credential(credential: str) -> str:
+    return hashlib.sha256(credential.encode()).hexdigest()
+
+
+class PrincipalCache:
+    """
+    Bounded TTL/LRU cache of verified principals.
+
+    Entries are keyed by the sha256 of the access token or API key, so raw
+    credentials are never kept in memory. Each entry expires after the
+    configured TTL, or earlier if the token itself expires first.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._keys_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        token = token.split(" ")[1] if " " in token else token
+        return f"token:{hash_credential(token)}"
+
+    @staticmethod
+    def api_key_key(api_key: str) -> str:
+        return f"api_key:{hash_credential(api_key)}"
+
+    def get(self, key: str) -> Any | None:
+        if self.max_entries <= 0:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, user = entry
+
+            if expires_at <= time.monotonic():
+                self._discard(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def set(self, key: str, user: Any, expires_in: float | None = None) -> None:
+        if self.max_entries <= 0:
+            return
+
+        ttl = (
+            self.ttl_seconds
+            if expires_in is None
+            else min(expires_in, self.ttl_seconds)
+        )
+
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (time.monotonic() + ttl, user)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_token(self, token: str) -> None:
+        self.invalidate(self.token_key(token))
+
+    def invalidate_token_hash(self, token_hash: str) -> None:
+        self.invalidate(f"token:{token_hash}")
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in self._keys_by_user.pop(user_id, set()):
+                _ = self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def _discard(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return
+
+        keys = self._keys_by_user.get(entry[1].id)
+
+        if keys is not None:
+            keys.discard(key)
+
+            if not keys:
+                del self._keys_by_user[entry[1].id]
+
+
+PRINCIPAL_CACHE = PrincipalCache(
+    max_entries=AUTH_CACHE_MAX_ENTRIES, ttl_seconds=AUTH_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,3 @@
+from .revocation_filter import REVOCATION_FILTER, RevocationFilter
+
+__all__ = ["REVOCATION_FILTER", "RevocationFilter"]
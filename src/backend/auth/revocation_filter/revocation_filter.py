@@ -0,0 +1,103 @@
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.constants import (
+    REVOCATION_FULL_RELOAD_EVERY,
+    REVOCATION_REFRESH_SECONDS,
+)
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.models import Blacklist
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+from backend.logger import LOG
+
+
+class RevocationFilter:
+    """
+    In-memory mirror of the unexpired rows in the blacklist table.
+
+    Answers "is this token revoked?" without a database query. Refreshes
+    only fetch rows past the highest id seen so far. Ids are not guaranteed
+    to commit in order, so every `full_reload_every` refreshes the whole
+    (compacted, and therefore small) set is reloaded instead.
+
+    Revocations made by this worker are visible immediately; those made by
+    other workers are picked up within one refresh interval.
+    """
+
+    def __init__(self, refresh_seconds: float, full_reload_every: int):
+        self.refresh_seconds = refresh_seconds
+        self.full_reload_every = full_reload_every
+        self._revoked: dict[str, datetime] = {}
+        self._last_id = 0
+        self._refreshes = 0
+        self._refreshed_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def add(self, token_hash: str, expires_at: datetime) -> None:
+        self._revoked[token_hash] = expires_at
+
+    def discard(self, token_hash: str) -> None:
+        _ = self._revoked.pop(token_hash, None)
+
+    def is_revoked(self, token_hash: str) -> bool:
+        expires_at = self._revoked.get(token_hash)
+
+        if expires_at is None:
+            return False
+
+        if expires_at < datetime.now():
+            self.discard(token_hash)
+            return False
+
+        return True
+
+    def is_stale(self) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+        )
+
+    async def refresh(self, db: AsyncSession) -> None:
+        async with self._lock:
+            full_reload = self._refreshes % self.full_reload_every == 0
+            query = select(Blacklist.id, Blacklist.jti, Blacklist.expires_at).filter(
+                Blacklist.expires_at >= datetime.now()
+            )
+
+            if not full_reload:
+                query = query.filter(Blacklist.id > self._last_id)
+
+            rows = (await db.execute(query)).all()
+
+            if full_reload:
+                self._revoked = {}
+
+            for id, token_hash, expires_at in rows:
+                if token_hash not in self._revoked:
+                    PRINCIPAL_CACHE.invalidate_token_hash(token_hash)
+
+                self._revoked[token_hash] = expires_at
+                self._last_id = max(self._last_id, id)
+
+            self._refreshes += 1
+            self._refreshed_at = time.monotonic()
+
+    async def run_refresher(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.refresh(db)
+            except Exception as e:
+                LOG.error(f"Error refreshing revocation filter: {e}")
+
+
+REVOCATION_FILTER = RevocationFilter(
+    refresh_seconds=REVOCATION_REFRESH_SECONDS,
+    full_reload_every=REVOCATION_FULL_RELOAD_EVERY,
+)
@@ -7,12 +7,14 @@ import sqlalchemy
 from fastapi import APIRouter, Depends, Header, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.auth.constants import ACCESS_TOKEN_EXPIRE_MINUTES
-from backend.auth.database import get_db
+from backend.auth.database import get_async_db
 from backend.auth.jwt_handler import JwtHandler
 from backend.auth.models import APIKey, BaseUser, User
+from backend.auth.principal_cache import PRINCIPAL_CACHE
 from backend.auth.user_manager import UserManager
 from backend.logger import LOG
 
@@ -22,8 +24,11 @@ router = APIRouter()
 @router.post("/login")
 async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user = UserManager.authenticate_user(form_data.username, form_data.password)
+    user = await UserManager.authenticate_user(
+        db, form_data.username, form_data.password
+    )
 
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = JwtHandler.create_access_token(
@@ -48,13 +53,15 @@ async def login(
 
 
 @router.post("/logout")
-async def logout_user(token: str = Header(..., alias="Authorization")):
+async def logout_user(
+    token: str = Header(..., alias="Authorization"),
+    db: AsyncSession = Depends(get_async_db),
+):
     try:
         try:
-            user = UserManager.get_user_from_access_token(token)
+            user = await UserManager.get_user_from_access_token(db, token)
 
-        except HTTPException:
-            JwtHandler.remove_token(token)  # already expired
+        except HTTPException:  # already expired or revoked
             return {"message": "User logged out successfully"}
 
         if user is None:
@@ -64,13 +71,13 @@ async def logout_user(token: str = Header(..., alias="Authorization")):
         print(f"Error: {e}")
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    JwtHandler.expire_token(token)
+    await JwtHandler.expire_token(db, token)
 
     return {"message": "User logged out successfully"}
 
 
 @router.post("/register")
-async def register_user(user: BaseUser, db: Session = Depends(get_db)):
+async def register_user(user: BaseUser, db: AsyncSession = Depends(get_async_db)):
     try:
         new_user = User(
             username=user.username,
@@ -78,7 +85,7 @@ async def register_user(user: BaseUser, db: Session = Depends(get_db)):
         )
 
         db.add(new_user)
-        db.commit()
+        await db.commit()
     except sqlalchemy.exc.IntegrityError:
         raise HTTPException(
             status_code=400, detail=str("User with this username already exists")
@@ -89,14 +96,15 @@ async def register_user(user: BaseUser, db: Session = Depends(get_db)):
 
 @router.put("/api-key")
 async def create_api_key(
-    token: str = Header(..., alias="Authorization"), db: Session = Depends(get_db)
+    token: str = Header(..., alias="Authorization"),
+    db: AsyncSession = Depends(get_async_db),
 ):
     api_key = uuid.uuid4().hex
-    user = UserManager.get_user_from_access_token(token)
+    user = await UserManager.get_user_from_access_token(db, token)
 
     new_api_key = APIKey(user_id=user.id, api_key=api_key)
     db.add(new_api_key)
-    db.commit()
+    await db.commit()
 
     return {"message": "API key created successfully", "api_key": api_key}
 
@@ -104,9 +112,11 @@ async def create_api_key(
 @router.get("/api-key")
 async def get_api_key(
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    api_key = db.query(APIKey).filter(APIKey.user_id == user.id).first()
+    api_key = (
+        await db.scalars(select(APIKey).filter(APIKey.user_id == user.id))
+    ).first()
 
     if api_key is None:
         raise HTTPException(status_code=404, detail="API key not found")
@@ -117,16 +127,19 @@ async def get_api_key(
 @router.delete("/api-key")
 async def delete_api_key(
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     try:
-        api_key = db.query(APIKey).filter(APIKey.user_id == user.id).first()
+        api_key = (
+            await db.scalars(select(APIKey).filter(APIKey.user_id == user.id))
+        ).first()
 
         if api_key is None:
             raise HTTPException(status_code=404, detail="API key not found")
 
-        _ = db.query(APIKey).filter(APIKey.user_id == user.id).delete()
-        db.commit()
+        _ = await db.execute(delete(APIKey).filter(APIKey.user_id == user.id))
+        await db.commit()
+        PRINCIPAL_CACHE.invalidate_user(user.id)
         return {"message": "API key deleted successfully"}
     except Exception as e:
         LOG.error(f"Error deleting API key: {e}")
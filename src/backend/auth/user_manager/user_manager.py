@@ -1,9 +1,14 @@
 import hashlib
+import time
 
-from backend.auth.database import get_db
+from backend.auth.database import get_async_db
 from backend.auth.jwt_handler import JwtHandler
 from backend.auth.models import APIKey, User
-from fastapi import Header, HTTPException
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+from backend.database.transactions import run_transaction
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 class UserManager:
@@ -14,46 +19,80 @@ class UserManager:
     async def get_user_from_header(
         token: str | None = Header(None, alias="Authorization"),
         api_key: str | None = Header(None, alias="X-API-Key"),
+        db: AsyncSession = Depends(get_async_db),
     ) -> User:
+        """
+        Resolve the calling user.
+
+        FastAPI caches get_async_db per request, so the session used here is
+        the same one the route handler receives.
+        """
         if not token and not api_key:
             raise HTTPException(status_code=401, detail="Missing token or API key")
 
-        return UserManager.get_user(token, api_key)
+        return await UserManager.get_user(db, token, api_key)
 
     @staticmethod
-    def get_user(access_token: str | None, api_key: str | None) -> User:
+    async def get_user(
+        db: AsyncSession, access_token: str | None, api_key: str | None
+    ) -> User:
         if access_token:
-            return UserManager.get_user_from_access_token(access_token)
+            return await UserManager.get_user_from_access_token(db, access_token)
         elif api_key:
-            return UserManager.get_user_from_api_key(api_key)
+            return await UserManager.get_user_from_api_key(db, api_key)
         else:
             raise HTTPException(status_code=401, detail="Missing token or API key")
 
     @staticmethod
-    def get_user_credits(user_id: int) -> int | None:
-        db = next(get_db())
-        user = db.query(User).filter(User.id == user_id).first()
-
-        if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
+    async def get_user_credits(db: AsyncSession, user_id: int) -> int | None:
+        user = await UserManager.get_user_from_db(db, user_id)
 
         return user.credits
 
     @staticmethod
-    def decrement_user_credits(user_id: int):
-        db = next(get_db())
-        user = db.query(User).filter(User.id == user_id).first()
+    async def decrement_user_credits(
+        db: AsyncSession, user_id: int, amount: int = 1
+    ) -> int | None:
+        """
+        Atomically take `amount` credits from the user in a single statement.
 
-        if user is None:
-            raise HTTPException(status_code=404, detail="User not found")
+        Returns the remaining credits, or None if the user has fewer than
+        `amount` credits, in which case nothing is taken.
+        """
+
+        async def work(db: AsyncSession) -> int | None:
+            return (
+                await db.execute(
+                    update(User)
+                    .filter(User.id == user_id, User.credits >= amount)
+                    .values(credits=User.credits - amount)
+                    .returning(User.credits)
+                )
+            ).scalar_one_or_none()
+
+        credits = await run_transaction(db, work, "decrement_user_credits")
 
-        user.credits -= 1  # pyright: ignore[reportAttributeAccessIssue]
-        db.commit()
+        if credits is not None:
+            PRINCIPAL_CACHE.invalidate_user(user_id)
+
+        return credits
 
     @staticmethod
-    def get_user_from_db(user_id: int) -> User:
-        db = next(get_db())
-        user = db.query(User).filter(User.id == user_id).first()
+    async def refund_user_credits(db: AsyncSession, user_id: int, amount: int = 1):
+        async def work(db: AsyncSession) -> None:
+            _ = await db.execute(
+                update(User)
+                .filter(User.id == user_id)
+                .values(credits=User.credits + amount)
+            )
+
+        await run_transaction(db, work, "refund_user_credits")
+
+        PRINCIPAL_CACHE.invalidate_user(user_id)
+
+    @staticmethod
+    async def get_user_from_db(db: AsyncSession, user_id: int) -> User:
+        user = (await db.scalars(select(User).filter(User.id == user_id))).first()
 
         if user is None:
             raise HTTPException(status_code=404, detail="User not found")
@@ -61,30 +100,50 @@ class UserManager:
         return user
 
     @staticmethod
-    def get_user_from_access_token(access_token: str) -> User:
+    async def get_user_from_access_token(db: AsyncSession, access_token: str) -> User:
         access_token = (
             access_token.split(" ")[1] if " " in access_token else access_token
         )
 
-        _ = JwtHandler.is_expired(access_token)
+        cache_key = PRINCIPAL_CACHE.token_key(access_token)
+        user = PRINCIPAL_CACHE.get(cache_key)
+
+        if user is not None:
+            return user
+
+        _ = await JwtHandler.is_expired(db, access_token)
         decoded = JwtHandler.decode(access_token)
 
-        return UserManager.get_user_from_db(decoded["id"])
+        user = await UserManager.get_user_from_db(db, decoded["id"])
+        PRINCIPAL_CACHE.set(cache_key, user, expires_in=decoded["exp"] - time.time())
+
+        return user
 
     @staticmethod
-    def get_user_from_api_key(api_key: str) -> User:
-        db = next(get_db())
-        api_key = db.query(APIKey).filter(APIKey.api_key == api_key).first()
+    async def get_user_from_api_key(db: AsyncSession, api_key: str) -> User:
+        cache_key = PRINCIPAL_CACHE.api_key_key(api_key)
+        user = PRINCIPAL_CACHE.get(cache_key)
+
+        if user is not None:
+            return user
+
+        db_api_key = (
+            await db.scalars(select(APIKey).filter(APIKey.api_key == api_key))
+        ).first()
 
-        if api_key is None:
+        if db_api_key is None:
             raise HTTPException(status_code=401, detail="Invalid API key")
 
-        return UserManager.get_user_from_db(api_key.user_id)
+        user = await UserManager.get_user_from_db(db, db_api_key.user_id)
+        PRINCIPAL_CACHE.set(cache_key, user)
+
+        return user
 
     @staticmethod
-    def authenticate_user(username: str, password: str) -> User:
-        db = next(get_db())
-        user = db.query(User).filter(User.username == username).first()
+    async def authenticate_user(db: AsyncSession, username: str, password: str) -> User:
+        user = (
+            await db.scalars(select(User).filter(User.username == username))
+        ).first()
         hashed_password = hashlib.sha256(password.encode()).hexdigest()
 
         if user is None or not (user.hashed_password == hashed_password):
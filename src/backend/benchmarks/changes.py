@@ -0,0 +1,256 @@
+"""
+Checks for the change stream (GET /events) against the production server
+(python -m backend) with --workers workers on a throwaway SQLite database.
+
+An admin and an employee each open a stream. The employee then creates
+--writes requests, which the admin approves, and hr creates a suggestion
+for each. Streams may be served by other workers than the writes.
+
+- filtered: the admin sees every change, the employee only their own
+  requests
+- resumed: a stream reopened with Last-Event-ID gets what came after it
+- latency: time from a write's response to its event, by percentile
+
+Exits non-zero if a check fails.
+
+    pdm run python -m backend.benchmarks.changes --workers 2 --writes 20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+import httpx
+
+from backend.benchmarks.load import configure, free_port
+
+
+class Stream:
+    """
+    Reads one SSE stream in the background, keeping every event it gets
+    with the time it arrived.
+    """
+
+    def __init__(self, client: httpx.AsyncClient, token: str, last_event_id=None):
+        self.client = client
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+        if last_event_id is not None:
+            self.headers["Last-Event-ID"] = str(last_event_id)
+
+        self.events: list[dict[str, Any]] = []
+        self.ready = asyncio.Event()
+        self.task = asyncio.create_task(self.read())
+
+    async def read(self):
+        event: dict[str, Any] = {}
+
+        async with self.client.stream("GET", "/events", headers=self.headers) as r:
+            r.raise_for_status()
+            self.ready.set()
+
+            async for line in r.aiter_lines():
+                if line:
+                    field, _, value = line.partition(": ")
+                    event[field] = value
+                    continue
+
+                if "event" in event:
+                    event["at"] = time.perf_counter()
+                    event["data"] = json.loads(event["data"])
+                    self.events.append(event)
+
+                event = {}
+
+    def find(self, table: str, operation: str, id: int) -> dict[str, Any] | None:
+        for event in self.events:
+            data = event["data"]
+
+            if (
+                event["event"] == table
+                and data["operation"] == operation
+                and data["id"] == id
+            ):
+                return event
+
+        return None
+
+    def close(self):
+        _ = self.task.cancel()
+
+
+async def login(client: httpx.AsyncClient, username: str) -> str:
+    response = await client.post(
+        "/login", data={"username": username, "password": username}
+    )
+    response.raise_for_status()
+    return response.cookies["access_token"]
+
+
+async def check(client: httpx.AsyncClient, writes: int, wait: float) -> bool:
+    tokens = {name: await login(client, name) for name in ("admin", "employee", "hr")}
+    headers = {name: {"Authorization": f"Bearer {t}"} for name, t in tokens.items()}
+
+    admin = Stream(client, tokens["admin"])
+    employee = Stream(client, tokens["employee"])
+    await asyncio.wait_for(
+        asyncio.gather(admin.ready.wait(), employee.ready.wait()), 10
+    )
+
+    expected: list[tuple[str, str, int, float]] = []
+
+    for i in range(writes):
+        response = await client.post(
+            "/request",
+            json={"request": f"change check {i}", "item_name": "chair"},
+            headers=headers["employee"],
+        )
+        response.raise_for_status()
+        request_id = response.json()["id"]
+        expected.append(("request", "created", request_id, time.perf_counter()))
+
+        response = await client.put(
+            "/request",
+            json={"id": request_id, "status": "approved"},
+            headers=headers["admin"],
+        )
+        response.raise_for_status()
+        expected.append(("request", "updated", request_id, time.perf_counter()))
+
+        response = await client.post(
+            "/suggestion",
+            json={"suggestion": f"change check {i}"},
+            headers=headers["hr"],
+        )
+        response.raise_for_status()
+        suggestion_id = response.json()["id"]
+        expected.append(("suggestion", "created", suggestion_id, time.perf_counter()))
+
+    deadline = time.monotonic() + wait
+
+    while time.monotonic() < deadline and len(admin.events) < len(expected):
+        await asyncio.sleep(0.05)
+
+    await asyncio.sleep(0.5)
+    admin.close()
+    employee.close()
+
+    latencies: list[float] = []
+    missing = 0
+
+    for table, operation, id, written_at in expected:
+        event = admin.find(table, operation, id)
+
+        if event is None:
+            missing += 1
+        else:
+            latencies.append((event["at"] - written_at) * 1000)
+
+    own = [item for item in expected if item[0] == "request"]
+    leaked = [event for event in employee.events if event["event"] != "request"]
+    employee_missing = sum(
+        employee.find(table, operation, id) is None for table, operation, id, _ in own
+    )
+    filtered = not missing and not leaked and not employee_missing
+
+    print(
+        f"{'ok' if filtered else 'FAIL':<4} filtered  admin={len(admin.events)}"
+        f"/{len(expected)} employee={len(employee.events)}/{len(own)} "
+        f"leaked={len(leaked)}"
+    )
+
+    resumed = False
+
+    if admin.events:
+        first = admin.events[0]
+        replay = Stream(client, tokens["admin"], last_event_id=first["id"])
+        await asyncio.wait_for(replay.ready.wait(), 10)
+        await asyncio.sleep(0.5)
+        replay.close()
+
+        got = {event["id"] for event in replay.events}
+        want = {event["id"] for event in admin.events[1:]}
+        resumed = want <= got and first["id"] not in got
+
+        print(
+            f"{'ok' if resumed else 'FAIL':<4} resumed   after={first['id']} "
+            f"replayed={len(got & want)}/{len(want)}"
+        )
+
+    if latencies:
+        p50 = statistics.median(latencies)
+        p99 = (
+            max(latencies)
+            if len(latencies) < 100
+            else statistics.quantiles(latencies, n=100)[98]
+        )
+        print(f"     latency   p50={p50:.0f}ms p99={p99:.0f}ms")
+
+    return filtered and resumed
+
+
+async def run(workers: int, writes: int, wait: float) -> bool:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "backend",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+    )
+
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", timeout=30
+        ) as client:
+            for _ in range(300):
+                try:
+                    _ = (await client.get("/health")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("server did not start")
+
+            return await check(client, writes, wait)
+    finally:
+        server.terminate()
+        _ = server.wait(timeout=60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--workers", type=int, default=2)
+    _ = parser.add_argument("--writes", type=int, default=20)
+    _ = parser.add_argument(
+        "--wait", type=float, default=10, help="seconds to wait for every event"
+    )
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    configure(f"sqlite:///{os.path.join(directory, 'changes.db')}")
+    # The server seeds the fixture users (admin, employee, hr) on startup.
+    os.environ["AUTO_CREATE_SCHEMA"] = "true"
+    os.environ["SEED_DATA"] = "true"
+    os.environ["SERVER_GRACEFUL_TIMEOUT"] = "1"
+
+    ok = asyncio.run(run(args.workers, args.writes, args.wait))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
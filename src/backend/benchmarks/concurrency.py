@@ -0,0 +1,77 @@
+"""
+Throughput of an endpoint as the number of in-flight requests grows.
+
+Drives the app in-process through httpx's ASGI transport, so the numbers
+reflect how well handlers overlap database I/O on a single event loop.
+
+    pdm run python -m backend.benchmarks.concurrency --path /request/all
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from backend.app import app
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        "/login", data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.cookies["access_token"]
+
+
+async def run_level(
+    client: httpx.AsyncClient, path: str, token: str, concurrency: int, total: int
+) -> float:
+    remaining = total
+
+    async def worker():
+        nonlocal remaining
+
+        while remaining > 0:
+            remaining -= 1
+            response = await client.get(
+                path, headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    _ = await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return total / (time.perf_counter() - start)
+
+
+async def run(path: str, levels: list[int], total: int):
+    transport = httpx.ASGITransport(app=app)
+
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client,
+    ):
+        token = await login(client, "admin", "admin")
+
+        _ = await run_level(client, path, token, 1, min(total, 20))
+
+        print(f"{'in-flight':>10} {'req/s':>10}")
+
+        for concurrency in levels:
+            throughput = await run_level(client, path, token, concurrency, total)
+            print(f"{concurrency:>10} {throughput:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--path", default="/request/all")
+    _ = parser.add_argument("--levels", default="1,2,4,8,16,32")
+    _ = parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(",")]
+    asyncio.run(run(args.path, levels, args.requests))
+
+
+if __name__ == "__main__":
+    main()
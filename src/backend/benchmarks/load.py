@@ -0,0 +1,364 @@
+"""
+Load test for the main API flows, with a stored baseline.
+
+Seeds a throwaway SQLite database (or --database-url, which must be empty)
+with --records requests and suggestions using backend.data_creation's
+generators, plus one login per virtual user. Each virtual user then logs
+in and loops list -> create -> update until --duration runs out, either
+in-process through httpx's ASGI transport or, with --workers, against the
+production server (python -m backend) with that many workers.
+
+Prints p50/p99 latency and throughput per endpoint. With --baseline, exits
+non-zero if any endpoint's p99 or the total throughput is more than
+--tolerance worse than the stored numbers (and p99 by over --slack-ms),
+or if any request failed; --save-baseline records the current run instead.
+Timings only compare on one machine, so record the baseline where it is
+checked, as CI does with the previous commit.
+
+    pdm run python -m backend.benchmarks.load --users 10 --duration 20
+    pdm run python -m backend.benchmarks.load --workers 2 \\
+        --baseline /tmp/load-workers.json --save-baseline
+    pdm run python -m backend.benchmarks.load --workers 2 \\
+        --baseline /tmp/load-workers.json
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from collections.abc import Awaitable
+from typing import Any
+
+import httpx
+
+LOAD_PASSWORD = "load-test"
+LOAD_USER_ID_START = 100_000
+
+
+def configure(database_url: str) -> None:
+    # backend reads its settings at import time, so these must be set before
+    # anything under backend is imported, here and in the uvicorn workers.
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["AUTO_CREATE_SCHEMA"] = "false"
+    os.environ["SEED_DATA"] = "false"
+    os.environ.setdefault("JWT_SECRET", "load-test")
+
+
+def seed(users: int, records: int) -> None:
+    from backend.auth.database import SessionLocal
+    from backend.auth.models import User
+    from backend.data_creation.data_creation import insert_ignore, seed_database
+    from backend.startup import backfill_rollups, create_schema
+
+    create_schema()
+
+    with SessionLocal() as db:
+        seed_database(db, records)
+        insert_ignore(
+            db,
+            User,
+            [
+                {
+                    "id": LOAD_USER_ID_START + i,
+                    "username": f"load{i}",
+                    "email": f"load{i}@example.com",
+                    "hashed_password": hashlib.sha256(
+                        LOAD_PASSWORD.encode()
+                    ).hexdigest(),
+                    "credits": 100,
+                    "role": "employee",
+                }
+                for i in range(users)
+            ],
+        )
+        db.commit()
+
+    backfill_rollups()
+
+
+class Recorder:
+    def __init__(self, warmup_until: float):
+        self.warmup_until = warmup_until
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.errors: defaultdict[str, int] = defaultdict(int)
+
+    async def timed(
+        self, name: str, call: Awaitable[httpx.Response], always: bool = False
+    ) -> httpx.Response:
+        started = time.perf_counter()
+        response = await call
+
+        # Logins all happen at the start, so they are kept despite the warmup.
+        if always or started >= self.warmup_until:
+            self.latencies[name].append((time.perf_counter() - started) * 1000)
+
+            if response.is_error:
+                self.errors[name] += 1
+
+        return response
+
+
+async def virtual_user(
+    client: httpx.AsyncClient, index: int, recorder: Recorder, deadline: float
+) -> None:
+    response = await recorder.timed(
+        "POST /login",
+        client.post(
+            "/login", data={"username": f"load{index}", "password": LOAD_PASSWORD}
+        ),
+        always=True,
+    )
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.cookies['access_token']}"}
+    iteration = 0
+
+    while time.perf_counter() < deadline:
+        iteration += 1
+
+        for path in ("/product/all", "/request/all", "/suggestion/all"):
+            _ = await recorder.timed(
+                f"GET {path}",
+                client.get(path, params={"limit": 50}, headers=headers),
+            )
+
+        response = await recorder.timed(
+            "POST /request",
+            client.post(
+                "/request",
+                json={
+                    "request": f"Load test request {iteration}",
+                    "request_type": "maintenance",
+                },
+                headers=headers,
+            ),
+        )
+
+        if response.is_success:
+            _ = await recorder.timed(
+                "PUT /request",
+                client.put(
+                    "/request",
+                    json={"id": response.json()["id"], "comments": "updated"},
+                    headers=headers,
+                ),
+            )
+
+        _ = await recorder.timed(
+            "GET /request", client.get("/request", headers=headers)
+        )
+
+
+async def drive(
+    client: httpx.AsyncClient, users: int, duration: float, warmup: float
+) -> tuple[Recorder, float]:
+    started = time.perf_counter()
+    recorder = Recorder(started + warmup)
+    deadline = started + warmup + duration
+
+    _ = await asyncio.gather(
+        *(virtual_user(client, i, recorder, deadline) for i in range(users))
+    )
+
+    return recorder, time.perf_counter() - started - warmup
+
+
+async def run_in_process(
+    users: int, duration: float, warmup: float
+) -> tuple[Recorder, float]:
+    from backend.app import app
+
+    # Count unhandled errors as 500s, as a server would, instead of aborting.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://load") as client,
+    ):
+        return await drive(client, users, duration, warmup)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_workers(
+    workers: int, users: int, duration: float, warmup: float
+) -> tuple[Recorder, float]:
+    port = free_port()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "backend",
+            "--workers",
+            str(workers),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+    )
+
+    try:
+        limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+        ) as client:
+            for _ in range(300):
+                try:
+                    _ = (await client.get("/health")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("server did not start")
+
+            return await drive(client, users, duration, warmup)
+    finally:
+        server.terminate()
+        _ = server.wait(timeout=30)
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict[str, Any]:
+    endpoints: dict[str, dict[str, float]] = {}
+
+    for name, latencies in sorted(recorder.latencies.items()):
+        percentiles = (
+            statistics.quantiles(latencies, n=100)
+            if len(latencies) > 1
+            else latencies * 99
+        )
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": recorder.errors[name],
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p99_ms": round(percentiles[98], 2),
+            "rps": round(len(latencies) / elapsed, 1),
+        }
+
+    return {
+        "endpoints": endpoints,
+        "total_rps": round(sum(endpoint["rps"] for endpoint in endpoints.values()), 1),
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float, slack_ms: float
+) -> list[str]:
+    """
+    Regressions against the baseline. p99 must also grow by more than
+    slack_ms, so that jitter on millisecond endpoints does not fail a run.
+    """
+    regressions: list[str] = []
+
+    for name, endpoint in current["endpoints"].items():
+        if endpoint["errors"]:
+            regressions.append(f"{name}: {endpoint['errors']} failed requests")
+
+        expected = baseline["endpoints"].get(name)
+
+        if expected and endpoint["p99_ms"] > max(
+            expected["p99_ms"] * (1 + tolerance), expected["p99_ms"] + slack_ms
+        ):
+            regressions.append(
+                f"{name}: p99 {endpoint['p99_ms']}ms, baseline {expected['p99_ms']}ms"
+            )
+
+    if current["total_rps"] < baseline["total_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {current['total_rps']} req/s, "
+            f"baseline {baseline['total_rps']} req/s"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    _ = parser.add_argument("--database-url")
+    _ = parser.add_argument("--users", type=int, default=10)
+    _ = parser.add_argument("--records", type=int, default=10_000)
+    _ = parser.add_argument("--duration", type=float, default=20)
+    _ = parser.add_argument("--warmup", type=float, default=3)
+    _ = parser.add_argument("--workers", type=int, default=0)
+    _ = parser.add_argument("--baseline")
+    _ = parser.add_argument("--save-baseline", action="store_true")
+    _ = parser.add_argument("--tolerance", type=float, default=0.5)
+    _ = parser.add_argument("--slack-ms", type=float, default=25)
+    args = parser.parse_args()
+
+    database_url = args.database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), "load.db"
+    )
+    configure(database_url)
+    seed(args.users, args.records)
+
+    if args.workers:
+        recorder, elapsed = asyncio.run(
+            run_workers(args.workers, args.users, args.duration, args.warmup)
+        )
+    else:
+        recorder, elapsed = asyncio.run(
+            run_in_process(args.users, args.duration, args.warmup)
+        )
+
+    current = summarize(recorder, elapsed)
+
+    print(
+        f"{'endpoint':<22} {'requests':>9} {'errors':>7} "
+        f"{'p50':>9} {'p99':>9} {'req/s':>8}"
+    )
+
+    for name, endpoint in current["endpoints"].items():
+        print(
+            f"{name:<22} {endpoint['requests']:>9} {endpoint['errors']:>7} "
+            f"{endpoint['p50_ms']:>7.1f}ms {endpoint['p99_ms']:>7.1f}ms "
+            f"{endpoint['rps']:>8.1f}"
+        )
+
+    print(f"total {current['total_rps']} req/s")
+
+    if not args.baseline:
+        return
+
+    if args.save_baseline:
+        current["settings"] = {
+            "users": args.users,
+            "records": args.records,
+            "duration": args.duration,
+            "workers": args.workers,
+        }
+
+        with open(args.baseline, "w") as file:
+            json.dump(current, file, indent=2)
+            _ = file.write("\n")
+
+        print(f"saved baseline to {args.baseline}")
+        return
+
+    with open(args.baseline) as file:
+        regressions = compare(current, json.load(file), args.tolerance, args.slack_ms)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Checks for backend.database.transactions.run_transaction against the
+configured database.
+
+- injected: a unit of work that inserts a row and then fails with a
+  serialization failure (SQLSTATE 40001) twice must commit exactly one row
+  on its third attempt; one that always fails must give up with a 503 and
+  leave nothing behind
+- contended: --tasks concurrent read-modify-write decrements of one user's
+  credits, the pattern that conflicts under SERIALIZABLE (and SQLite WAL
+  lock upgrades), must lose no update
+
+Prints retries by error code and exits non-zero if a check fails.
+
+    pdm run python -m backend.benchmarks.retries --tasks 20 --rounds 10
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.models import Suggestion, User
+from backend.database.transactions import (
+    RETRYABLE_SQLSTATES,
+    TRANSACTION_RETRIES,
+    run_transaction,
+)
+from backend.startup import create_schema
+
+
+class SerializationFailure(Exception):
+    sqlstate = "40001"
+
+
+def retries(name: str) -> dict[str, float]:
+    counts = {
+        code: TRANSACTION_RETRIES.value(name, code)
+        for code in (*RETRYABLE_SQLSTATES, "sqlite_busy")
+    }
+
+    return {code: count for code, count in counts.items() if count}
+
+
+async def count(marker: str) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).filter(Suggestion.suggestion == marker)
+        )
+
+
+async def check_injected() -> bool:
+    marker = f"retry-check-{uuid.uuid4().hex}"
+    attempts = 0
+
+    async def work(db: AsyncSession) -> int:
+        nonlocal attempts
+        attempts += 1
+        db.add(Suggestion(suggestion=marker))
+        await db.flush()
+
+        if attempts < 3:
+            raise OperationalError("injected", {}, SerializationFailure())
+
+        return attempts
+
+    async def always_fails(db: AsyncSession) -> None:
+        db.add(Suggestion(suggestion=marker))
+        await db.flush()
+        raise OperationalError("injected", {}, SerializationFailure())
+
+    async with AsyncSessionLocal() as db:
+        result = await run_transaction(db, work, "retry_check")
+
+    rows = await count(marker)
+    ok = result == 3 and rows == 1 and retries("retry_check") == {"40001": 2}
+
+    async with AsyncSessionLocal() as db:
+        try:
+            await run_transaction(db, always_fails, "retry_check", max_attempts=2)
+            status = 200
+        except HTTPException as e:
+            status = e.status_code
+
+    ok = ok and status == 503 and await count(marker) == 1
+
+    async with AsyncSessionLocal() as db:
+        _ = await db.execute(delete(Suggestion).filter(Suggestion.suggestion == marker))
+        await db.commit()
+
+    print(
+        f"{'ok' if ok else 'FAIL':<4} injected  attempts={result} rows={rows} "
+        f"exhausted_status={status}"
+    )
+
+    return ok
+
+
+async def check_contended(tasks: int, rounds: int) -> bool:
+    credits = tasks * rounds
+
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"retry-check-{uuid.uuid4().hex}", credits=credits)
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    async def decrement(db: AsyncSession) -> None:
+        # Read, then write what was read: a lost update unless serialized.
+        current = await db.scalar(select(User.credits).filter(User.id == user_id))
+        _ = await db.execute(
+            update(User).filter(User.id == user_id).values(credits=current - 1)
+        )
+
+    async def task() -> int:
+        failed = 0
+
+        for _ in range(rounds):
+            async with AsyncSessionLocal() as db:
+                try:
+                    await run_transaction(db, decrement, "retry_contention")
+                except HTTPException:
+                    failed += 1
+
+        return failed
+
+    start = time.perf_counter()
+    failed = sum(await asyncio.gather(*(task() for _ in range(tasks))))
+    elapsed = time.perf_counter() - start
+
+    async with AsyncSessionLocal() as db:
+        left = await db.scalar(select(User.credits).filter(User.id == user_id))
+        _ = await db.execute(delete(User).filter(User.id == user_id))
+        await db.commit()
+
+    committed = credits - failed
+    ok = left == credits - committed
+    counts = " ".join(
+        f"{code}={value:.0f}" for code, value in retries("retry_contention").items()
+    )
+
+    print(
+        f"{'ok' if ok else 'FAIL':<4} contended committed={committed} "
+        f"gave_up={failed} left={left} {committed / elapsed:.0f} tx/s "
+        f"retries: {counts or 'none'}"
+    )
+
+    return ok
+
+
+async def run(tasks: int, rounds: int) -> bool:
+    return all([await check_injected(), await check_contended(tasks, rounds)])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--tasks", type=int, default=20)
+    _ = parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    create_schema()
+    ok = asyncio.run(run(args.tasks, args.rounds))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
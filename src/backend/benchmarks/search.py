@@ -0,0 +1,111 @@
+"""
+Product search latency at catalog scale.
+
+Seeds a throwaway SQLite database with --rows products, then times a mix
+of exact, prefix and misspelled queries against the FTS5 index and the
+in-process fallback index.
+
+    pdm run python -m backend.benchmarks.search --rows 100000
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from random import Random
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.auth.models import Base, Product
+from backend.database.search import ProductSearch
+
+COMMON_WORDS = (
+    "oak walnut velvet linen leather steel glass marble rattan bamboo modern "
+    "classic rustic compact folding adjustable ergonomic vintage outdoor "
+    "kitchen bedroom office garden sofa chair table desk lamp shelf bed "
+    "cabinet mirror rug stool bench wardrobe dresser apple banana kiwi "
+    "juice coffee tea honey rice pasta cheese yogurt bread olive"
+).split()
+
+CATEGORIES = ["furniture", "groceries", "lighting", "decor", "outdoor", "kitchen"]
+
+QUERIES = ["sofa", "oak table", "ergon", "walnt desk", "chiar", "honey tea", "lamp"]
+
+
+def seed(url: str, rows: int, chunk_size: int = 10_000):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    random = Random(42)
+
+    # A long tail of brand and model names, like a real catalog, so that
+    # each common word matches only a small share of products.
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    rare = [
+        "".join(random.choices(letters, k=random.randint(4, 9))) for _ in range(20_000)
+    ]
+    words = COMMON_WORDS + rare
+    weights = [50] * len(COMMON_WORDS) + [1] * len(rare)
+
+    with engine.begin() as connection:
+        for offset in range(0, rows, chunk_size):
+            _ = connection.execute(
+                insert(Product),
+                [
+                    {
+                        "title": " ".join(random.choices(words, weights, k=3)).title(),
+                        "description": " ".join(random.choices(words, weights, k=12)),
+                        "category": random.choice(CATEGORIES),
+                        "stock": random.randint(0, 100),
+                    }
+                    for _ in range(offset, min(offset + chunk_size, rows))
+                ],
+            )
+
+    ProductSearch.create_indexes(engine)
+    engine.dispose()
+
+
+async def measure(url: str, backend: str, repeat: int):
+    engine = create_async_engine(url)
+    search = ProductSearch(backend, ttl=3600)
+
+    async with AsyncSession(engine) as db:
+        started = time.perf_counter()
+        _ = await search.search(db, QUERIES[0])
+        warmup = time.perf_counter() - started
+
+        for query in QUERIES:
+            timings: list[float] = []
+
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = await search.search(db, query)
+                timings.append((time.perf_counter() - started) * 1000)
+
+            print(
+                f"{search._mode:<8} {query!r:<14} total={result['total']:<7} "
+                f"p50={statistics.median(timings):7.2f}ms max={max(timings):7.2f}ms"
+            )
+
+    print(f"{search._mode:<8} first query (includes index build) {warmup:.2f}s")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--rows", type=int, default=100_000)
+    _ = parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "search.db")
+    seed(f"sqlite:///{path}", args.rows)
+
+    for backend in ("auto", "memory"):
+        asyncio.run(measure(f"sqlite+aiosqlite:///{path}", backend, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+List endpoint serialization, before and after column-projected rows.
+
+Seeds a throwaway SQLite database with --rows products, requests and
+suggestions, then times producing the JSON body of an unpaginated /all
+response both ways:
+
+- entities: load ORM instances, run jsonable_encoder over them and
+  json.dumps the result, as FastAPI does for a raw ORM return value
+- rows: select the response schema's columns with read_all_from_db and
+  serialize the dicts with pydantic-core
+
+    pdm run python -m backend.benchmarks.serialization --rows 10000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from random import Random
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.auth.models import Base, Product, Request, Suggestion
+from backend.database.database import read_all_from_db
+
+STATUSES = ["pending", "approved", "denied", "delivered"]
+
+
+def seed(url: str, rows: int):
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    random = Random(42)
+    start = datetime(2025, 1, 1)
+
+    def when(i: int) -> datetime:
+        return start + timedelta(minutes=i, microseconds=random.randint(0, 999_999))
+
+    with engine.begin() as connection:
+        _ = connection.execute(
+            insert(Product),
+            [
+                {
+                    "title": f"Product {i}",
+                    "description": "A sturdy, well reviewed item " * 3,
+                    "category": random.choice(["furniture", "groceries"]),
+                    "price": round(random.uniform(1, 500), 2),
+                    "stock": random.randint(0, 100),
+                    "thumbnail": f"https://cdn.example.com/{i}.png",
+                }
+                for i in range(rows)
+            ],
+        )
+        _ = connection.execute(
+            insert(Request),
+            [
+                {
+                    "user_id": random.randint(1, 50),
+                    "user_name": f"user{i % 50}",
+                    "request": f"Restock item {i}",
+                    "request_type": random.choice(["supply", "maintenance"]),
+                    "status": random.choice(STATUSES),
+                    "created_at": when(i),
+                    "updated_at": when(i),
+                    "requested_amount": random.randint(1, 20),
+                    "item_name": f"Product {i}",
+                    "is_anonymous": False,
+                }
+                for i in range(rows)
+            ],
+        )
+        _ = connection.execute(
+            insert(Suggestion),
+            [
+                {
+                    "user_id": random.randint(1, 50),
+                    "user_name": f"user{i % 50}",
+                    "suggestion": f"Suggestion number {i}",
+                    "created_at": when(i),
+                    "updated_at": when(i),
+                    "is_anonymous": False,
+                }
+                for i in range(rows)
+            ],
+        )
+
+    engine.dispose()
+
+
+async def entities(db: AsyncSession, model: Any) -> bytes:
+    items = (await db.scalars(select(model))).all()
+    return json.dumps(jsonable_encoder(items), separators=(",", ":")).encode()
+
+
+async def rows(db: AsyncSession, model: Any) -> bytes:
+    return to_json(await read_all_from_db(db, model))
+
+
+async def measure(url: str, repeat: int) -> list[tuple[str, str, float, int]]:
+    engine = create_async_engine(url)
+    results: list[tuple[str, str, float, int]] = []
+    ways: dict[str, Callable[[AsyncSession, Any], Awaitable[bytes]]] = {
+        "entities": entities,
+        "rows": rows,
+    }
+
+    for model in (Product, Request, Suggestion):
+        for name, build in ways.items():
+            timings: list[float] = []
+            size = 0
+
+            for _ in range(repeat):
+                # A fresh session each time, so no identity map is reused.
+                async with AsyncSession(engine) as db:
+                    started = time.perf_counter()
+                    size = len(await build(db, model))
+                    timings.append((time.perf_counter() - started) * 1000)
+
+            results.append(
+                (model.__tablename__, name, statistics.median(timings), size)
+            )
+
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--rows", type=int, default=10_000)
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "serialization.db")
+    seed(f"sqlite:///{path}", args.rows)
+
+    results = asyncio.run(measure(f"sqlite+aiosqlite:///{path}", args.repeat))
+    before = {table: ms for table, name, ms, _ in results if name == "entities"}
+
+    print(f"{'table':<12} {'path':<10} {'p50':>10} {'body':>10} {'speedup':>8}")
+
+    for table, name, ms, size in results:
+        print(
+            f"{table:<12} {name:<10} {ms:>8.1f}ms {size / 1024:>8.0f}KB "
+            f"{before[table] / ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Cold start cost: time to import backend.app, and time from spawning uvicorn
+until /health first answers 200.
+
+    pdm run python -m backend.benchmarks.startup --runs 5
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time() -> float:
+    start = time.perf_counter()
+    _ = subprocess.run([sys.executable, "-c", "import backend.app"], check=True)
+    return time.perf_counter() - start
+
+
+def time_to_first_200(timeout: float) -> float:
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "backend.app:create_app",
+            "--factory",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=os.environ.copy(),
+    )
+
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+
+                if response.status_code == 200:
+                    return time.perf_counter() - start
+            except httpx.TransportError:
+                pass
+
+            time.sleep(0.01)
+
+        raise TimeoutError(f"/health did not answer within {timeout}s")
+    finally:
+        server.terminate()
+        _ = server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--runs", type=int, default=5)
+    _ = parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.runs)]
+    first_200 = [time_to_first_200(args.timeout) for _ in range(args.runs)]
+
+    print(f"{'metric':<20} {'median s':>10} {'max s':>10}")
+    print(f"{'import':<20} {statistics.median(imports):>10.3f} {max(imports):>10.3f}")
+    print(
+        f"{'first /health 200':<20} "
+        f"{statistics.median(first_200):>10.3f} {max(first_200):>10.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Write throughput per engine configuration.
+
+Runs --writers concurrent tasks that each commit --transactions small
+transactions (insert a request, then update it), like the API's write
+paths, against:
+
+- sqlite-default: a plain create_async_engine on a fresh SQLite file
+- sqlite-tuned: backend.database.engine's factory (WAL, busy timeout, ...)
+- server: the factory against --database-url, if given (an empty
+  PostgreSQL or CockroachDB database)
+
+and reports committed transactions per second, failures and p99 latency.
+
+    pdm run python -m backend.benchmarks.writes --writers 20 --transactions 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+
+from backend.auth.database import to_async_url
+from backend.auth.models import Base, Request
+from backend.database.engine import make_async_engine
+
+
+async def writer(engine: AsyncEngine, transactions: int, latencies: list[float]) -> int:
+    failures = 0
+
+    for i in range(transactions):
+        started = time.perf_counter()
+
+        async with AsyncSession(engine, expire_on_commit=False) as db:
+            try:
+                request = Request(request=f"write {i}", status="pending")
+                db.add(request)
+                await db.flush()
+                _ = await db.execute(
+                    update(Request)
+                    .filter(Request.id == request.id)
+                    .values(status="approved")
+                )
+                await db.commit()
+                latencies.append((time.perf_counter() - started) * 1000)
+            except DBAPIError:
+                await db.rollback()
+                failures += 1
+
+    return failures
+
+
+async def measure(
+    name: str, engine: AsyncEngine, writers: int, transactions: int
+) -> None:
+    latencies: list[float] = []
+
+    started = time.perf_counter()
+    failures = sum(
+        await asyncio.gather(
+            *(writer(engine, transactions, latencies) for _ in range(writers))
+        )
+    )
+    elapsed = time.perf_counter() - started
+    await engine.dispose()
+
+    p99 = statistics.quantiles(latencies, n=100)[98] if len(latencies) > 1 else 0
+    print(
+        f"{name:<15} {len(latencies) / elapsed:>9.0f} tx/s {failures:>6} failed "
+        f"p99={p99:.1f}ms"
+    )
+
+
+def create_schema(url: str) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    _ = parser.add_argument("--writers", type=int, default=20)
+    _ = parser.add_argument("--transactions", type=int, default=50)
+    _ = parser.add_argument("--database-url")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    modes: dict[str, tuple[str, bool]] = {
+        "sqlite-default": (f"sqlite:///{os.path.join(directory, 'default.db')}", False),
+        "sqlite-tuned": (f"sqlite:///{os.path.join(directory, 'tuned.db')}", True),
+    }
+
+    if args.database_url:
+        modes["server"] = (args.database_url, True)
+
+    for name, (url, tuned) in modes.items():
+        create_schema(url)
+        async_url = to_async_url(url)
+        engine = (
+            make_async_engine(async_url) if tuned else create_async_engine(async_url)
+        )
+        asyncio.run(measure(name, engine, args.writers, args.transactions))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,98 @@
 import os
+import tempfile
 
 APP_MODE = os.environ.get("APP_MODE", "prod")
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("DEFAULT_PAGE_SIZE", 50))
+MAX_PAGE_SIZE = int(os.environ.get("MAX_PAGE_SIZE", 200))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", 500))
+
+# Startup behaviour, see backend.startup.on_startup. Set but left empty, they
+# keep their defaults rather than turning off.
+AUTO_CREATE_SCHEMA = (os.environ.get("AUTO_CREATE_SCHEMA") or "true").lower() == "true"
+SEED_DATA = (os.environ.get("SEED_DATA") or "true").lower() == "true"
+
+# Response cache for read-heavy list endpoints, see backend.database.response_cache
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "lru")
+RESPONSE_CACHE_URL = os.environ.get("RESPONSE_CACHE_URL", "redis://localhost:6379/0")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", 30))
+
+# Product search, see backend.database.search: "auto" uses the database's
+# full-text index when it has one, "memory" always uses the in-process index.
+PRODUCT_SEARCH_BACKEND = os.environ.get("PRODUCT_SEARCH_BACKEND", "auto")
+SEARCH_INDEX_TTL_SECONDS = float(os.environ.get("SEARCH_INDEX_TTL_SECONDS", 60))
+
+# Query inspection, see backend.metrics.query_inspector: "off", "log" to warn
+# about repeated statements (N+1) and routes over QUERY_BUDGET, or "raise" to
+# fail the request instead, for tests. Slow queries are logged in every mode.
+QUERY_INSPECTION = os.environ.get(
+    "QUERY_INSPECTION", "log" if APP_MODE == "dev" else "off"
+)
+QUERY_REPEAT_THRESHOLD = int(os.environ.get("QUERY_REPEAT_THRESHOLD", 10))
+QUERY_BUDGET = int(os.environ.get("QUERY_BUDGET", 0))
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", 500))
+
+# Engine tuning, see backend.database.engine. Pool settings apply to servers
+# (PostgreSQL, CockroachDB) and file-backed SQLite alike.
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get("DB_STATEMENT_CACHE_SIZE", 500))
+DB_STATEMENT_TIMEOUT_MS = int(os.environ.get("DB_STATEMENT_TIMEOUT_MS", 0))
+DB_APPLICATION_NAME = os.environ.get("DB_APPLICATION_NAME", "backend")
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", 30_000))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+
+# Read routing, see backend.database.routing. Read-only handlers read from
+# READ_REPLICA_URL when set, or else with CockroachDB follower reads when
+# FOLLOWER_READS is on, except for clients that wrote in the last
+# READ_YOUR_WRITES_SECONDS, who read from the primary.
+READ_REPLICA_URL = os.environ.get("READ_REPLICA_URL", "")
+FOLLOWER_READS = os.environ.get("FOLLOWER_READS", "false").lower() == "true"
+READ_YOUR_WRITES_SECONDS = float(os.environ.get("READ_YOUR_WRITES_SECONDS", 5))
+
+# Transaction retries, see backend.database.transactions: a unit of work that
+# hits a serialization failure, deadlock or SQLite lock is rerun up to
+# TRANSACTION_MAX_ATTEMPTS times, after a random delay below a cap that starts
+# at TRANSACTION_BACKOFF_MS and doubles per attempt up to the maximum.
+TRANSACTION_MAX_ATTEMPTS = int(os.environ.get("TRANSACTION_MAX_ATTEMPTS", 5))
+TRANSACTION_BACKOFF_MS = float(os.environ.get("TRANSACTION_BACKOFF_MS", 10))
+TRANSACTION_MAX_BACKOFF_MS = float(os.environ.get("TRANSACTION_MAX_BACKOFF_MS", 1000))
+
+# Serving, see backend.__main__. WEB_CONCURRENCY=0 starts one worker per CPU
+# available to the process; SERVER_MAX_REQUESTS=0 never recycles workers.
+SERVER_HOST = os.environ.get("SERVER_HOST", "0.0.0.0")
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 0))
+SERVER_MAX_REQUESTS = int(os.environ.get("SERVER_MAX_REQUESTS", 10_000))
+SERVER_MAX_REQUESTS_JITTER = int(os.environ.get("SERVER_MAX_REQUESTS_JITTER", 1000))
+SERVER_GRACEFUL_TIMEOUT = float(os.environ.get("SERVER_GRACEFUL_TIMEOUT", 30))
+STARTUP_LOCK_PATH = os.environ.get(
+    "STARTUP_LOCK_PATH", os.path.join(tempfile.gettempdir(), "backend-startup.lock")
+)
+# Any 64-bit integer no other application on the database uses.
+STARTUP_LOCK_KEY = int(os.environ.get("STARTUP_LOCK_KEY", 7_340_211))
+
+# Change feed, see backend.database.changes. Writes to requests and suggestions
+# are logged in the same transaction and kept for CHANGE_LOG_RETENTION_SECONDS,
+# so reconnecting clients can catch up. Each worker with subscribers polls the
+# log every CHANGE_FEED_POLL_SECONDS, or sooner when woken by a write (by
+# NOTIFY on PostgreSQL). Streams end after CHANGE_STREAM_MAX_SECONDS, and the
+# client resumes from where it was on reconnecting.
+CHANGE_FEED_POLL_SECONDS = float(os.environ.get("CHANGE_FEED_POLL_SECONDS", 1))
+CHANGE_FEED_QUEUE_SIZE = int(os.environ.get("CHANGE_FEED_QUEUE_SIZE", 1000))
+CHANGE_FEED_GAP_SECONDS = float(os.environ.get("CHANGE_FEED_GAP_SECONDS", 30))
+CHANGE_FEED_REPLAY_LIMIT = int(os.environ.get("CHANGE_FEED_REPLAY_LIMIT", 1000))
+CHANGE_LOG_RETENTION_SECONDS = float(
+    os.environ.get("CHANGE_LOG_RETENTION_SECONDS", 3600)
+)
+CHANGE_LOG_COMPACTION_SECONDS = float(
+    os.environ.get("CHANGE_LOG_COMPACTION_SECONDS", 600)
+)
+CHANGE_STREAM_HEARTBEAT_SECONDS = float(
+    os.environ.get("CHANGE_STREAM_HEARTBEAT_SECONDS", 15)
+)
+CHANGE_STREAM_MAX_SECONDS = float(os.environ.get("CHANGE_STREAM_MAX_SECONDS", 300))
@@ -0,0 +1,55 @@
+"""
+Generate a production-sized dataset.
+
+Appends users, requests and suggestions with skewed per-user activity,
+weekly and yearly seasonality and realistic status transitions, streamed
+into the database in chunks (COPY on PostgreSQL, executemany elsewhere),
+optionally from several processes.
+
+    pdm run python -m backend.data_creation --users 100000 \\
+        --requests 2000000 --suggestions 500000 --processes 4
+"""
+
+import argparse
+import os
+
+from backend.data_creation.generator import generate
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    _ = parser.add_argument(
+        "--database-url", default=os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    )
+    _ = parser.add_argument("--users", type=int, default=1000)
+    _ = parser.add_argument("--requests", type=int, default=10_000)
+    _ = parser.add_argument("--suggestions", type=int, default=5000)
+    _ = parser.add_argument("--days", type=int, default=365)
+    _ = parser.add_argument(
+        "--activity-skew",
+        type=float,
+        default=0.9,
+        help="Zipf exponent of per-user activity; 0 spreads it evenly",
+    )
+    _ = parser.add_argument("--chunk-size", type=int, default=10_000)
+    _ = parser.add_argument("--processes", type=int, default=1)
+    _ = parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(
+        args.database_url,
+        users=args.users,
+        requests=args.requests,
+        suggestions=args.suggestions,
+        days=args.days,
+        activity_skew=args.activity_skew,
+        chunk_size=args.chunk_size,
+        processes=args.processes,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
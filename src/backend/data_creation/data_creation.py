@@ -1,14 +1,33 @@
 import hashlib
 import json
 import os
+from datetime import datetime
+from functools import cache
 from random import choice, randint
+from typing import TYPE_CHECKING, Any
 
-from faker import Faker
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
-from backend.auth.models import Product, Request, Suggestion, User
+from backend.auth.models import Product, Request, SeedMarker, Suggestion, User
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+DATA_DIR = "data"
+
+# Bump to re-run the user and fake data seed steps on existing databases.
+SEED_VERSION = "1"
+
+
+@cache
+def get_fake() -> "Faker":
+    # Faker is slow to import and set up, so only pay for it when generating.
+    from faker import Faker
+
+    return Faker()
 
-fake = Faker()
 
 # Predefined realistic office texts
 OFFICE_SUPPLY_REQUESTS = [
@@ -45,71 +64,104 @@ OFFICE_SUGGESTIONS = [
 ]
 
 
+def insert_ignore(db: Session, model: Any, rows: list[dict[str, Any]]) -> None:
+    """
+    Bulk insert rows in one executemany, skipping rows that conflict with
+    existing ones.
+    """
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "cockroachdb"):
+        statement = postgresql.insert(model).on_conflict_do_nothing()
+    elif dialect == "sqlite":
+        statement = sqlite.insert(model).on_conflict_do_nothing()
+    else:
+        ids = [row["id"] for row in rows if "id" in row]
+        existing = set(db.scalars(select(model.id).filter(model.id.in_(ids))))
+        rows = [row for row in rows if row.get("id") not in existing]
+        statement = insert(model)
+
+    if rows:
+        _ = db.execute(statement, rows)
+
+
+def has_rows(db: Session, model: Any) -> bool:
+    return bool(db.scalar(select(select(model.id).exists())))
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_seed_markers(db: Session) -> dict[str, str]:
+    return {
+        marker.name: marker.content_hash for marker in db.scalars(select(SeedMarker))
+    }
+
+
+def mark_seeded(db: Session, name: str, content_hash: str) -> None:
+    _ = db.merge(
+        SeedMarker(name=name, content_hash=content_hash, applied_at=datetime.now())
+    )
+
+
+def insert_products_from_file(db: Session, path: str) -> None:
+    with open(path, "r") as f:
+        print(f"Inserting data from {os.path.basename(path)}")
+        try:
+            data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Error decoding JSON from {os.path.basename(path)}")
+            return
+
+    insert_ignore(
+        db,
+        Product,
+        [
+            {
+                "id": product["id"],
+                "title": product["title"],
+                "description": product["description"],
+                "category": product["category"],
+                "price": product["price"],
+                "stock": product["stock"],
+                "thumbnail": product["thumbnail"],
+            }
+            for product in data.get("products", [])
+        ],
+    )
+
+
 def insert_test_data(db: Session):
     """
     Insert product data from JSON files located in the 'data' directory.
     """
-    for file in os.listdir("data"):
-        with open(os.path.join("data", file), "r") as f:
-            print(f"Inserting data from {file}")
-            try:
-                data = json.load(f)
-                for product in data.get("products", []):
-                    if (
-                        not db.query(Product)
-                        .filter(Product.id == product["id"])
-                        .first()
-                    ):
-                        db.add(
-                            Product(
-                                id=product["id"],
-                                title=product["title"],
-                                description=product["description"],
-                                category=product["category"],
-                                price=product["price"],
-                                stock=product["stock"],
-                                thumbnail=product["thumbnail"],
-                            )
-                        )
-                db.commit()
-            except json.JSONDecodeError:
-                print(f"Error decoding JSON from {file}")
-                continue
+    for file in os.listdir(DATA_DIR):
+        insert_products_from_file(db, os.path.join(DATA_DIR, file))
+
+    db.commit()
 
 
 def create_test_users(db: Session) -> None:
-    if not db.query(User).filter(User.username == "admin").first():
-        admin_user = User(
-            id=997,
-            username="admin",
-            email="admin@cgi.com",
-            hashed_password=hashlib.sha256("admin".encode()).hexdigest(),
-            credits=randint(0, 100),
-            role="admin",
-        )
-        db.add(admin_user)
-
-    if not db.query(User).filter(User.username == "hr").first():
-        hr_user = User(
-            id=998,
-            username="hr",
-            email="hr@cgi.com",
-            hashed_password=hashlib.sha256("hr".encode()).hexdigest(),
-            credits=randint(0, 100),
-            role="hr",
-        )
-        db.add(hr_user)
-
-    if not db.query(User).filter(User.username == "employee").first():
-        employee_user = User(
-            id=999,
-            username="employee",
-            email="employee@cgi.com",
-            hashed_password=hashlib.sha256("employee".encode()).hexdigest(),
-            credits=randint(0, 100),
-            role="employee",
-        )
-        db.add(employee_user)
+    insert_ignore(
+        db,
+        User,
+        [
+            {
+                "id": id,
+                "username": role,
+                "email": f"{role}@cgi.com",
+                "hashed_password": hashlib.sha256(role.encode()).hexdigest(),
+                "credits": randint(0, 100),
+                "role": role,
+            }
+            for id, role in ((997, "admin"), (998, "hr"), (999, "employee"))
+        ],
+    )
 
     db.commit()
 
@@ -123,71 +175,109 @@ def create_fake_data(db: Session, num_records: int = 50) -> None:
         db (Session): SQLAlchemy database session
         num_records (int): Number of records to generate for each model
     """
+    fake = get_fake()
+
     # Get or create some users for associations.
-    users = db.query(User).all()
+    users = db.execute(select(User.id, User.username).limit(1000)).all()
     if not users:
-        users = []
-        for _ in range(3):
-            user = User(
-                username=fake.user_name(),
-                email=fake.email(),
-                hashed_password="fake_hashed_password",
-                credits=randint(0, 100),
-                role=choice(["employee", "admin"]),
-            )
-            db.add(user)
-            users.append(user)
-        db.commit()
+        insert_ignore(
+            db,
+            User,
+            [
+                {
+                    "username": fake.user_name(),
+                    "email": fake.email(),
+                    "hashed_password": "fake_hashed_password",
+                    "credits": randint(0, 100),
+                    "role": choice(["employee", "admin"]),
+                }
+                for _ in range(3)
+            ],
+        )
+        users = db.execute(select(User.id, User.username)).all()
 
     # Create fake suggestions using realistic office suggestion texts
-    suggestions = db.query(Suggestion).all()
-    if not suggestions:
+    if not has_rows(db, Suggestion):
+        suggestions = []
         for _ in range(num_records):
-            suggestion = Suggestion(
-                id=randint(1, 10000),
-                user_id=choice(users).id,
-                suggestion=choice(OFFICE_SUGGESTIONS),
-                created_at=fake.date_time_between(start_date="-1y"),
-                user_name=choice(users).username,
-            )
-            suggestion.updated_at = fake.date_time_between(
-                start_date=suggestion.created_at
+            created_at = fake.date_time_between(start_date="-1y")
+            updated_at = fake.date_time_between(start_date=created_at)
+            suggestions.append(
+                {
+                    "user_id": choice(users).id,
+                    "suggestion": choice(OFFICE_SUGGESTIONS),
+                    "created_at": created_at,
+                    "updated_at": updated_at,
+                    "user_name": choice(users).username,
+                    # 50% chance of being marked completed
+                    "completed_at": (
+                        fake.date_time_between(start_date=updated_at)
+                        if randint(0, 1)
+                        else None
+                    ),
+                }
             )
-            # 50% chance of being marked completed
-            if randint(0, 1):
-                suggestion.completed_at = fake.date_time_between(
-                    start_date=suggestion.updated_at
-                )
-            db.add(suggestion)
+        _ = db.execute(insert(Suggestion), suggestions)
         db.commit()
 
     # Create fake requests using realistic office request texts
-    requests = db.query(Request).all()
-    if not requests:
-        product_list = db.query(Product).all()
+    if not has_rows(db, Request):
+        product_titles = list(db.scalars(select(Product.title)))
+        requests = []
         for _ in range(num_records):
             req_type = choice(["maintenance", "supply"])
             if req_type == "supply":
                 request_text = choice(OFFICE_SUPPLY_REQUESTS)
                 # For supply requests, choose a product title from the available products
-                product = (
-                    choice(product_list).title if product_list else "Office Supplies"
+                item_name = (
+                    choice(product_titles) if product_titles else "Office Supplies"
                 )
-                item_name = product
             else:
                 request_text = choice(MAINTENANCE_REQUESTS)
                 item_name = ""  # Maintenance requests typically don't have an item name
 
-            request = Request(
-                id=randint(1, 10000),
-                user_id=999,  # using the employee id for test data
-                request=request_text,
-                created_at=fake.date_time_between(start_date="-1y"),
-                user_name="employee",
-                request_type=req_type,
-                status=choice(["pending", "approved", "denied", "delivered"]),
-                item_name=item_name,
+            created_at = fake.date_time_between(start_date="-1y")
+            requests.append(
+                {
+                    "user_id": 999,  # using the employee id for test data
+                    "request": request_text,
+                    "created_at": created_at,
+                    "updated_at": fake.date_time_between(start_date=created_at),
+                    "user_name": "employee",
+                    "request_type": req_type,
+                    "status": choice(["pending", "approved", "denied", "delivered"]),
+                    "item_name": item_name,
+                }
             )
-            request.updated_at = fake.date_time_between(start_date=request.created_at)
-            db.add(request)
+        _ = db.execute(insert(Request), requests)
         db.commit()
+
+
+def seed_database(db: Session, num_records: int = 50) -> None:
+    """
+    Idempotently seed users, products and fake data.
+
+    Each step records a marker in seed_marker. Product files are keyed by
+    their content hash, so unchanged files are skipped, and a warm start
+    costs a single query.
+    """
+    markers = load_seed_markers(db)
+
+    if markers.get("test_users") != SEED_VERSION:
+        create_test_users(db)
+        mark_seeded(db, "test_users", SEED_VERSION)
+
+    for file in sorted(os.listdir(DATA_DIR)):
+        path = os.path.join(DATA_DIR, file)
+        name = f"products:{file}"
+        content_hash = file_hash(path)
+
+        if markers.get(name) != content_hash:
+            insert_products_from_file(db, path)
+            mark_seeded(db, name, content_hash)
+
+    if markers.get("fake_data") != SEED_VERSION:
+        create_fake_data(db, num_records)
+        mark_seeded(db, "fake_data", SEED_VERSION)
+
+    db.commit()
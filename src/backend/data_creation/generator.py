@@ -0,0 +1,414 @@
+import csv
+import hashlib
+import io
+import math
+import os
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import cache
+from itertools import accumulate
+from multiprocessing import get_context
+from random import Random
+from typing import Any
+
+from sqlalchemy import Connection, Engine, Table, create_engine, func, insert, select
+from sqlalchemy.orm import Session
+
+from backend.auth.models import Base, Product, Request, Suggestion, User
+from backend.data_creation.data_creation import (
+    DATA_DIR,
+    MAINTENANCE_REQUESTS,
+    OFFICE_SUGGESTIONS,
+    OFFICE_SUPPLY_REQUESTS,
+    get_fake,
+    has_rows,
+    insert_products_from_file,
+)
+from backend.database.rollup import rebuild_request_rollup
+
+# Every generated user can log in with this password.
+DEFAULT_PASSWORD = "password"
+
+NAME_POOL_SIZE = 500
+
+# Relative request volume per hour of the day: office hours, with a lunch dip.
+HOUR_WEIGHTS = [0.1] * 7 + [0.5, 1.5, 2, 2, 1.8, 1.2, 1.6, 1.8, 1.5, 1, 0.5] + [0.2] * 6
+# Monday to Sunday.
+WEEKDAY_WEIGHTS = [1.0, 1.1, 1.0, 1.0, 0.8, 0.25, 0.15]
+
+
+@dataclass(frozen=True)
+class Spec:
+    """
+    Everything a worker process needs to generate any chunk of any table.
+    Chunks are seeded by (seed, table, chunk), so the output does not
+    depend on how many processes generate it.
+    """
+
+    database_url: str
+    users: int
+    first_user_id: int
+    days: int
+    end: datetime
+    activity_skew: float
+    product_titles: tuple[str, ...]
+    seed: int
+
+
+@cache
+def _engine(database_url: str) -> Engine:
+    # SQLite allows one writer at a time, so let other processes wait.
+    connect_args = {"timeout": 120} if database_url.startswith("sqlite") else {}
+    return create_engine(database_url, connect_args=connect_args)
+
+
+@cache
+def _names(seed: int) -> tuple[list[str], list[str]]:
+    fake = get_fake()
+    fake.seed_instance(seed)
+    first = [fake.first_name() for _ in range(NAME_POOL_SIZE)]
+    last = [fake.last_name() for _ in range(NAME_POOL_SIZE)]
+    return first, last
+
+
+@cache
+def _cumulative(weights: tuple[float, ...]) -> list[float]:
+    return list(accumulate(weights))
+
+
+@cache
+def _activity(users: int, skew: float) -> list[float]:
+    # Zipf-like: the user at rank r is active in proportion to 1 / r^skew,
+    # so a few heavy users account for most requests.
+    return list(accumulate(1 / (rank**skew) for rank in range(1, users + 1)))
+
+
+@cache
+def _days(days: int, end: datetime) -> list[float]:
+    weights: list[float] = []
+
+    for offset in range(days):
+        day = end - timedelta(days=days - offset)
+        # Busiest around the turn of the year, quietest in July, and growing
+        # over the window.
+        season = 1 + 0.3 * math.cos(2 * math.pi * (day.timetuple().tm_yday - 17) / 365)
+        growth = 0.6 + 0.8 * offset / days
+        weights.append(WEEKDAY_WEIGHTS[day.weekday()] * season * growth)
+
+    return list(accumulate(weights))
+
+
+def _pick(rng: Random, cumulative: list[float]) -> int:
+    return bisect_right(cumulative, rng.random() * cumulative[-1])
+
+
+def role_for(user_id: int) -> str:
+    if user_id % 33 == 0:
+        return "admin"
+
+    if user_id % 15 == 0:
+        return "hr"
+
+    return "employee"
+
+
+def username_for(spec: Spec, user_id: int) -> str:
+    first, last = _names(spec.seed)
+    name = f"{first[user_id % NAME_POOL_SIZE]}.{last[(user_id // 7) % NAME_POOL_SIZE]}"
+    return f"{name}{user_id}".lower()
+
+
+def _user_id(rng: Random, spec: Spec) -> int:
+    return spec.first_user_id + _pick(rng, _activity(spec.users, spec.activity_skew))
+
+
+def _admin_id(rng: Random, spec: Spec) -> int | None:
+    low = -(-spec.first_user_id // 33)
+    high = (spec.first_user_id + spec.users - 1) // 33
+
+    return rng.randint(low, high) * 33 if low <= high else None
+
+
+def _created_at(rng: Random, spec: Spec) -> datetime:
+    day = spec.end - timedelta(days=spec.days - _pick(rng, _days(spec.days, spec.end)))
+    hour = _pick(rng, _cumulative(tuple(HOUR_WEIGHTS)))
+    return day.replace(hour=hour, minute=0, second=0, microsecond=0) + timedelta(
+        seconds=rng.randrange(3600), microseconds=rng.randrange(1_000_000)
+    )
+
+
+def _after(rng: Random, spec: Spec, start: datetime, mean_days: float) -> datetime:
+    return min(start + timedelta(days=rng.expovariate(1 / mean_days)), spec.end)
+
+
+def generate_users(spec: Spec, start: int, count: int) -> list[dict[str, Any]]:
+    rng = Random(f"{spec.seed}:user:{start}")
+    hashed_password = hashlib.sha256(DEFAULT_PASSWORD.encode()).hexdigest()
+    first, last = _names(spec.seed)
+    rows: list[dict[str, Any]] = []
+
+    for user_id in range(
+        spec.first_user_id + start, spec.first_user_id + start + count
+    ):
+        username = username_for(spec, user_id)
+        rows.append(
+            {
+                "id": user_id,
+                "username": username,
+                "first_name": first[user_id % NAME_POOL_SIZE],
+                "last_name": last[(user_id // 7) % NAME_POOL_SIZE],
+                "email": f"{username}@example.com",
+                "hashed_password": hashed_password,
+                "credits": rng.randint(0, 100),
+                "role": role_for(user_id),
+            }
+        )
+
+    return rows
+
+
+def generate_requests(spec: Spec, start: int, count: int) -> list[dict[str, Any]]:
+    """
+    Requests move pending -> approved -> delivered, or pending -> denied.
+    The older a request, the further along that path it is likely to be.
+    """
+    rng = Random(f"{spec.seed}:request:{start}")
+    rows: list[dict[str, Any]] = []
+
+    for _ in range(count):
+        user_id = _user_id(rng, spec)
+        created_at = _created_at(rng, spec)
+        age = (spec.end - created_at).total_seconds() / 86400
+        supply = rng.random() < 0.6 and bool(spec.product_titles)
+        row: dict[str, Any] = {
+            "user_id": user_id,
+            "user_name": username_for(spec, user_id),
+            "request_type": "supply" if supply else "maintenance",
+            "request": rng.choice(
+                OFFICE_SUPPLY_REQUESTS if supply else MAINTENANCE_REQUESTS
+            ),
+            "status": "pending",
+            "created_at": created_at,
+            "updated_at": created_at,
+            "completed_at": None,
+            "is_anonymous": rng.random() < 0.05,
+            "admin": None,
+            "admin_name": None,
+            "cost": None,
+            "requested_amount": None,
+            "ordered_amount": None,
+            "item_name": None,
+            "comments": None,
+        }
+
+        if supply:
+            row["item_name"] = rng.choice(spec.product_titles)
+            row["requested_amount"] = int(rng.lognormvariate(1.5, 0.8)) + 1
+
+        if rng.random() < 1 - math.exp(-age / 3):
+            decided_at = _after(rng, spec, created_at, 2)
+            admin = _admin_id(rng, spec)
+            row["admin"] = admin
+            row["admin_name"] = username_for(spec, admin) if admin else None
+            row["updated_at"] = decided_at
+
+            if rng.random() < 0.25:
+                row["status"] = "denied"
+                row["completed_at"] = decided_at
+            else:
+                row["status"] = "approved"
+
+                if supply:
+                    ordered = row["requested_amount"]
+                    row["ordered_amount"] = ordered
+                    row["cost"] = round(ordered * rng.uniform(2, 80), 2)
+                else:
+                    row["cost"] = round(rng.lognormvariate(4.5, 0.9), 2)
+
+                if rng.random() < 1 - math.exp(-age / 10):
+                    delivered_at = _after(rng, spec, decided_at, 5)
+                    row["status"] = "delivered"
+                    row["updated_at"] = delivered_at
+                    row["completed_at"] = delivered_at
+
+        rows.append(row)
+
+    return rows
+
+
+def generate_suggestions(spec: Spec, start: int, count: int) -> list[dict[str, Any]]:
+    rng = Random(f"{spec.seed}:suggestion:{start}")
+    rows: list[dict[str, Any]] = []
+
+    for _ in range(count):
+        user_id = _user_id(rng, spec)
+        created_at = _created_at(rng, spec)
+        completed = rng.random() < 0.3
+        completed_at = _after(rng, spec, created_at, 20) if completed else None
+        rows.append(
+            {
+                "user_id": user_id,
+                "user_name": username_for(spec, user_id),
+                "suggestion": rng.choice(OFFICE_SUGGESTIONS),
+                "created_at": created_at,
+                "updated_at": completed_at or created_at,
+                "completed_at": completed_at,
+                "comments": None,
+                "is_anonymous": rng.random() < 0.1,
+            }
+        )
+
+    return rows
+
+
+GENERATORS = {
+    User.__tablename__: generate_users,
+    Request.__tablename__: generate_requests,
+    Suggestion.__tablename__: generate_suggestions,
+}
+
+
+def copy_rows(connection: Connection, table: Table, rows: list[dict[str, Any]]) -> None:
+    """
+    Write rows with COPY FROM STDIN where the driver supports it
+    (psycopg2 on PostgreSQL), otherwise with one executemany INSERT.
+    """
+    cursor = None
+
+    if connection.dialect.name == "postgresql":
+        cursor = connection.connection.cursor()
+
+    if cursor is None or not hasattr(cursor, "copy_expert"):
+        _ = connection.execute(insert(table), rows)
+        return
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    for row in rows:
+        writer.writerow(
+            [
+                value.isoformat() if isinstance(value, datetime) else value
+                for value in (row[column] for column in columns)
+            ]
+        )
+
+    _ = buffer.seek(0)
+    preparer = connection.dialect.identifier_preparer
+    cursor.copy_expert(
+        f"COPY {preparer.format_table(table)} "
+        f"({', '.join(preparer.quote(column) for column in columns)}) "
+        "FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def load_chunk(spec: Spec, table_name: str, start: int, count: int) -> int:
+    rows = GENERATORS[table_name](spec, start, count)
+
+    with _engine(spec.database_url).begin() as connection:
+        copy_rows(connection, Base.metadata.tables[table_name], rows)
+
+    return len(rows)
+
+
+def _run(spec: Spec, tables: dict[str, int], chunk_size: int, processes: int) -> None:
+    chunks = [
+        (table_name, start, min(chunk_size, total - start))
+        for table_name, total in tables.items()
+        for start in range(0, total, chunk_size)
+    ]
+
+    if not chunks:
+        return
+
+    started = time.perf_counter()
+    done = 0
+
+    if processes <= 1:
+        for chunk in chunks:
+            done += load_chunk(spec, *chunk)
+    else:
+        # Spawned rather than forked, so no process inherits a connection.
+        with ProcessPoolExecutor(processes, mp_context=get_context("spawn")) as pool:
+            futures = [pool.submit(load_chunk, spec, *chunk) for chunk in chunks]
+
+            for future in as_completed(futures):
+                done += future.result()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Inserted {done} {'/'.join(tables)} rows in {elapsed:.1f}s "
+        f"({done / elapsed:.0f} rows/s)"
+    )
+
+
+def generate(
+    database_url: str,
+    users: int = 1000,
+    requests: int = 10_000,
+    suggestions: int = 5000,
+    days: int = 365,
+    activity_skew: float = 0.9,
+    chunk_size: int = 10_000,
+    processes: int = 1,
+    seed: int = 42,
+) -> None:
+    """
+    Append generated users, requests and suggestions to the database at
+    `database_url`, creating the schema and loading the product files if
+    needed, then rebuild the request rollup.
+    """
+    if (requests or suggestions) and not users:
+        raise ValueError("Requests and suggestions are generated for new users")
+
+    engine = _engine(database_url)
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as db:
+        if not has_rows(db, Product):
+            for file in sorted(os.listdir(DATA_DIR)):
+                insert_products_from_file(db, os.path.join(DATA_DIR, file))
+
+            db.commit()
+
+        first_user_id = (db.scalar(select(func.max(User.id))) or 0) + 1
+        product_titles = tuple(db.scalars(select(Product.title).distinct()))
+
+    spec = Spec(
+        database_url=database_url,
+        users=users,
+        first_user_id=first_user_id,
+        days=days,
+        end=datetime.now(),
+        activity_skew=activity_skew,
+        product_titles=product_titles,
+        seed=seed,
+    )
+
+    # Users first: requests and suggestions point at them.
+    _run(spec, {User.__tablename__: users}, chunk_size, processes)
+    _run(
+        spec,
+        {Request.__tablename__: requests, Suggestion.__tablename__: suggestions},
+        chunk_size,
+        processes,
+    )
+
+    with engine.begin() as connection:
+        if connection.dialect.name == "postgresql" and users:
+            # Explicit ids do not advance the sequence behind user.id.
+            _ = connection.exec_driver_sql(
+                "SELECT setval(pg_get_serial_sequence('\"user\"', 'id'), "
+                '(SELECT max(id) FROM "user"))'
+            )
+
+        if connection.dialect.name in ("postgresql", "sqlite"):
+            _ = connection.exec_driver_sql("ANALYZE")
+
+    with Session(engine) as db:
+        rebuild_request_rollup(db)
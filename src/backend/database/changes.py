@@ -0,0 +1,405 @@
+import asyncio
+import time
+import weakref
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from pydantic_core import to_json
+from sqlalchemy import delete, event, func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.auth.database import AsyncSessionLocal, async_engine
+from backend.auth.models import ChangeLog, Request, Suggestion
+from backend.constants import (
+    CHANGE_FEED_GAP_SECONDS,
+    CHANGE_FEED_POLL_SECONDS,
+    CHANGE_FEED_QUEUE_SIZE,
+    CHANGE_FEED_REPLAY_LIMIT,
+    CHANGE_LOG_COMPACTION_SECONDS,
+    CHANGE_LOG_RETENTION_SECONDS,
+)
+from backend.database.schemas import response_columns
+from backend.logger import LOG
+from backend.metrics import REGISTRY, Counter
+
+CHANGE_MODELS = (Request, Suggestion)
+CHANGE_TABLES = tuple(model.__tablename__ for model in CHANGE_MODELS)
+NOTIFY_CHANNEL = "change_log"
+POLL_BATCH_SIZE = 1000
+COMPACTION_BATCH_SIZE = 1000
+# Past this many, ids skipped by a poll are no longer waited for.
+MAX_TRACKED_GAPS = 1000
+# Marks a session whose open transaction has logged changes.
+_PENDING = "change_log_pending"
+
+RESET_EVENT = "event: reset\ndata: {}\n\n"
+
+CHANGES_PUBLISHED = REGISTRY.register(
+    Counter(
+        "change_feed_events_total",
+        "Changes fanned out to this worker's streams, by table.",
+        ("table",),
+    )
+)
+STREAM_RESETS = REGISTRY.register(
+    Counter(
+        "change_feed_resets_total",
+        "Streams told to reread their lists instead of getting changes, by reason.",
+        ("reason",),
+    )
+)
+
+
+@dataclass(frozen=True)
+class Change:
+    id: int
+    table: str
+    user_id: int | None
+    data: str
+
+    def event(self) -> str:
+        """
+        The change as a Server-Sent Event, named after its table.
+        """
+        return f"id: {self.id}\nevent: {self.table}\ndata: {self.data}\n\n"
+
+
+@dataclass(eq=False)
+class Subscription:
+    """
+    One stream's view of the feed: changes to `tables`, to rows of `user_id`
+    only, or of every user if it is None. A None in the queue means changes
+    were dropped and the client has to reread.
+    """
+
+    user_id: int | None
+    tables: frozenset[str]
+    queue: asyncio.Queue[Change | None]
+
+    def wants(self, change: Change) -> bool:
+        return change.table in self.tables and (
+            self.user_id is None or change.user_id == self.user_id
+        )
+
+    def put(self, change: Change) -> None:
+        try:
+            self.queue.put_nowait(change)
+        except asyncio.QueueFull:
+            # Too far behind to catch up: drop the backlog, have it reread.
+            while not self.queue.empty():
+                _ = self.queue.get_nowait()
+
+            self.queue.put_nowait(None)
+            STREAM_RESETS.inc("overflow")
+
+
+async def record_changes(
+    db: AsyncSession, model: Any, operation: str, rows: Iterable[Any]
+) -> None:
+    """
+    Log `operation` (created, updated or deleted) on each of `rows`, ORM
+    instances of `model`, for the change feed. Runs in the caller's
+    transaction, so a change is streamed if and only if it commits. Does
+    nothing for models the feed does not cover.
+    """
+    if model not in CHANGE_MODELS:
+        return
+
+    keys = [column.key for column in response_columns(model)]
+    entries = [
+        {
+            "table_name": model.__tablename__,
+            "operation": operation,
+            "row_id": row.id,
+            "user_id": row.user_id,
+            "data": to_json(
+                {
+                    "operation": operation,
+                    "id": row.id,
+                    "item": (
+                        None
+                        if operation == "deleted"
+                        else {key: getattr(row, key) for key in keys}
+                    ),
+                }
+            ).decode(),
+        }
+        for row in rows
+    ]
+
+    if not entries:
+        return
+
+    _ = await db.execute(insert(ChangeLog), entries)
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Delivered on commit, once per transaction however often sent.
+        _ = await db.execute(text(f"NOTIFY {NOTIFY_CHANNEL}"))
+
+    db.sync_session.info[_PENDING] = True
+
+
+class ChangeFeed:
+    """
+    Fans out logged changes (see record_changes) to the streams open in this
+    worker.
+
+    While the worker has subscribers it polls the log for ids past the last
+    one it saw: every `poll_seconds`, as soon as a change commits in this
+    worker, and on PostgreSQL as soon as one commits in any worker. Ids are
+    handed out before commit, so an id skipped by a poll is looked for again
+    for `gap_seconds`, in case its transaction was still open; those rolled
+    back never turn up.
+
+    Every change is a snapshot of its row, so delivering one twice, or out
+    of order after such a gap, is harmless.
+    """
+
+    def __init__(
+        self,
+        poll_seconds: float,
+        queue_size: int,
+        gap_seconds: float,
+        replay_limit: int,
+        retention_seconds: float,
+    ):
+        self.poll_seconds = poll_seconds
+        self.queue_size = queue_size
+        self.gap_seconds = gap_seconds
+        self.replay_limit = replay_limit
+        self.retention_seconds = retention_seconds
+        # Weak, so a stream whose response never started cannot leak one.
+        self._subscriptions: weakref.WeakSet[Subscription] = weakref.WeakSet()
+        self._last_id: int | None = None
+        self._gaps: dict[int, float] = {}
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def wake(self) -> None:
+        self._wake.set()
+
+    async def subscribe(
+        self, db: AsyncSession, user_id: int | None, tables: Iterable[str]
+    ) -> Subscription:
+        async with self._lock:
+            if self._last_id is None:
+                # Nobody was listening, so start from the end of the log.
+                self._last_id = await db.scalar(select(func.max(ChangeLog.id))) or 0
+                self._gaps = {}
+
+            subscription = Subscription(
+                user_id, frozenset(tables), asyncio.Queue(self.queue_size)
+            )
+            self._subscriptions.add(subscription)
+
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+
+    async def replay(
+        self, db: AsyncSession, subscription: Subscription, after: int
+    ) -> list[Change] | None:
+        """
+        The changes after id `after` that `subscription` wants, for a client
+        resuming its stream, or None if the log no longer holds them all.
+        """
+        oldest = await db.scalar(select(func.min(ChangeLog.id)))
+
+        if oldest is None or oldest > after + 1:
+            STREAM_RESETS.inc("compacted")
+            return None
+
+        query = select(
+            ChangeLog.id, ChangeLog.table_name, ChangeLog.user_id, ChangeLog.data
+        ).filter(ChangeLog.id > after, ChangeLog.table_name.in_(subscription.tables))
+
+        if subscription.user_id is not None:
+            query = query.filter(ChangeLog.user_id == subscription.user_id)
+
+        rows = (
+            await db.execute(query.order_by(ChangeLog.id).limit(self.replay_limit + 1))
+        ).all()
+
+        if len(rows) > self.replay_limit:
+            STREAM_RESETS.inc("replay_limit")
+            return None
+
+        return [Change(*row) for row in rows]
+
+    def publish(self, change: Change) -> None:
+        CHANGES_PUBLISHED.inc(change.table)
+
+        for subscription in self._subscriptions:
+            if subscription.wants(change):
+                subscription.put(change)
+
+    async def poll(self, db: AsyncSession) -> int:
+        """
+        Publish the changes logged since the last poll, and any that filled
+        a gap it left. Returns the number of rows read.
+        """
+        async with self._lock:
+            if self._last_id is None:
+                return 0
+
+            now = time.monotonic()
+            self._gaps = {
+                id: since
+                for id, since in self._gaps.items()
+                if now - since < self.gap_seconds
+            }
+            condition = ChangeLog.id > self._last_id
+
+            if self._gaps:
+                condition = or_(condition, ChangeLog.id.in_(list(self._gaps)))
+
+            rows = (
+                await db.execute(
+                    select(
+                        ChangeLog.id,
+                        ChangeLog.table_name,
+                        ChangeLog.user_id,
+                        ChangeLog.data,
+                    )
+                    .filter(condition)
+                    .order_by(ChangeLog.id)
+                    .limit(POLL_BATCH_SIZE)
+                )
+            ).all()
+
+            for row in rows:
+                change = Change(*row)
+
+                if change.id > self._last_id:
+                    self._track_gap(self._last_id, change.id, now)
+                    self._last_id = change.id
+                else:
+                    _ = self._gaps.pop(change.id, None)
+
+                self.publish(change)
+
+            return len(rows)
+
+    def _track_gap(self, last_id: int, id: int, now: float) -> None:
+        missing = range(last_id + 1, id)
+
+        if len(self._gaps) + len(missing) > MAX_TRACKED_GAPS:
+            LOG.warning(f"Change feed skipped {len(missing)} ids without waiting")
+            return
+
+        self._gaps.update(dict.fromkeys(missing, now))
+
+    async def run_poller(self):
+        while True:
+            try:
+                _ = await asyncio.wait_for(self._wake.wait(), self.poll_seconds)
+            except TimeoutError:
+                pass
+
+            self._wake.clear()
+
+            if not self._subscriptions:
+                # The next subscriber starts from the end of the log again.
+                self._last_id = None
+                continue
+
+            try:
+                async with AsyncSessionLocal() as db:
+                    while await self.poll(db) == POLL_BATCH_SIZE:
+                        pass
+            except Exception as e:
+                LOG.error(f"Error polling change log: {e}")
+
+    def _on_notify(self, *_: Any) -> None:
+        self.wake()
+
+    async def run_listener(self):
+        """
+        On PostgreSQL, wake the poller whenever a change commits anywhere,
+        on a connection held out of the pool to LISTEN on.
+        """
+        if async_engine.dialect.name != "postgresql":
+            return
+
+        while True:
+            try:
+                async with async_engine.connect() as connection:
+                    driver = (await connection.get_raw_connection()).driver_connection
+                    await driver.add_listener(NOTIFY_CHANNEL, self._on_notify)
+
+                    try:
+                        while not driver.is_closed():
+                            await asyncio.sleep(self.poll_seconds)
+                    finally:
+                        await driver.remove_listener(NOTIFY_CHANNEL, self._on_notify)
+            except Exception as e:
+                LOG.error(f"Error listening for changes: {e}")
+
+            await asyncio.sleep(self.poll_seconds)
+
+    async def compact(
+        self, db: AsyncSession, batch_size: int = COMPACTION_BATCH_SIZE
+    ) -> int:
+        """
+        Delete log rows older than the retention period, in batches so no
+        single statement holds locks for long. Returns the rows deleted.
+        """
+        cutoff = datetime.now() - timedelta(seconds=self.retention_seconds)
+        deleted = 0
+
+        while True:
+            expired = select(ChangeLog.id).filter(ChangeLog.created_at < cutoff)
+            result = await db.execute(
+                delete(ChangeLog).filter(
+                    ChangeLog.id.in_(expired.limit(batch_size).scalar_subquery())
+                )
+            )
+            await db.commit()
+
+            deleted += result.rowcount
+
+            if result.rowcount < batch_size:
+                return deleted
+
+    async def run_compaction(self):
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    deleted = await self.compact(db)
+
+                if deleted:
+                    LOG.info(f"Compacted {deleted} change log rows")
+            except Exception as e:
+                LOG.error(f"Error compacting change log: {e}")
+
+            await asyncio.sleep(CHANGE_LOG_COMPACTION_SECONDS)
+
+
+CHANGE_FEED = ChangeFeed(
+    poll_seconds=CHANGE_FEED_POLL_SECONDS,
+    queue_size=CHANGE_FEED_QUEUE_SIZE,
+    gap_seconds=CHANGE_FEED_GAP_SECONDS,
+    replay_limit=CHANGE_FEED_REPLAY_LIMIT,
+    retention_seconds=CHANGE_LOG_RETENTION_SECONDS,
+)
+
+
+def _wake_after_commit(session: Session) -> None:
+    if session.info.pop(_PENDING, False):
+        CHANGE_FEED.wake()
+
+
+def _forget_after_rollback(session: Session) -> None:
+    _ = session.info.pop(_PENDING, None)
+
+
+event.listen(Session, "after_commit", _wake_after_commit)
+event.listen(Session, "after_rollback", _forget_after_rollback)
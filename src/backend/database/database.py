@@ -1,72 +1,388 @@
+import base64
+import datetime
+import json
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.engine import Result
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.auth.models import User
+from backend.auth.models import SORT_EPOCH, Request, User, created_at_sort_key
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+from backend.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from backend.database.changes import CHANGE_MODELS, record_changes
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.database.rollup import (
+    apply_request_change,
+    apply_request_changes,
+    request_contribution,
+)
+from backend.database.schemas import response_columns
+from backend.database.transactions import run_transaction
 
 
-def read_from_db(db: Session, user: User, model: Any, sort: bool = False) -> Any:
+def _rows(result: Result[Any]) -> list[dict[str, Any]]:
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+async def read_from_db(
+    db: AsyncSession, user: User, model: Any, sort: bool = False
+) -> list[dict[str, Any]]:
+    query = select(*response_columns(model)).filter(model.user_id == user.id)
+
     if sort:
-        return (
-            db.query(model)
-            .filter(model.user_id == user.id)
-            .order_by(model.created_at.desc())
-            .all()
-        )
-    return db.query(model).filter(model.user_id == user.id).all()
+        query = query.order_by(model.created_at.desc())
+
+    return _rows(await db.execute(query))
+
+
+async def read_all_from_db(
+    db: AsyncSession, model: Any, sort: bool = False
+) -> list[dict[str, Any]]:
+    """
+    Every row as a dict of the model's response columns, without building
+    ORM instances.
+    """
+    query = select(*response_columns(model))
 
-def pagination_from_db(db: Session, user: User, model: Any, sort: bool = False, page: int = 1, limit: int = 10) -> Any:
     if sort:
-        return (
-            db.query(model)
-            .filter(model.user_id == user.id)
-            .order_by(model.created_at.desc())
-            .offset((page - 1) * limit)
-            .limit(limit)
-            .all()
+        query = query.order_by(model.created_at.desc())
+
+    return _rows(await db.execute(query))
+
+
+def _keyset_columns(model: Any) -> list[Any]:
+    if hasattr(model, "created_at"):
+        return [created_at_sort_key(model.created_at), model.id]
+    return [model.id]
+
+
+def _keyset_values(model: Any, item: dict[str, Any]) -> list[Any]:
+    if hasattr(model, "created_at"):
+        return [item["created_at"] or SORT_EPOCH, item["id"]]
+    return [item["id"]]
+
+
+def encode_cursor(values: list[Any]) -> str:
+    payload = [
+        value.isoformat() if isinstance(value, datetime.datetime) else value
+        for value in values
+    ]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str, model: Any) -> list[Any]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        columns = _keyset_columns(model)
+
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("Cursor does not match model")
+
+        *created_at, id = payload
+
+        return [
+            *(datetime.datetime.fromisoformat(value) for value in created_at),
+            int(id),
+        ]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+
+async def paginate_from_db(
+    db: AsyncSession,
+    model: Any,
+    cursor: str | None = None,
+    limit: int | None = None,
+    **filters: Any,
+) -> dict[str, Any]:
+    """
+    Keyset pagination ordered newest first on (created_at, id), or on id for
+    models without a created_at column. Rows without a created_at come last.
+
+    Filters with a value of None are ignored. Returns the page items, as
+    dicts of the model's response columns, and an opaque cursor for the next
+    page, which is None on the last page.
+    """
+    limit = min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    columns = _keyset_columns(model)
+
+    query = select(*response_columns(model))
+
+    for key, value in filters.items():
+        if value is not None:
+            query = query.filter(getattr(model, key) == value)
+
+    if cursor:
+        values = decode_cursor(cursor, model)
+        # The redundant bound on the leading key lets SQLite seek the sort key
+        # index, which it does not do for a row value comparison alone.
+        query = query.filter(columns[0] <= values[0], tuple_(*columns) < tuple(values))
+
+    items = _rows(
+        await db.execute(
+            query.order_by(*(column.desc() for column in columns)).limit(limit + 1)
         )
-    return db.query(model).filter(model.user_id == user.id).offset((page - 1) * limit).limit(limit).all()
+    )
 
+    next_cursor = None
 
-def read_all_from_db(db: Session, model: Any, sort: bool = False) -> Any:
-    if sort:
-        return db.query(model).order_by(model.created_at.desc()).all()
-    return db.query(model).all()
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(_keyset_values(model, items[-1]))
+
+    return {"items": items, "next_cursor": next_cursor}
 
 
-def create_record(db: Session, model: Any, data: Any) -> Any:
-    db_model = model(**data)
-    db.add(db_model)
-    db.commit()
-    db.refresh(db_model)
+async def create_record(db: AsyncSession, model: Any, data: Any) -> Any:
+    async def work(db: AsyncSession) -> Any:
+        db_model = model(**data)
+        db.add(db_model)
+
+        if model in CHANGE_MODELS:
+            await db.flush()
+            await record_changes(db, model, "created", [db_model])
+
+        if model is Request:
+            await apply_request_change(db, None, request_contribution(db_model))
+
+        return db_model
+
+    db_model = await run_transaction(db, work, "create_record")
+    await RESPONSE_CACHE.invalidate(model.__tablename__)
+    await db.refresh(db_model)
     return db_model
 
 
-def update_record(db: Session, model: Any, data: Any) -> Any:
-    db_model = db.query(model).filter(model.id == data["id"]).first()
+async def update_record(db: AsyncSession, model: Any, data: Any) -> Any:
+    async def work(db: AsyncSession) -> Any:
+        # Locked, so a concurrent update cannot change the row between reading
+        # its contribution to the stock rollup and applying the difference.
+        db_model = (
+            await db.scalars(
+                select(model).filter(model.id == data["id"]).with_for_update()
+            )
+        ).first()
+
+        if db_model:
+            before = request_contribution(db_model) if model is Request else None
+
+            for key, value in data.items():
+                setattr(db_model, key, value)
+
+            if model is Request:
+                await apply_request_change(db, before, request_contribution(db_model))
+
+            await record_changes(db, model, "updated", [db_model])
+
+        return db_model
+
+    db_model = await run_transaction(db, work, "update_record")
 
     if db_model:
-        for key, value in data.items():
-            setattr(db_model, key, value)
+        await RESPONSE_CACHE.invalidate(model.__tablename__)
+        await db.refresh(db_model)
 
-        db.commit()
-        db.refresh(db_model)
+        if model is User:
+            PRINCIPAL_CACHE.invalidate_user(db_model.id)
 
     return db_model
 
 
-def delete_record(db: Session, model: Any, id: int) -> Any:
-    db_model = db.query(model).filter(model.id == id).first()
+async def delete_record(db: AsyncSession, model: Any, id: int) -> Any:
+    async def work(db: AsyncSession) -> bool:
+        db_model = (
+            await db.scalars(select(model).filter(model.id == id).with_for_update())
+        ).first()
 
-    if db_model:
-        db.delete(db_model)
-        db.commit()
+        if db_model:
+            if model is Request:
+                await apply_request_change(db, request_contribution(db_model), None)
+
+            await record_changes(db, model, "deleted", [db_model])
+            await db.delete(db_model)
+
+        return db_model is not None
+
+    if await run_transaction(db, work, "delete_record"):
+        await RESPONSE_CACHE.invalidate(model.__tablename__)
+
+        if model is User:
+            PRINCIPAL_CACHE.invalidate_user(id)
 
     return True
 
 
-def create_in_db(db: Session, model: Any, data: Any) -> Any:
-    db_model = model(**data)
-    db.add(db_model)
-    db.commit()
-    db.refresh(db_model)
+def _column_data(model: Any, data: dict[str, Any]) -> dict[str, Any]:
+    columns = model.__table__.columns.keys()
+    return {key: value for key, value in data.items() if key in columns}
+
+
+async def create_records(
+    db: AsyncSession, model: Any, items: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """
+    Insert every item with one executemany INSERT ... RETURNING.
+    Does not commit, see write_batch.
+    """
+    if not items:
+        return []
+
+    rows = [
+        {
+            key: value
+            for key, value in _column_data(model, item).items()
+            if value is not None
+        }
+        for item in items
+    ]
+    created = list(
+        await db.scalars(
+            insert(model).returning(model, sort_by_parameter_order=True), rows
+        )
+    )
+
+    if model is Request:
+        await apply_request_changes(
+            db, [(None, request_contribution(db_model)) for db_model in created]
+        )
+
+    await record_changes(db, model, "created", created)
+
+    return [
+        {"index": index, "status": "created", "item": db_model}
+        for index, db_model in enumerate(created)
+    ]
+
+
+async def update_records(
+    db: AsyncSession, model: Any, items: list[dict[str, Any]]
+) -> list[dict[str, Any]]:
+    """
+    Apply the fields present in each item to the row with its id. Rows are
+    loaded with one SELECT ... IN and flushed together, which the unit of
+    work sends as executemany UPDATEs. Does not commit, see write_batch.
+    """
+    ids = [item.get("id") for item in items]
+    found = {
+        db_model.id: db_model
+        for db_model in await db.scalars(select(model).filter(model.id.in_(ids)))
+    }
+
+    results: list[dict[str, Any]] = []
+    changes: list[tuple[dict[str, Any] | None, dict[str, Any] | None]] = []
+    updated: list[Any] = []
+
+    for id, item in zip(ids, items):
+        db_model = found.get(id)
+
+        if db_model is None:
+            results.append({"id": id, "status": "not_found"})
+            continue
+
+        before = request_contribution(db_model) if model is Request else None
+
+        for key, value in _column_data(model, item).items():
+            setattr(db_model, key, value)
+
+        if model is Request:
+            changes.append((before, request_contribution(db_model)))
+
+        updated.append(db_model)
+        results.append({"id": id, "status": "updated", "item": db_model})
+
+    await db.flush()
+
+    if changes:
+        await apply_request_changes(db, changes)
+
+    await record_changes(db, model, "updated", updated)
+
+    return results
+
+
+async def delete_records(
+    db: AsyncSession, model: Any, ids: list[int]
+) -> list[dict[str, Any]]:
+    """
+    Delete every row in `ids` with one DELETE ... IN.
+    Does not commit, see write_batch.
+    """
+    rows = list(await db.scalars(select(model).filter(model.id.in_(ids))))
+    found = {row.id for row in rows}
+
+    if model is Request:
+        await apply_request_changes(
+            db, [(request_contribution(row), None) for row in rows]
+        )
+
+    await record_changes(db, model, "deleted", rows)
+
+    if found:
+        _ = await db.execute(delete(model).filter(model.id.in_(found)))
+
+    return [
+        {"id": id, "status": "deleted" if id in found else "not_found"} for id in ids
+    ]
+
+
+async def write_batch(
+    db: AsyncSession,
+    model: Any,
+    create: list[dict[str, Any]] | None = None,
+    update: list[dict[str, Any]] | None = None,
+    delete: list[int] | None = None,
+    prepare: Callable[[AsyncSession], Awaitable[dict[int, str]]] | None = None,
+) -> dict[str, list[dict[str, Any]]]:
+    """
+    Run a batch of creates, updates and deletes in one transaction and return
+    a result per item. Missing ids are reported per item; a database error
+    rolls back the whole batch.
+
+    `prepare`, if given, runs first in the same transaction and returns the
+    ids of updates to drop, with the status to report for each instead.
+    """
+
+    async def work(db: AsyncSession) -> dict[str, list[dict[str, Any]]]:
+        dropped = await prepare(db) if prepare else {}
+        results = {
+            "created": await create_records(db, model, create or []),
+            "updated": await update_records(
+                db,
+                model,
+                [item for item in update or [] if item.get("id") not in dropped],
+            ),
+            "deleted": await delete_records(db, model, delete or []),
+        }
+        results["updated"] += [
+            {"id": id, "status": status} for id, status in dropped.items()
+        ]
+
+        return results
+
+    try:
+        results = await run_transaction(db, work, "write_batch")
+    except IntegrityError as e:
+        raise HTTPException(status_code=409, detail="Batch rejected") from e
+
+    await RESPONSE_CACHE.invalidate(model.__tablename__)
+
+    if model is User:
+        for result in results["updated"] + results["deleted"]:
+            PRINCIPAL_CACHE.invalidate_user(result["id"])
+
+    return results
+
+
+async def create_in_db(db: AsyncSession, model: Any, data: Any) -> Any:
+    async def work(db: AsyncSession) -> Any:
+        db_model = model(**data)
+        db.add(db_model)
+        return db_model
+
+    db_model = await run_transaction(db, work, "create_in_db")
+    await db.refresh(db_model)
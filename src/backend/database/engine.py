@@ -0,0 +1,145 @@
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, event, make_url
+from sqlalchemy.engine import URL
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from backend.constants import (
+    DB_APPLICATION_NAME,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_CACHE_SIZE,
+    DB_STATEMENT_TIMEOUT_MS,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_MMAP_SIZE,
+)
+from backend.database.pool_metrics import MeteredAsyncAdaptedQueuePool
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the
+# single writer, and synchronous=NORMAL is durable in WAL mode except for the
+# last transactions before a power loss, in exchange for no fsync per commit.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+    f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def _is_memory(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or "mode=memory" in (
+        url.database or ""
+    )
+
+
+def _set_sqlite_pragmas(dbapi_connection: Any, _: Any) -> None:
+    cursor = dbapi_connection.cursor()
+
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+
+    cursor.close()
+
+    # pysqlite only opens a transaction before the first INSERT/UPDATE/DELETE,
+    # so reads made before it would see other commits; _begin_sqlite emits
+    # BEGIN itself instead.
+    dbapi_connection.isolation_level = None
+
+
+def _begin_sqlite(connection: Any) -> None:
+    # "IMMEDIATE" (see backend.database.transactions) takes the write lock up
+    # front, waiting out busy_timeout, where a deferred transaction that read
+    # before writing fails at once if another writer committed meanwhile.
+    mode = connection.get_execution_options().get("sqlite_begin", "DEFERRED")
+
+    # Straight on the DBAPI cursor, as other drivers begin implicitly, so
+    # statement counts and timings do not include it.
+    cursor = connection.connection.cursor()
+    cursor.execute(f"BEGIN {mode}")
+    cursor.close()
+
+
+def _server_connect_args(url: URL, is_async: bool) -> dict[str, Any]:
+    settings = {"application_name": DB_APPLICATION_NAME}
+
+    if DB_STATEMENT_TIMEOUT_MS:
+        settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+
+    if not is_async:
+        # psycopg2 takes libpq options; application_name is a keyword of its own.
+        options = " ".join(
+            f"-c {name}={value}"
+            for name, value in settings.items()
+            if name != "application_name"
+        )
+        connect_args: dict[str, Any] = {"application_name": DB_APPLICATION_NAME}
+
+        if options:
+            connect_args["options"] = options
+
+        return connect_args
+
+    if url.get_backend_name() == "postgresql":
+        # Short OLTP queries never recoup JIT compilation.
+        settings["jit"] = "off"
+
+    return {
+        "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        "server_settings": settings,
+    }
+
+
+def engine_options(url: str | URL, is_async: bool) -> dict[str, Any]:
+    """
+    create_engine keyword arguments suited to the database behind `url`.
+    """
+    parsed = make_url(url)
+
+    if parsed.get_backend_name() == "sqlite":
+        if _is_memory(parsed):
+            # Every connection to :memory: is a new, empty database, so all
+            # sessions must share one.
+            return {"poolclass": StaticPool}
+
+        # A local file needs neither liveness checks nor recycling.
+        options: dict[str, Any] = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+        }
+    else:
+        options = {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": DB_MAX_OVERFLOW,
+            "pool_timeout": DB_POOL_TIMEOUT,
+            "pool_recycle": DB_POOL_RECYCLE,
+            "pool_pre_ping": True,
+            "connect_args": _server_connect_args(parsed, is_async),
+        }
+
+    if is_async:
+        options["poolclass"] = MeteredAsyncAdaptedQueuePool
+
+    return options
+
+
+def _configure(engine: Engine) -> Engine:
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        event.listen(engine, "begin", _begin_sqlite)
+
+    return engine
+
+
+def make_engine(url: str | URL) -> Engine:
+    return _configure(create_engine(url, **engine_options(url, is_async=False)))
+
+
+def make_async_engine(url: str | URL) -> AsyncEngine:
+    engine = create_async_engine(url, **engine_options(url, is_async=True))
+    _ = _configure(engine.sync_engine)
+    return engine
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Any, Literal
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from backend.auth.database import AsyncSessionLocal
+from backend.constants import EXPORT_BATCH_SIZE
+
+ExportFormat = Literal["ndjson", "csv"]
+
+
+def resolve_columns(model: Any, fields: str | None) -> list[Any]:
+    table_columns = model.__table__.columns
+
+    if not fields:
+        return list(table_columns)
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in table_columns]
+
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+
+    return [table_columns[name] for name in names]
+
+
+async def stream_rows(model: Any, columns: list[Any]) -> AsyncIterator[tuple[Any, ...]]:
+    """
+    Stream column tuples from a server-side cursor, EXPORT_BATCH_SIZE rows at a
+    time, without building ORM entities.
+
+    Opens its own session because the generator outlives the request's
+    dependencies.
+    """
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(
+            select(*columns)
+            .order_by(*model.__table__.primary_key.columns)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        async for row in result:
+            yield tuple(row)
+
+
+async def _ndjson(
+    names: list[str], rows: AsyncIterator[tuple[Any, ...]]
+) -> AsyncIterator[str]:
+    async for row in rows:
+        yield json.dumps(dict(zip(names, row)), default=str) + "\n"
+
+
+async def _csv(
+    names: list[str], rows: AsyncIterator[tuple[Any, ...]]
+) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        value = buffer.getvalue()
+        _ = buffer.seek(0)
+        _ = buffer.truncate()
+        return value
+
+    writer.writerow(names)
+    yield flush()
+
+    async for row in rows:
+        writer.writerow(row)
+        yield flush()
+
+
+def export_response(
+    model: Any, format: ExportFormat, fields: str | None = None
+) -> StreamingResponse:
+    columns = resolve_columns(model, fields)
+    names = [column.key for column in columns]
+    rows = stream_rows(model, columns)
+    filename = f"{model.__tablename__}.{format}"
+
+    if format == "csv":
+        return StreamingResponse(
+            _csv(names, rows),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename={filename}"},
+        )
+
+    return StreamingResponse(
+        _ndjson(names, rows),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from datetime import datetime
+from typing import Any
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.models import Product, Request, StockReservation
+
+
+async def product_ids_by_title(db: AsyncSession, titles: set[str]) -> dict[str, int]:
+    """
+    Resolve product titles in one query. Titles are not unique, so the
+    oldest product with a title wins, matching the single-item lookup.
+    """
+    if not titles:
+        return {}
+
+    rows = await db.execute(
+        select(Product.title, func.min(Product.id))
+        .filter(Product.title.in_(titles))
+        .group_by(Product.title)
+    )
+
+    return dict(rows.tuples().all())
+
+
+async def add_stock(db: AsyncSession, amounts: dict[int, int]) -> None:
+    """
+    Atomically add to each product's stock with one executemany
+    `UPDATE product SET stock = stock + :amount`, so concurrent deliveries
+    never overwrite each other's counts.
+    """
+    if not amounts:
+        return
+
+    products = Product.__table__
+    _ = await db.execute(
+        update(products)
+        .where(products.c.id == bindparam("product_id"))
+        .values(stock=func.coalesce(products.c.stock, 0) + bindparam("amount")),
+        [
+            {"product_id": product_id, "amount": amount}
+            for product_id, amount in amounts.items()
+        ],
+    )
+
+
+async def claim_transitions(
+    db: AsyncSession, transitions: dict[int, str | None]
+) -> None:
+    """
+    Lock each request in the status it was read with, using a
+    compare-and-set UPDATE per old status. If another transaction changed
+    any of them first, a 409 is raised and the caller's transaction rolls
+    back, so a request can never be delivered (and restocked) twice.
+    The new status itself is written by the caller's update.
+    """
+    groups: defaultdict[str | None, list[int]] = defaultdict(list)
+
+    for id, old in transitions.items():
+        groups[old].append(id)
+
+    for old, ids in groups.items():
+        current = Request.status.is_(None) if old is None else Request.status == old
+        result = await db.execute(
+            update(Request)
+            .filter(Request.id.in_(ids), current)
+            .values(status=Request.status)
+            .execution_options(synchronize_session=False)
+        )
+
+        if result.rowcount != len(ids):
+            raise HTTPException(
+                status_code=409, detail="Request status changed concurrently"
+            )
+
+
+async def replace_reservations(
+    db: AsyncSession, reservations: dict[int, tuple[int, int]], status: str
+) -> None:
+    """
+    Record a (product_id, quantity) reservation for each request id,
+    replacing any earlier one.
+    """
+    if not reservations:
+        return
+
+    _ = await db.execute(
+        delete(StockReservation).filter(
+            StockReservation.request_id.in_(list(reservations))
+        )
+    )
+    _ = await db.execute(
+        insert(StockReservation),
+        [
+            {
+                "request_id": request_id,
+                "product_id": product_id,
+                "quantity": quantity,
+                "status": status,
+            }
+            for request_id, (product_id, quantity) in reservations.items()
+        ],
+    )
+
+
+async def apply_stock_changes(
+    db: AsyncSession, updates: list[dict[str, Any]]
+) -> dict[int, str]:
+    """
+    Apply the inventory side of a set of request updates in the caller's
+    transaction, which must then apply the updates themselves and commit:
+
+    - approved: reserve the ordered (or requested) amount of the product
+    - delivered: add the delivered amount to stock and commit the reservation
+    - approved -> anything else: release the reservation
+
+    Returns the ids of updates that must be dropped, with the reason.
+    """
+    changes = {
+        change["id"]: change
+        for change in updates
+        if change.get("id") is not None and "status" in change
+    }
+
+    if not changes:
+        return {}
+
+    requests = {
+        request.id: request
+        for request in await db.scalars(
+            select(Request).filter(Request.id.in_(list(changes))).with_for_update()
+        )
+    }
+    changes = {
+        id: change
+        for id, change in changes.items()
+        if id in requests and change["status"] != requests[id].status
+    }
+
+    if not changes:
+        return {}
+
+    def item_name(id: int) -> str | None:
+        return changes[id].get("item_name") or requests[id].item_name
+
+    products = await product_ids_by_title(
+        db, {name for id in changes if (name := item_name(id))}
+    )
+    reserved = {
+        reservation.request_id: reservation.quantity
+        for reservation in await db.scalars(
+            select(StockReservation).filter(
+                StockReservation.request_id.in_(list(changes)),
+                StockReservation.status == "reserved",
+            )
+        )
+    }
+
+    failures: dict[int, str] = {}
+    reservations: dict[int, tuple[int, int]] = {}
+    deliveries: dict[int, tuple[int, int]] = {}
+    releases: list[int] = []
+
+    for id, change in changes.items():
+        request = requests[id]
+        name = item_name(id)
+        product_id = products.get(name) if name else None
+
+        if change["status"] == "delivered":
+            amount = (
+                change.get("amount")
+                or reserved.get(id)
+                or request.ordered_amount
+                or request.requested_amount
+            )
+
+            if not name or not amount or amount < 0:
+                continue
+
+            if product_id is None:
+                failures[id] = "product_not_found"
+                continue
+
+            deliveries[id] = (product_id, amount)
+        elif change["status"] == "approved":
+            quantity = (
+                change.get("ordered_amount")
+                or change.get("requested_amount")
+                or request.ordered_amount
+                or request.requested_amount
+            )
+
+            if product_id is not None and quantity:
+                reservations[id] = (product_id, quantity)
+        elif id in reserved:
+            releases.append(id)
+
+    await claim_transitions(
+        db,
+        {id: requests[id].status for id in changes if id not in failures},
+    )
+
+    totals: defaultdict[int, int] = defaultdict(int)
+
+    for product_id, amount in deliveries.values():
+        totals[product_id] += amount
+
+    await add_stock(db, totals)
+    await replace_reservations(db, reservations, "reserved")
+    await replace_reservations(db, deliveries, "committed")
+
+    if releases:
+        _ = await db.execute(
+            update(StockReservation)
+            .filter(StockReservation.request_id.in_(releases))
+            .values(status="released", updated_at=datetime.now())
+        )
+
+    return failures
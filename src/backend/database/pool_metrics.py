@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool
+
+from backend.metrics import POOL_WAIT_LATENCY
+
+
+class PoolMetrics:
+    """
+    Counters for connection checkouts and how long callers waited for them.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+        POOL_WAIT_LATENCY.observe(seconds)
+
+    def snapshot(self, pool: Pool) -> dict[str, Any]:
+        with self._lock:
+            metrics: dict[str, Any] = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+        for name in ("size", "checkedout", "checkedin", "overflow"):
+            method = getattr(pool, name, None)
+
+            if method is not None:
+                metrics[name] = method()
+
+        return metrics
+
+
+POOL_METRICS = PoolMetrics()
+
+
+class MeteredAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records time spent waiting for a connection.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            POOL_METRICS.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+
+        POOL_METRICS.record_wait(time.perf_counter() - start)
+        return connection
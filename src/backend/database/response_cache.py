@@ -0,0 +1,245 @@
+import gzip
+import hashlib
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Protocol
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic_core import to_json
+
+from backend.constants import (
+    RESPONSE_CACHE_BACKEND,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    RESPONSE_CACHE_TTL_SECONDS,
+    RESPONSE_CACHE_URL,
+)
+from backend.metrics import SERIALIZATION_LATENCY
+
+# Bodies smaller than this are not worth the gzip framing.
+MIN_COMPRESS_BYTES = 512
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    gzipped: bytes | None
+    etag: str
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag`, or is "*". Compared weakly,
+    as RFC 9110 has it for If-None-Match: a W/ prefix on either side is
+    ignored.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+
+        if tag == "*" or tag.removeprefix("W/") == etag.removeprefix("W/"):
+            return True
+
+    return False
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> CachedResponse | None: ...
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None: ...
+
+    async def version(self, namespace: str) -> str: ...
+
+    async def bump(self, namespace: str) -> None: ...
+
+
+class LRUBackend:
+    """
+    Per-process LRU. Versions are local to the worker, so writes made by
+    other workers are only picked up once the entry's TTL runs out.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[CachedResponse, float]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        # Distinguishes this process's versions from another worker's.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            item = self._entries.get(key)
+
+            if item is None:
+                return None
+
+            entry, expires_at = item
+
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (entry, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                _ = self._entries.popitem(last=False)
+
+    async def version(self, namespace: str) -> str:
+        return f"{self._epoch}.{self._versions.get(namespace, 0)}"
+
+    async def bump(self, namespace: str) -> None:
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+
+class RedisBackend:
+    """
+    Shared backend for any Redis-compatible server, so every worker sees
+    the same versions and entries. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str, prefix: str = "response-cache"):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "RESPONSE_CACHE_BACKEND=redis requires the `redis` package"
+            ) from e
+
+        self.prefix = prefix
+        self._client = Redis.from_url(url)
+
+    async def get(self, key: str) -> CachedResponse | None:
+        fields = await self._client.hmget(
+            f"{self.prefix}:entry:{key}", ["body", "gzipped", "etag"]
+        )
+
+        if fields[0] is None:
+            return None
+
+        return CachedResponse(
+            body=fields[0], gzipped=fields[1] or None, etag=fields[2].decode()
+        )
+
+    async def set(self, key: str, entry: CachedResponse, ttl: float) -> None:
+        name = f"{self.prefix}:entry:{key}"
+
+        async with self._client.pipeline(transaction=True) as pipe:
+            _ = pipe.hset(
+                name,
+                mapping={
+                    "body": entry.body,
+                    "gzipped": entry.gzipped or b"",
+                    "etag": entry.etag,
+                },
+            )
+            _ = pipe.expire(name, max(int(ttl), 1))
+            _ = await pipe.execute()
+
+    async def version(self, namespace: str) -> str:
+        version = await self._client.get(f"{self.prefix}:version:{namespace}")
+
+        return version.decode() if version is not None else "0"
+
+    async def bump(self, namespace: str) -> None:
+        _ = await self._client.incr(f"{self.prefix}:version:{namespace}")
+
+
+class ResponseCache:
+    """
+    Caches serialized, precompressed JSON responses per namespace (a table
+    name). Writes bump the namespace version, which changes every key built
+    from it, so stale entries are never read again and simply age out.
+
+    ETags are content hashes, so a client revalidating a cached response
+    gets a 304 without touching the database.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def invalidate(self, namespace: str) -> None:
+        await self.backend.bump(namespace)
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        build: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """
+        Serve `build()` for this request from the cache, building and storing
+        it on a miss. The key covers the path and query string.
+
+        Entries may be built from a lagging replica, so a client reading its
+        own recent writes (see backend.database.routing) always rebuilds,
+        which also refreshes the entry for everyone else.
+        """
+        version = await self.backend.version(namespace)
+        key = f"{namespace}:{version}:{request.url.path}?{request.url.query}"
+        entry = (
+            None
+            if getattr(request.state, "read_your_writes", False)
+            else await self.backend.get(key)
+        )
+
+        if entry is None:
+            self.misses += 1
+            entry = self.serialize(await build())
+            await self.backend.set(key, entry, self.ttl)
+        else:
+            self.hits += 1
+
+        headers = {
+            "ETag": entry.etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "Accept-Encoding, Authorization",
+        }
+
+        if etag_matches(request.headers.get("if-none-match", ""), entry.etag):
+            return Response(status_code=304, headers=headers)
+
+        if entry.gzipped and "gzip" in request.headers.get("accept-encoding", ""):
+            headers["Content-Encoding"] = "gzip"
+            return Response(
+                entry.gzipped, media_type="application/json", headers=headers
+            )
+
+        return Response(entry.body, media_type="application/json", headers=headers)
+
+    @staticmethod
+    def serialize(content: Any) -> CachedResponse:
+        start = time.perf_counter()
+        body = to_json(content, fallback=jsonable_encoder)
+        SERIALIZATION_LATENCY.observe(time.perf_counter() - start, "cache")
+
+        gzipped = gzip.compress(body) if len(body) >= MIN_COMPRESS_BYTES else None
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+        return CachedResponse(body=body, gzipped=gzipped, etag=etag)
+
+
+def create_backend(name: str) -> CacheBackend:
+    if name == "redis":
+        return RedisBackend(RESPONSE_CACHE_URL)
+
+    return LRUBackend(RESPONSE_CACHE_MAX_ENTRIES)
+
+
+RESPONSE_CACHE = ResponseCache(
+    create_backend(RESPONSE_CACHE_BACKEND), ttl=RESPONSE_CACHE_TTL_SECONDS
+)
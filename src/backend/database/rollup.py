@@ -0,0 +1,263 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Literal
+
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.auth.models import Request, RequestRollup
+
+Bucket = Literal["day", "week", "month"]
+
+KEY_COLUMNS = ("day", "status", "request_type")
+METRIC_COLUMNS = (
+    "count",
+    "cost_total",
+    "response_count",
+    "response_seconds_total",
+    "completed_count",
+    "completion_seconds_total",
+)
+
+
+def request_contribution(request: Any) -> dict[str, Any] | None:
+    """
+    The rollup row a single request adds, or None if it cannot be bucketed.
+    Takes anything with Request's attributes, ORM instance or row.
+    """
+    created_at: datetime | None = request.created_at
+
+    if created_at is None:
+        return None
+
+    updated_at: datetime | None = request.updated_at
+    completed_at: datetime | None = request.completed_at
+    responded = request.status != "pending" and updated_at is not None
+
+    return {
+        "day": created_at.date(),
+        "status": request.status or "unknown",
+        "request_type": request.request_type or "unknown",
+        "count": 1,
+        "cost_total": request.cost or 0.0,
+        "response_count": int(responded),
+        "response_seconds_total": (
+            (updated_at - created_at).total_seconds() if responded else 0.0
+        ),
+        "completed_count": int(completed_at is not None),
+        "completion_seconds_total": (
+            (completed_at - created_at).total_seconds() if completed_at else 0.0
+        ),
+    }
+
+
+async def _upsert(db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    dialect = db.get_bind().dialect.name
+
+    if dialect in ("postgresql", "cockroachdb", "sqlite"):
+        module = sqlite if dialect == "sqlite" else postgresql
+        statement = module.insert(RequestRollup)
+        _ = await db.execute(
+            statement.on_conflict_do_update(
+                index_elements=list(KEY_COLUMNS),
+                set_={
+                    column: getattr(RequestRollup, column)
+                    + getattr(statement.excluded, column)
+                    for column in METRIC_COLUMNS
+                },
+            ),
+            rows,
+        )
+        return
+
+    for row in rows:
+        result = await db.execute(
+            update(RequestRollup)
+            .filter(*(getattr(RequestRollup, key) == row[key] for key in KEY_COLUMNS))
+            .values(
+                {
+                    column: getattr(RequestRollup, column) + row[column]
+                    for column in METRIC_COLUMNS
+                }
+            )
+        )
+
+        if result.rowcount == 0:
+            _ = await db.execute(insert(RequestRollup).values(**row))
+
+
+async def apply_request_changes(
+    db: AsyncSession,
+    changes: list[tuple[dict[str, Any] | None, dict[str, Any] | None]],
+) -> None:
+    """
+    Move each request's contribution from `before` to `after` in the current
+    transaction. Either side may be None for inserts and deletes. Changes
+    are netted per rollup row first, so a batch costs one upsert statement.
+    """
+    deltas: dict[tuple[Any, ...], dict[str, Any]] = {}
+
+    for before, after in changes:
+        for row, sign in ((before, -1), (after, 1)):
+            if row is None:
+                continue
+
+            key = tuple(row[column] for column in KEY_COLUMNS)
+            delta = deltas.setdefault(
+                key,
+                {
+                    **dict(zip(KEY_COLUMNS, key)),
+                    **{column: 0 for column in METRIC_COLUMNS},
+                },
+            )
+
+            for column in METRIC_COLUMNS:
+                delta[column] += sign * row[column]
+
+    rows = [
+        row for row in deltas.values() if any(row[column] for column in METRIC_COLUMNS)
+    ]
+
+    if rows:
+        await _upsert(db, rows)
+
+
+async def apply_request_change(
+    db: AsyncSession,
+    before: dict[str, Any] | None,
+    after: dict[str, Any] | None,
+) -> None:
+    await apply_request_changes(db, [(before, after)])
+
+
+def rebuild_request_rollup(db: Session, batch_size: int = 1000) -> None:
+    """
+    Recompute the rollup from the request table, streaming rows so memory
+    stays flat. Used to backfill when the rollup table is first created.
+    """
+    totals: dict[tuple[Any, ...], dict[str, Any]] = {}
+
+    result = db.execute(
+        select(
+            Request.created_at,
+            Request.updated_at,
+            Request.completed_at,
+            Request.status,
+            Request.request_type,
+            Request.cost,
+        ).execution_options(yield_per=batch_size)
+    )
+
+    for request in result:
+        row = request_contribution(request)
+
+        if row is None:
+            continue
+
+        key = tuple(row[column] for column in KEY_COLUMNS)
+
+        if key not in totals:
+            totals[key] = row
+        else:
+            for column in METRIC_COLUMNS:
+                totals[key][column] += row[column]
+
+    _ = db.execute(delete(RequestRollup))
+
+    if totals:
+        _ = db.execute(insert(RequestRollup), list(totals.values()))
+
+    db.commit()
+
+
+def bucket_start(day: date, bucket: Bucket) -> date:
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+
+    if bucket == "month":
+        return day.replace(day=1)
+
+    return day
+
+
+def summarize(rows: list[Any]) -> dict[str, Any]:
+    totals = {column: 0 for column in METRIC_COLUMNS}
+
+    for row in rows:
+        for column in METRIC_COLUMNS:
+            totals[column] += getattr(row, column) or 0
+
+    return {
+        "count": totals["count"],
+        "cost_total": totals["cost_total"],
+        "avg_response_days": (
+            totals["response_seconds_total"] / totals["response_count"] / 86400
+            if totals["response_count"]
+            else None
+        ),
+        "avg_completion_days": (
+            totals["completion_seconds_total"] / totals["completed_count"] / 86400
+            if totals["completed_count"]
+            else None
+        ),
+    }
+
+
+async def read_rollup(
+    db: AsyncSession,
+    group_by: tuple[str, ...],
+    start: date | None = None,
+    end: date | None = None,
+) -> list[Any]:
+    """
+    Sum the rollup grouped by the given key columns, in SQL.
+    """
+    keys = [getattr(RequestRollup, column) for column in group_by]
+    query = select(
+        *keys,
+        *(
+            func.sum(getattr(RequestRollup, column)).label(column)
+            for column in METRIC_COLUMNS
+        ),
+    )
+
+    if start is not None:
+        query = query.filter(RequestRollup.day >= start)
+
+    if end is not None:
+        query = query.filter(RequestRollup.day <= end)
+
+    if keys:
+        query = query.group_by(*keys).order_by(*keys)
+
+    return list((await db.execute(query)).all())
+
+
+def fold_buckets(rows: list[Any], bucket: Bucket) -> list[dict[str, Any]]:
+    """
+    Fold daily rollup rows into week/month buckets.
+    """
+    buckets: defaultdict[date, list[Any]] = defaultdict(list)
+
+    for row in rows:
+        buckets[bucket_start(row.day, bucket)].append(row)
+
+    series = []
+
+    for start in sorted(buckets):
+        by_status: defaultdict[str, int] = defaultdict(int)
+
+        for row in buckets[start]:
+            by_status[row.status] += row.count
+
+        series.append(
+            {
+                "bucket": start.isoformat(),
+                **summarize(buckets[start]),
+                "by_status": by_status,
+            }
+        )
+
+    return series
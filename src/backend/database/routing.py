@@ -0,0 +1,219 @@
+import threading
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
+
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.auth.database import async_engine, get_async_db, to_async_url
+from backend.auth.principal_cache import hash_credential
+from backend.constants import (
+    FOLLOWER_READS,
+    READ_REPLICA_URL,
+    READ_YOUR_WRITES_SECONDS,
+)
+from backend.database.engine import make_async_engine
+from backend.logger import LOG
+from backend.metrics import REGISTRY, Counter
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+LAST_WRITE_COOKIE = "last_write"
+# Past this many clients, forget those whose window has already closed.
+MAX_TRACKED_CLIENTS = 10_000
+
+READ_SESSIONS = REGISTRY.register(
+    Counter(
+        "db_read_sessions_total",
+        "Sessions opened for read-only handlers, by where they read from.",
+        ("target",),
+    )
+)
+
+
+class FollowerReadSession(Session):
+    """
+    Session whose transactions read a slightly stale, consistent snapshot
+    that CockroachDB can serve from the nearest replica of each range
+    instead of its leaseholder. Such transactions cannot write.
+    """
+
+
+def _read_as_of_follower_timestamp(
+    _: Session, __: SessionTransaction, connection: Any
+) -> None:
+    # Must be the first statement of the transaction.
+    _ = connection.exec_driver_sql(
+        "SET TRANSACTION AS OF SYSTEM TIME follower_read_timestamp()"
+    )
+
+
+event.listen(FollowerReadSession, "after_begin", _read_as_of_follower_timestamp)
+
+
+def _replica_engine() -> AsyncEngine | None:
+    if not READ_REPLICA_URL:
+        return None
+
+    return make_async_engine(to_async_url(READ_REPLICA_URL))
+
+
+def _read_sessionmaker(
+    replica: AsyncEngine | None,
+) -> async_sessionmaker[AsyncSession] | None:
+    if replica is not None:
+        return async_sessionmaker(replica, autoflush=False, expire_on_commit=False)
+
+    if not FOLLOWER_READS:
+        return None
+
+    if async_engine.dialect.name != "cockroachdb":
+        LOG.warning(
+            "FOLLOWER_READS needs CockroachDB, not %s; reading from the primary",
+            async_engine.dialect.name,
+        )
+        return None
+
+    return async_sessionmaker(
+        async_engine,
+        sync_session_class=FollowerReadSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+
+
+class ReadRouter:
+    """
+    Decides where read-only handlers read from. A client that wrote within
+    the last `window` seconds reads from the primary, so it sees its own
+    writes; everyone else reads from the replica, or with follower reads.
+
+    A write is remembered per credential in this process, and in a cookie
+    that carries it to the other workers for clients that keep cookies. A
+    forged cookie can only send its own client to the primary.
+    """
+
+    def __init__(
+        self, sessionmaker: async_sessionmaker[AsyncSession] | None, window: float
+    ):
+        self.sessionmaker = sessionmaker
+        self.window = window
+        self._last_writes: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sessionmaker is not None
+
+    @staticmethod
+    def client_key(headers: Headers) -> str | None:
+        credential = headers.get("authorization") or headers.get("x-api-key")
+
+        return hash_credential(credential) if credential else None
+
+    def record_write(self, headers: Headers) -> None:
+        key = self.client_key(headers)
+
+        if key is None:
+            return
+
+        now = time.monotonic()
+
+        with self._lock:
+            self._last_writes[key] = now
+
+            if len(self._last_writes) > MAX_TRACKED_CLIENTS:
+                self._last_writes = {
+                    key: at
+                    for key, at in self._last_writes.items()
+                    if now - at < self.window
+                }
+
+    def cookie(self) -> str:
+        return (
+            f"{LAST_WRITE_COOKIE}={time.time():.3f}; Max-Age={int(self.window) + 1}; "
+            "Path=/; HttpOnly; SameSite=Lax"
+        )
+
+    def wrote_recently(self, request: Request) -> bool:
+        key = self.client_key(request.headers)
+
+        if key is not None:
+            with self._lock:
+                at = self._last_writes.get(key)
+
+            if at is not None and time.monotonic() - at < self.window:
+                return True
+
+        try:
+            at = float(request.cookies.get(LAST_WRITE_COOKIE, ""))
+        except ValueError:
+            return False
+
+        return time.time() - at < self.window
+
+
+REPLICA_ENGINE = _replica_engine()
+READ_ROUTER = ReadRouter(_read_sessionmaker(REPLICA_ENGINE), READ_YOUR_WRITES_SECONDS)
+
+
+async def get_read_db(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for handlers that only read. Reads from the primary reuse the
+    request's get_async_db session, which authentication also takes, so they
+    hold one pooled connection. Writes through it fail on a replica or under
+    follower reads, so handlers that write take get_async_db.
+    """
+    sessionmaker = READ_ROUTER.sessionmaker
+
+    if sessionmaker is not None and READ_ROUTER.wrote_recently(request):
+        # Lets the response cache skip entries built from lagging reads.
+        request.state.read_your_writes = True
+        sessionmaker = None
+
+    if sessionmaker is None:
+        READ_SESSIONS.inc("primary")
+        yield db
+        return
+
+    READ_SESSIONS.inc("replica" if REPLICA_ENGINE is not None else "follower")
+
+    async with sessionmaker() as read_db:
+        yield read_db
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware that records every successful unsafe request (POST,
+    PUT, DELETE, ...) as a write by its client, for READ_ROUTER.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not READ_ROUTER.enabled
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                READ_ROUTER.record_write(Headers(scope=scope))
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"set-cookie", READ_ROUTER.cookie().encode()),
+                ]
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Any, Generic, TypeVar
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import Column
+
+from backend.auth.models import Product, Request, Suggestion
+
+# Response schemas. List endpoints select exactly these columns, so
+# relationships (and the user rows behind them) are never serialized.
+
+
+class ProductOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    title: str | None = None
+    description: str | None = None
+    category: str | None = None
+    price: float | None = None
+    stock: int | None = None
+    thumbnail: str | None = None
+
+
+class RequestOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int | None = None
+    request: str | None = None
+    request_type: str | None = None
+    status: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    comments: str | None = None
+    is_anonymous: bool | None = None
+    admin: int | None = None
+    cost: float | None = None
+    requested_amount: int | None = None
+    ordered_amount: int | None = None
+    item_name: str | None = None
+    completed_at: datetime | None = None
+    user_name: str | None = None
+    admin_name: str | None = None
+
+
+class SuggestionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    user_id: int | None = None
+    user_name: str | None = None
+    suggestion: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+    completed_at: datetime | None = None
+    comments: str | None = None
+    is_anonymous: bool | None = None
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class ItemResult(BaseModel, Generic[T]):
+    index: int | None = None
+    id: int | None = None
+    status: str
+    item: T | None = None
+
+
+class BatchResult(BaseModel, Generic[T]):
+    created: list[ItemResult[T]]
+    updated: list[ItemResult[T]]
+    deleted: list[ItemResult[T]]
+
+
+class Facet(BaseModel):
+    value: str
+    count: int
+
+
+class ProductSearchResult(BaseModel):
+    items: list[ProductOut]
+    total: int
+    facets: dict[str, list[Facet]]
+
+
+RESPONSE_SCHEMAS: dict[Any, type[BaseModel]] = {
+    Product: ProductOut,
+    Request: RequestOut,
+    Suggestion: SuggestionOut,
+}
+
+
+def response_columns(model: Any) -> list[Column[Any]]:
+    """
+    The columns a model's response schema exposes, in schema order, or all
+    of its columns if it has no schema.
+    """
+    schema = RESPONSE_SCHEMAS.get(model)
+    columns = model.__table__.columns
+
+    if schema is None:
+        return list(columns)
+
+    return [columns[name] for name in schema.model_fields]
@@ -0,0 +1,496 @@
+import asyncio
+import heapq
+import math
+import re
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from sqlalchemy import Engine, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.models import Product
+from backend.constants import PRODUCT_SEARCH_BACKEND, SEARCH_INDEX_TTL_SECONDS
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.logger import LOG
+
+SearchMode = Literal["fts5", "postgres", "memory"]
+
+# Relative weight of a match in each field.
+FIELD_WEIGHTS = {"title": 3.0, "category": 2.0, "description": 1.0}
+
+# How much an expanded term counts compared to the exact term.
+PREFIX_WEIGHT = 0.8
+FUZZY_WEIGHT = 0.6
+MAX_EXPANSIONS = 8
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# Only changes to the indexed columns reindex a product, so stock changes skip it.
+SQLITE_UPDATE_TRIGGER = """
+    CREATE TRIGGER product_fts_update
+    AFTER UPDATE OF title, description, category ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+        INSERT INTO product_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+"""
+
+SQLITE_SETUP = [
+    """
+    CREATE VIRTUAL TABLE product_fts USING fts5(
+        title, description, category,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    "CREATE VIRTUAL TABLE product_fts_vocab USING fts5vocab(product_fts, 'row')",
+    """
+    CREATE TRIGGER product_fts_insert AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, title, description, category)
+        VALUES (new.id, new.title, new.description, new.category);
+    END
+    """,
+    """
+    CREATE TRIGGER product_fts_delete AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, title, description, category)
+        VALUES ('delete', old.id, old.title, old.description, old.category);
+    END
+    """,
+    SQLITE_UPDATE_TRIGGER,
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+]
+
+POSTGRES_DOCUMENT = (
+    "to_tsvector('simple', coalesce(title, '') || ' ' || "
+    "coalesce(description, '') || ' ' || coalesce(category, ''))"
+)
+
+POSTGRES_SETUP = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_product_search ON product "
+    f"USING GIN (({POSTGRES_DOCUMENT}))",
+    "CREATE INDEX IF NOT EXISTS ix_product_title_trgm ON product "
+    "USING GIN (title gin_trgm_ops)",
+]
+
+
+def tokenize(value: str | None) -> list[str]:
+    return TOKEN_PATTERN.findall(value.lower()) if value else []
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (adjacent transpositions count as
+    one edit), giving up once it exceeds `limit`.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous2: list[int] = []
+    previous = list(range(len(b) + 1))
+
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(
+                previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost
+            )
+
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+
+        if min(current) > limit:
+            return limit + 1
+
+        previous2, previous = previous, current
+
+    return previous[-1]
+
+
+def allowed_typos(token: str) -> int:
+    if len(token) <= 3:
+        return 0
+
+    return 1 if len(token) <= 6 else 2
+
+
+def trigrams(term: str) -> set[str]:
+    padded = f"  {term} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class Vocabulary:
+    """
+    The distinct terms in the catalog, for expanding query tokens into the
+    terms they were probably meant to be: prefixes while the user is still
+    typing, and close spellings when they made a typo.
+    """
+
+    def __init__(self, terms: set[str]):
+        self.terms = sorted(terms)
+        self._known = set(terms)
+        self._by_trigram: defaultdict[str, list[str]] = defaultdict(list)
+
+        for term in self.terms:
+            for gram in trigrams(term):
+                self._by_trigram[gram].append(term)
+
+    def expand(self, token: str) -> list[tuple[str, float]]:
+        expansions: dict[str, float] = {}
+
+        if token in self._known:
+            expansions[token] = 1.0
+
+        start = bisect_left(self.terms, token)
+
+        for term in self.terms[start : start + MAX_EXPANSIONS]:
+            if not term.startswith(token):
+                break
+
+            _ = expansions.setdefault(term, PREFIX_WEIGHT)
+
+        typos = allowed_typos(token)
+
+        if typos and len(expansions) < MAX_EXPANSIONS:
+            shared = Counter(
+                term for gram in trigrams(token) for term in self._by_trigram[gram]
+            )
+
+            for term, _count in shared.most_common(MAX_EXPANSIONS * 8):
+                if (
+                    term not in expansions
+                    and edit_distance(token, term, typos) <= typos
+                ):
+                    expansions[term] = FUZZY_WEIGHT
+
+                if len(expansions) >= MAX_EXPANSIONS:
+                    break
+
+        return list(expansions.items())
+
+
+@dataclass
+class InvertedIndex:
+    """
+    In-process BM25 index over the product catalog, used when the database
+    has no full-text support (or PRODUCT_SEARCH_BACKEND=memory).
+    """
+
+    postings: defaultdict[str, dict[int, float]] = field(
+        default_factory=lambda: defaultdict(dict)
+    )
+    lengths: dict[int, float] = field(default_factory=dict)
+    categories: dict[int, str | None] = field(default_factory=dict)
+    vocabulary: Vocabulary = field(default_factory=lambda: Vocabulary(set()))
+
+    def add(self, id: int, **fields: str | None) -> None:
+        self.categories[id] = fields.get("category")
+        length = 0.0
+
+        for name, weight in FIELD_WEIGHTS.items():
+            for token in tokenize(fields.get(name)):
+                postings = self.postings[token]
+                postings[id] = postings.get(id, 0.0) + weight
+                length += weight
+
+        self.lengths[id] = length
+
+    def finish(self) -> None:
+        self.vocabulary = Vocabulary(set(self.postings))
+
+    def search(self, query: str) -> dict[int, float]:
+        """
+        Score every product matching all query tokens, allowing each token to
+        match any of its expansions.
+        """
+        count = len(self.lengths)
+
+        if not count:
+            return {}
+
+        average_length = sum(self.lengths.values()) / count
+        scores: dict[int, float] | None = None
+
+        for token in tokenize(query):
+            token_scores: dict[int, float] = {}
+
+            for term, weight in self.vocabulary.expand(token):
+                postings = self.postings[term]
+                idf = math.log(
+                    1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+
+                for id, frequency in postings.items():
+                    norm = 1.2 * (0.25 + 0.75 * self.lengths[id] / average_length)
+                    score = weight * idf * frequency * 2.2 / (frequency + norm)
+                    token_scores[id] = max(token_scores.get(id, 0.0), score)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {
+                    id: score + token_scores[id]
+                    for id, score in scores.items()
+                    if id in token_scores
+                }
+
+            if not scores:
+                return {}
+
+        return scores or {}
+
+
+class ProductSearch:
+    """
+    Ranked, typo-tolerant product search.
+
+    Uses SQLite FTS5 or Postgres tsvector/trigram indexes when the database
+    has them, and otherwise an in-process inverted index that is rebuilt
+    when the product table changes.
+    """
+
+    def __init__(self, backend: str, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._mode: SearchMode | None = None
+        self._index: InvertedIndex | None = None
+        self._vocabulary: Vocabulary | None = None
+        self._version: str | None = None
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @staticmethod
+    def create_indexes(engine: Engine) -> None:
+        """
+        Create the full-text structures for the engine's dialect. Failures
+        are logged and leave search on the in-process index.
+        """
+        dialect = engine.dialect.name
+
+        if dialect == "sqlite":
+            with engine.connect() as connection:
+                exists = connection.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'product_fts'"
+                ).first()
+
+            # Databases set up before the trigger named its columns get it
+            # replaced.
+            statements = (
+                ["DROP TRIGGER IF EXISTS product_fts_update", SQLITE_UPDATE_TRIGGER]
+                if exists
+                else SQLITE_SETUP
+            )
+        elif dialect == "postgresql":
+            statements = POSTGRES_SETUP
+        elif dialect == "cockroachdb":
+            # Trigram support is built in, there is no extension to create.
+            statements = POSTGRES_SETUP[1:]
+        else:
+            return
+
+        try:
+            with engine.begin() as connection:
+                for statement in statements:
+                    _ = connection.exec_driver_sql(statement)
+        except DBAPIError as e:
+            LOG.warning(f"Full-text search unavailable, using in-process index: {e}")
+
+    async def search(
+        self,
+        db: AsyncSession,
+        query: str,
+        category: str | None = None,
+        limit: int = 20,
+    ) -> dict[str, Any]:
+        ids, facets = await self._rank(db, query, category, limit)
+
+        products = {
+            product.id: product
+            for product in await db.scalars(select(Product).filter(Product.id.in_(ids)))
+        }
+
+        return {
+            "items": [products[id] for id in ids if id in products],
+            "total": facets[category] if category else sum(facets.values()),
+            "facets": {
+                "category": [
+                    {"value": value, "count": count}
+                    for value, count in facets.most_common()
+                    if value is not None
+                ]
+            },
+        }
+
+    async def _rank(
+        self, db: AsyncSession, query: str, category: str | None, limit: int
+    ) -> tuple[list[int], Counter[str | None]]:
+        """
+        The ids of the best `limit` matches, and match counts per category.
+        """
+        if not tokenize(query):
+            return [], Counter()
+
+        mode = await self._resolve_mode(db)
+
+        if mode == "postgres":
+            matches = f"""
+                SELECT id, category,
+                    ts_rank({POSTGRES_DOCUMENT}, query) + similarity(title, :q) AS score
+                FROM product, plainto_tsquery('simple', :q) AS query
+                WHERE {POSTGRES_DOCUMENT} @@ query OR title % :q
+            """
+            return await self._rank_in_database(
+                db, matches, {"q": query}, category, limit
+            )
+
+        await self._refresh(db, mode)
+        assert self._vocabulary is not None
+
+        if mode == "memory":
+            assert self._index is not None
+            categories = self._index.categories
+            scores = self._index.search(query)
+
+            return (
+                heapq.nlargest(
+                    limit,
+                    (
+                        id
+                        for id in scores
+                        if category is None or categories[id] == category
+                    ),
+                    key=scores.__getitem__,
+                ),
+                Counter(categories[id] for id in scores),
+            )
+
+        match = self._fts5_match(query, self._vocabulary)
+
+        # bm25() is lower-is-better, so negate it for a descending score.
+        matches = """
+            SELECT product.id, product.category,
+                -bm25(product_fts, :title, :description, :category) AS score
+            FROM product_fts JOIN product ON product.id = product_fts.rowid
+            WHERE product_fts MATCH :match
+        """
+        return await self._rank_in_database(
+            db, matches, {"match": match, **FIELD_WEIGHTS}, category, limit
+        )
+
+    @staticmethod
+    async def _rank_in_database(
+        db: AsyncSession,
+        matches: str,
+        params: dict[str, Any],
+        category: str | None,
+        limit: int,
+    ) -> tuple[list[int], Counter[str | None]]:
+        """
+        Rank and facet a `matches` query (id, category, score) in SQL, so only
+        the page of ids and the per-category counts leave the database.
+        """
+        facets = await db.execute(
+            text(
+                f"SELECT category, count(*) FROM ({matches}) AS matches "
+                "GROUP BY category"
+            ),
+            params,
+        )
+        ids = await db.scalars(
+            text(
+                f"SELECT id FROM ({matches}) AS matches "
+                "WHERE :facet IS NULL OR category = :facet "
+                "ORDER BY score DESC LIMIT :limit"
+            ),
+            {**params, "facet": category, "limit": limit},
+        )
+
+        return list(ids), Counter(dict(facets.tuples().all()))
+
+    @staticmethod
+    def _fts5_match(query: str, vocabulary: Vocabulary) -> str:
+        groups: list[str] = []
+
+        for token in tokenize(query):
+            # The vocabulary may predate rows written by other workers, so an
+            # unknown token is still searched for as-is.
+            terms = [term for term, _weight in vocabulary.expand(token)] or [token]
+            groups.append("(" + " OR ".join(f'"{term}"' for term in terms) + ")")
+
+        return " AND ".join(groups)
+
+    async def _resolve_mode(self, db: AsyncSession) -> SearchMode:
+        if self._mode is not None:
+            return self._mode
+
+        dialect = db.get_bind().dialect.name
+        mode: SearchMode = "memory"
+
+        if self.backend != "memory":
+            if dialect == "sqlite":
+                exists = await db.scalar(
+                    text("SELECT 1 FROM sqlite_master WHERE name = 'product_fts'")
+                )
+                mode = "fts5" if exists else "memory"
+            elif dialect == "postgresql":
+                exists = await db.scalar(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                )
+                mode = "postgres" if exists else "memory"
+            elif dialect == "cockroachdb":
+                mode = "postgres"
+
+        self._mode = mode
+        LOG.info(f"Product search using {mode}")
+
+        return mode
+
+    async def _refresh(self, db: AsyncSession, mode: SearchMode) -> None:
+        """
+        Rebuild the in-memory index (or FTS5 vocabulary) when products were
+        written through this worker, or when it is older than the TTL.
+        """
+        version = await RESPONSE_CACHE.backend.version(Product.__tablename__)
+
+        if version == self._version and time.monotonic() - self._built_at < self.ttl:
+            return
+
+        async with self._lock:
+            if (
+                version == self._version
+                and time.monotonic() - self._built_at < self.ttl
+            ):
+                return
+
+            if mode == "memory":
+                index = InvertedIndex()
+                rows = await db.execute(
+                    select(
+                        Product.id, Product.title, Product.description, Product.category
+                    )
+                )
+
+                for id, title, description, category in rows:
+                    index.add(
+                        id, title=title, description=description, category=category
+                    )
+
+                index.finish()
+                self._index = index
+                self._vocabulary = index.vocabulary
+            else:
+                terms = await db.scalars(text("SELECT term FROM product_fts_vocab"))
+                self._vocabulary = Vocabulary(set(terms))
+
+            self._version = version
+            self._built_at = time.monotonic()
+
+
+PRODUCT_SEARCH = ProductSearch(PRODUCT_SEARCH_BACKEND, ttl=SEARCH_INDEX_TTL_SECONDS)
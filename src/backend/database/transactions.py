@@ -0,0 +1,149 @@
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.constants import (
+    TRANSACTION_BACKOFF_MS,
+    TRANSACTION_MAX_ATTEMPTS,
+    TRANSACTION_MAX_BACKOFF_MS,
+)
+from backend.logger import LOG
+from backend.metrics import REGISTRY, Counter
+
+T = TypeVar("T")
+
+# serialization_failure (also CockroachDB's "restart transaction") and
+# deadlock_detected: the transaction did nothing wrong and can simply rerun.
+RETRYABLE_SQLSTATES = frozenset({"40001", "40P01"})
+
+TRANSACTION_RETRIES = REGISTRY.register(
+    Counter(
+        "db_transaction_retries_total",
+        "Units of work rerun after a retryable error, by error code.",
+        ("transaction", "code"),
+    )
+)
+TRANSACTIONS_EXHAUSTED = REGISTRY.register(
+    Counter(
+        "db_transaction_retries_exhausted_total",
+        "Units of work that still conflicted after TRANSACTION_MAX_ATTEMPTS.",
+        ("transaction",),
+    )
+)
+
+
+def retryable_code(error: DBAPIError) -> str | None:
+    """
+    The error's code if rerunning the transaction may succeed, else None.
+    """
+    code = getattr(error.orig, "sqlstate", None) or getattr(error.orig, "pgcode", None)
+
+    if code in RETRYABLE_SQLSTATES:
+        return code
+
+    # A WAL reader that tries to write after another writer committed gets
+    # SQLITE_BUSY straight away; waiting on busy_timeout cannot help it.
+    if isinstance(error, OperationalError) and "database is locked" in str(error.orig):
+        return "sqlite_busy"
+
+    return None
+
+
+def backoff_seconds(attempt: int) -> float:
+    """
+    Full jitter: a uniform delay up to a cap that doubles per attempt, so
+    transactions that conflicted once do not collide again in lockstep.
+    """
+    cap = min(TRANSACTION_MAX_BACKOFF_MS, TRANSACTION_BACKOFF_MS * 2 ** (attempt - 1))
+    return random.uniform(0, cap) / 1000
+
+
+async def run_transaction(
+    db: AsyncSession,
+    work: Callable[[AsyncSession], Awaitable[T]],
+    name: str = "transaction",
+    max_attempts: int = TRANSACTION_MAX_ATTEMPTS,
+) -> T:
+    """
+    Run `work(db)` in a transaction of its own and commit it, rerunning it
+    on serialization failures, deadlocks and SQLite lock contention. `work`
+    must not commit, and must be safe to run again from the start: anything
+    outside the database, like cache invalidation, belongs after this call.
+
+    Whatever transaction is open on `db` (say, the principal lookup) is
+    committed first and the session emptied, so objects loaded before stay
+    usable, detached, whatever happens to the unit of work.
+
+    On CockroachDB the unit of work runs under SAVEPOINT cockroach_restart
+    and retries roll back to it, which keeps the transaction's priority so
+    a conflicting transaction cannot starve it. On SQLite it starts with
+    BEGIN IMMEDIATE, so it waits for the write lock rather than conflicting.
+    """
+    if db.in_transaction():
+        await db.commit()
+
+    db.expunge_all()
+    dialect = db.get_bind().dialect.name
+    savepoint = dialect == "cockroachdb"
+    restarting = False
+    attempt = 0
+
+    while True:
+        attempt += 1
+
+        try:
+            if dialect == "sqlite":
+                # Writers queue for the lock instead of failing on upgrade.
+                _ = await db.connection(execution_options={"sqlite_begin": "IMMEDIATE"})
+
+            if savepoint and not restarting:
+                _ = await db.execute(text("SAVEPOINT cockroach_restart"))
+
+            result = await work(db)
+
+            if savepoint:
+                await db.flush()
+                _ = await db.execute(text("RELEASE SAVEPOINT cockroach_restart"))
+
+            await db.commit()
+            return result
+        except DBAPIError as e:
+            code = retryable_code(e)
+
+            if code is None:
+                await db.rollback()
+                raise
+
+            if attempt >= max_attempts:
+                await db.rollback()
+                TRANSACTIONS_EXHAUSTED.inc(name)
+                LOG.warning(f"Giving up on {name} after {attempt} attempts: {code}")
+                raise HTTPException(
+                    status_code=503,
+                    detail="Transaction conflict, try again",
+                    headers={"Retry-After": "1"},
+                ) from e
+
+            TRANSACTION_RETRIES.inc(name, code)
+
+            # A failed flush leaves the session unusable until rolled back,
+            # which ends the transaction and so loses the savepoint.
+            restarting = savepoint and db.is_active
+
+            if restarting:
+                _ = await db.execute(text("ROLLBACK TO SAVEPOINT cockroach_restart"))
+            else:
+                await db.rollback()
+
+            db.expunge_all()
+        except Exception:
+            await db.rollback()
+            raise
+
+        await asyncio.sleep(backoff_seconds(attempt))
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.auth.database import get_async_db
+from backend.auth.models import User
+from backend.auth.user_manager import UserManager
+from backend.constants import (
+    CHANGE_STREAM_HEARTBEAT_SECONDS,
+    CHANGE_STREAM_MAX_SECONDS,
+)
+from backend.database.changes import (
+    CHANGE_FEED,
+    CHANGE_TABLES,
+    RESET_EVENT,
+    Change,
+    Subscription,
+)
+
+router = APIRouter()
+
+ChangeTable = Literal["request", "suggestion"]
+
+
+async def stream_changes(
+    subscription: Subscription, replayed: list[Change] | None
+) -> AsyncIterator[str]:
+    """
+    Send the replayed changes (or a reset, if they could not be), then live
+    ones as they arrive, with a comment line whenever the stream has been
+    quiet for CHANGE_STREAM_HEARTBEAT_SECONDS so proxies keep it open.
+    """
+    try:
+        seen: set[int] = set()
+
+        if replayed is None:
+            yield RESET_EVENT
+        else:
+            for change in replayed:
+                seen.add(change.id)
+                yield change.event()
+
+        deadline = time.monotonic() + CHANGE_STREAM_MAX_SECONDS
+
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                change = await asyncio.wait_for(
+                    subscription.queue.get(),
+                    min(CHANGE_STREAM_HEARTBEAT_SECONDS, remaining),
+                )
+            except TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if change is None:
+                yield RESET_EVENT
+            elif change.id not in seen:
+                yield change.event()
+    finally:
+        CHANGE_FEED.unsubscribe(subscription)
+
+
+@router.get("/events")
+async def get_events(
+    table: list[ChangeTable] = Query(list(CHANGE_TABLES)),
+    last_event_id: int | None = Header(None, alias="Last-Event-ID"),
+    user: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Server-Sent Events for requests and suggestions as they are created,
+    updated and deleted: the caller's own, or everyone's for admins.
+
+    Each event is named after its table and carries the operation, the row
+    id and the row as the list endpoints return it (null once deleted). A
+    `reset` event means changes were missed, so the client should reread
+    its lists. Streams end after CHANGE_STREAM_MAX_SECONDS; EventSource
+    reconnects on its own and sends Last-Event-ID, and the stream resumes
+    after that event.
+    """
+    subscription = await CHANGE_FEED.subscribe(
+        db, None if user.role == "admin" else user.id, table
+    )
+
+    try:
+        replayed = (
+            await CHANGE_FEED.replay(db, subscription, last_event_id)
+            if last_event_id is not None
+            else []
+        )
+    except Exception:
+        CHANGE_FEED.unsubscribe(subscription)
+        raise
+
+    # The stream outlives the handler; give the connection back to the pool.
+    await db.close()
+
+    return StreamingResponse(
+        stream_changes(subscription, replayed),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
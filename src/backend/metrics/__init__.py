@@ -0,0 +1,27 @@
+from .metrics import (
+    REGISTRY,
+    SERIALIZATION_LATENCY,
+    POOL_WAIT_LATENCY,
+    Counter,
+    Gauge,
+    Histogram,
+    MeteredJSONResponse,
+    MetricsMiddleware,
+    instrument_engine,
+)
+from .query_inspector import QUERY_INSPECTOR, QueryInspectionError, QueryInspector
+
+__all__ = [
+    "REGISTRY",
+    "SERIALIZATION_LATENCY",
+    "POOL_WAIT_LATENCY",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "MeteredJSONResponse",
+    "MetricsMiddleware",
+    "instrument_engine",
+    "QUERY_INSPECTOR",
+    "QueryInspectionError",
+    "QueryInspector",
+]
@@ -0,0 +1,91 @@
+from collections.abc import Iterable
+
+from backend.auth.database import async_engine, engine
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+from backend.database.changes import CHANGE_FEED
+from backend.database.pool_metrics import POOL_METRICS
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.database.routing import REPLICA_ENGINE
+
+from .metrics import REGISTRY, Gauge, instrument_engine
+from .query_inspector import QUERY_INSPECTOR
+
+
+def _pool_value(name: str) -> Iterable[tuple[dict[str, str], float]]:
+    snapshot = POOL_METRICS.snapshot(async_engine.pool)
+
+    if name in snapshot:
+        yield {}, snapshot[name]
+
+
+def _cache_results(hits: int, misses: int) -> Iterable[tuple[dict[str, str], float]]:
+    yield {"result": "hit"}, hits
+    yield {"result": "miss"}, misses
+
+
+def register_collectors() -> None:
+    """
+    Time and inspect statements on every engine and expose the pool and
+    cache counters kept by other components. Call once per process.
+    """
+    engines = [(engine, "sync"), (async_engine.sync_engine, "async")]
+
+    if REPLICA_ENGINE is not None:
+        engines.append((REPLICA_ENGINE.sync_engine, "replica"))
+
+    for target, name in engines:
+        instrument_engine(target, name, QUERY_INSPECTOR)
+
+    _ = REGISTRY.register(
+        Gauge(
+            "db_pool_checkouts_total",
+            "Connections checked out of the async pool.",
+            lambda: _pool_value("checkouts"),
+            type="counter",
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "db_pool_timeouts_total",
+            "Checkouts that timed out waiting for a connection.",
+            lambda: _pool_value("timeouts"),
+            type="counter",
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "db_pool_checked_out",
+            "Connections currently checked out of the async pool.",
+            lambda: _pool_value("checkedout"),
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "db_pool_size",
+            "Configured size of the async pool.",
+            lambda: _pool_value("size"),
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "principal_cache_requests_total",
+            "Principal cache lookups by result.",
+            lambda: _cache_results(PRINCIPAL_CACHE.hits, PRINCIPAL_CACHE.misses),
+            type="counter",
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "response_cache_requests_total",
+            "Response cache lookups by result.",
+            lambda: _cache_results(RESPONSE_CACHE.hits, RESPONSE_CACHE.misses),
+            type="counter",
+        )
+    )
+    _ = REGISTRY.register(
+        Gauge(
+            "change_feed_subscribers",
+            "Change streams open in this worker.",
+            lambda: [({}, CHANGE_FEED.subscribers)],
+        )
+    )
@@ -0,0 +1,345 @@
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+if TYPE_CHECKING:
+    from .query_inspector import QueryInspector
+
+# Default latency buckets in seconds, from 1ms to 10s.
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = tuple[str, ...]
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+
+    if extra:
+        pairs.append(extra)
+
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Labels = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+
+        with self._lock:
+            values = list(self._values.items())
+
+        for labels, value in values:
+            yield f"{self.name}{_format_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Labels = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # Per label set: a count per bucket (plus +Inf), the sum and the count.
+        self._values: dict[Labels, tuple[list[int], list[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            series = self._values.get(labels)
+
+            if series is None:
+                series = ([0] * (len(self.buckets) + 1), [0.0, 0.0])
+                self._values[labels] = series
+
+            series[0][index] += 1
+            series[1][0] += value
+            series[1][1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+
+        with self._lock:
+            values = [
+                (labels, list(counts), list(totals))
+                for labels, (counts, totals) in self._values.items()
+            ]
+
+        for labels, counts, (total, count) in values:
+            cumulative = 0
+
+            for bound, bucket_count in zip([*self.buckets, "+Inf"], counts):
+                cumulative += bucket_count
+                le = f'le="{bound}"'
+                yield (
+                    f"{self.name}_bucket"
+                    f"{_format_labels(self.labels, labels, le)} {cumulative}"
+                )
+
+            label_text = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{label_text} {total}"
+            yield f"{self.name}_count{label_text} {count}"
+
+
+@dataclass
+class Gauge:
+    """
+    A value read at scrape time, for state owned by other components.
+    """
+
+    name: str
+    help: str
+    collect: Callable[[], Iterable[tuple[dict[str, str], float]]]
+    type: str = "gauge"
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.type}"
+
+        for labels, value in self.collect():
+            names = tuple(labels)
+            values = tuple(labels.values())
+            yield f"{self.name}{_format_labels(names, values)} {value}"
+
+
+M = TypeVar("M", Counter, Histogram, Gauge)
+
+
+class Registry:
+    """
+    Process-local metrics, rendered in the Prometheus text format. With
+    several workers, each exposes its own numbers on its own /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: list[Counter | Histogram | Gauge] = []
+
+    def register(self, metric: M) -> M:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        return (
+            "\n".join(line for metric in self._metrics for line in metric.render())
+            + "\n"
+        )
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(
+    Counter(
+        "http_requests_total",
+        "HTTP requests by route and status.",
+        ("method", "route", "status"),
+    )
+)
+HTTP_LATENCY = REGISTRY.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTP request latency by route.",
+        ("method", "route"),
+    )
+)
+DB_QUERIES_PER_REQUEST = REGISTRY.register(
+    Histogram(
+        "http_request_db_queries",
+        "Database statements issued per HTTP request.",
+        ("method", "route"),
+        buckets=QUERY_COUNT_BUCKETS,
+    )
+)
+DB_SECONDS_PER_REQUEST = REGISTRY.register(
+    Histogram(
+        "http_request_db_seconds",
+        "Time spent executing database statements per HTTP request.",
+        ("method", "route"),
+    )
+)
+DB_QUERY_LATENCY = REGISTRY.register(
+    Histogram(
+        "db_query_duration_seconds",
+        "Latency of individual database statements.",
+        ("engine",),
+    )
+)
+SERIALIZATION_LATENCY = REGISTRY.register(
+    Histogram(
+        "serialization_duration_seconds",
+        "Time spent rendering response bodies.",
+        ("kind",),
+    )
+)
+POOL_WAIT_LATENCY = REGISTRY.register(
+    Histogram(
+        "db_pool_wait_seconds",
+        "Time spent waiting to check out a pooled connection.",
+    )
+)
+
+
+@dataclass
+class RequestStats:
+    scope: Scope
+    queries: int = 0
+    query_seconds: float = 0.0
+    # Statement shapes seen so far, kept by backend.metrics.query_inspector.
+    shapes: dict[str, int] = field(default_factory=dict)
+
+
+# Statement counts for the HTTP request being handled, if any.
+REQUEST_STATS: ContextVar[RequestStats | None] = ContextVar(
+    "request_stats", default=None
+)
+
+
+def route_path(scope: Scope) -> str:
+    """
+    The matched route template, e.g. "/product/{id}", or "unmatched".
+    """
+    return getattr(scope.get("route"), "path", "unmatched")
+
+
+def instrument_engine(
+    engine: Engine, name: str, inspector: "QueryInspector | None" = None
+) -> None:
+    """
+    Time every statement on the engine and attribute it to the current
+    HTTP request, passing it and its timing to `inspector`, if given. For
+    an AsyncEngine, pass its `sync_engine`.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn: Any, _cursor: Any, statement: str, *_: Any) -> None:
+        if inspector is not None:
+            # Before the timer starts, as it may reject the statement.
+            inspector.check(REQUEST_STATS.get(), statement)
+
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(
+        conn: Any,
+        _cursor: Any,
+        statement: str,
+        parameters: Any,
+        _context: Any,
+        executemany: bool,
+    ) -> None:
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        DB_QUERY_LATENCY.observe(elapsed, name)
+        stats = REQUEST_STATS.get()
+
+        if stats is not None:
+            stats.queries += 1
+            stats.query_seconds += elapsed
+
+        if inspector is not None:
+            inspector.observe(name, stats, statement, parameters, executemany, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context: Any) -> None:
+        if context.connection is not None:
+            started = context.connection.info.get("query_started")
+
+            if started:
+                _ = started.pop()
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording latency, status and database work per
+    route template (not per raw path, which would explode cardinality).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stats = RequestStats(scope)
+        token = REQUEST_STATS.set(stats)
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_STATS.reset(token)
+            path = route_path(scope)
+            method = scope["method"]
+
+            HTTP_REQUESTS.inc(method, path, str(status))
+            HTTP_LATENCY.observe(time.perf_counter() - start, method, path)
+            DB_QUERIES_PER_REQUEST.observe(stats.queries, method, path)
+            DB_SECONDS_PER_REQUEST.observe(stats.query_seconds, method, path)
+
+
+class MeteredJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered by pydantic-core, which serializes datetimes and
+    pydantic models natively, recording how long rendering the body took.
+    """
+
+    def render(self, content: Any) -> bytes:
+        start = time.perf_counter()
+        body = to_json(content)
+        SERIALIZATION_LATENCY.observe(time.perf_counter() - start, "json")
+        return body
@@ -0,0 +1,157 @@
+import re
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from backend.constants import (
+    QUERY_BUDGET,
+    QUERY_INSPECTION,
+    QUERY_REPEAT_THRESHOLD,
+    SLOW_QUERY_MS,
+)
+from backend.logger import LOG
+
+from .metrics import REGISTRY, Counter, RequestStats, route_path
+
+# A bound parameter in any of the drivers' styles: ?, $1, %(name)s or :name.
+_PARAMETER = r"(?:\?|\$\d+|%\(\w+\)s|:\w+)"
+# Expanded IN lists differ in length per call but are the same statement.
+_PARAMETER_LIST = re.compile(rf"\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})+\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_WHITESPACE = re.compile(r"\s+")
+
+MAX_LOGGED_STATEMENT = 500
+
+SLOW_QUERIES = REGISTRY.register(
+    Counter(
+        "db_slow_queries_total",
+        "Statements slower than SLOW_QUERY_MS.",
+        ("engine",),
+    )
+)
+REPEATED_STATEMENTS = REGISTRY.register(
+    Counter(
+        "db_repeated_statements_total",
+        "Requests that repeated one statement QUERY_REPEAT_THRESHOLD times.",
+        ("method", "route"),
+    )
+)
+
+
+class QueryInspectionError(RuntimeError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a statement so that calls differing only in parameters,
+    IN list length or inlined numbers compare equal.
+    """
+    shape = _PARAMETER_LIST.sub("(?...)", statement)
+    shape = _NUMBER.sub("N", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+def redact_parameters(parameters: Any, executemany: bool = False) -> str:
+    """
+    Describe bound parameters by type only, so logs never hold user data.
+    """
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+
+    if isinstance(parameters, Mapping):
+        return (
+            "{"
+            + ", ".join(f"{k}: {type(v).__name__}" for k, v in parameters.items())
+            + "}"
+        )
+
+    if isinstance(parameters, Sequence) and not isinstance(parameters, str):
+        return "(" + ", ".join(type(v).__name__ for v in parameters) + ")"
+
+    return type(parameters).__name__
+
+
+class QueryInspector:
+    """
+    Watches statements per HTTP request for N+1 patterns (the same
+    statement shape issued over and over) and routes over a query budget,
+    and logs slow statements with their parameters redacted. Fed by the
+    statement listeners of backend.metrics.instrument_engine.
+    """
+
+    def __init__(
+        self,
+        mode: str = QUERY_INSPECTION,
+        repeat_threshold: int = QUERY_REPEAT_THRESHOLD,
+        budget: int = QUERY_BUDGET,
+        slow_query_ms: float = SLOW_QUERY_MS,
+    ):
+        self.mode = mode
+        self.repeat_threshold = repeat_threshold
+        self.budget = budget
+        self.slow_query_ms = slow_query_ms
+
+    def check(self, stats: RequestStats | None, statement: str) -> None:
+        """
+        Count `statement` against the current request, if any. Runs before
+        the statement executes, so in "raise" mode the offending statement
+        never reaches the database.
+        """
+        if stats is None or self.mode == "off":
+            return
+
+        issued = stats.queries + 1
+
+        if self.budget and issued == self.budget + 1:
+            self._report(
+                f"Query budget of {self.budget} exceeded{self._describe(stats)}"
+            )
+
+        shape = statement_shape(statement)
+        count = stats.shapes.get(shape, 0) + 1
+        stats.shapes[shape] = count
+
+        if count == self.repeat_threshold:
+            REPEATED_STATEMENTS.inc(stats.scope["method"], route_path(stats.scope))
+            self._report(
+                f"Possible N+1: statement issued {count} times"
+                f"{self._describe(stats)}: {shape[:MAX_LOGGED_STATEMENT]}"
+            )
+
+    def observe(
+        self,
+        name: str,
+        stats: RequestStats | None,
+        statement: str,
+        parameters: Any,
+        executemany: bool,
+        elapsed: float,
+    ) -> None:
+        """
+        Log `statement` on engine `name` if it took over slow_query_ms.
+        Logged in every mode.
+        """
+        if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+            SLOW_QUERIES.inc(name)
+            LOG.warning(
+                f"Slow query ({elapsed * 1000:.1f}ms, {name}"
+                f"{self._describe(stats)}): "
+                f"{statement_shape(statement)[:MAX_LOGGED_STATEMENT]} "
+                f"parameters={redact_parameters(parameters, executemany)}"
+            )
+
+    def _report(self, message: str) -> None:
+        if self.mode == "raise":
+            raise QueryInspectionError(message)
+
+        LOG.warning(message)
+
+    @staticmethod
+    def _describe(stats: RequestStats | None) -> str:
+        if stats is None:
+            return ""
+
+        return f" in {stats.scope['method']} {route_path(stats.scope)}"
+
+
+QUERY_INSPECTOR = QueryInspector()
@@ -1,17 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.auth.database import get_db
+from backend.auth.database import get_async_db
 from backend.auth.models import Product, User
 from backend.auth.user_manager import UserManager
+from backend.constants import MAX_BATCH_SIZE, MAX_PAGE_SIZE
 from backend.database.database import (
     create_record,
     delete_record,
+    paginate_from_db,
     read_all_from_db,
-    read_from_db,
     update_record,
+    write_batch,
 )
+from backend.database.export import ExportFormat, export_response
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.database.routing import get_read_db
+from backend.database.schemas import (
+    BatchResult,
+    Page,
+    ProductOut,
+    ProductSearchResult,
+)
+from backend.database.search import PRODUCT_SEARCH
 
 router = APIRouter()
 
@@ -26,44 +39,84 @@ class ProductRequest(BaseModel):
     thumbnail: str | None = None
 
 
-@router.get("/product")
+@router.get("/product", response_model=ProductOut)
 async def get_product(
     product_id: int,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_from_db(db, Product, product_id)
+    db_product = await db.get(Product, product_id)
+
+    if not db_product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    return db_product
+
 
-@router.get("/product/all")
+@router.get("/product/all", response_model=list[ProductOut] | Page[ProductOut])
 async def get_all_products(
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    category: str | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_read_db),
+):
+    async def build():
+        if cursor is None and limit is None and category is None:
+            return await read_all_from_db(db, Product)
+
+        return await paginate_from_db(
+            db, Product, cursor=cursor, limit=limit, category=category
+        )
+
+    return await RESPONSE_CACHE.respond(request, Product.__tablename__, build)
+
+
+@router.get("/product/search", response_model=ProductSearchResult)
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: str | None = None,
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_all_from_db(db, Product)
+    return await PRODUCT_SEARCH.search(db, q, category=category, limit=limit)
 
 
-@router.post("/product")
+@router.get("/product/export")
+async def export_products(
+    format: ExportFormat = "ndjson",
+    fields: str | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+):
+    return export_response(Product, format, fields)
+
+
+@router.post("/product", response_model=ProductOut)
 async def create_product(
     product: ProductRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
 
-    return create_record(db, Product, product.model_dump())
+    return await create_record(db, Product, product.model_dump())
 
 
-@router.put("/product")
+@router.put("/product", response_model=ProductOut)
 async def update_product(
     product: ProductRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_product = db.query(Product).filter(Product.id == product.id).first()
+    db_product = (
+        await db.scalars(select(Product).filter(Product.id == product.id))
+    ).first()
 
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return update_record(db, Product, product.model_dump())
+    return await update_record(db, Product, product.model_dump())
 
 
 class DeleteProductRequest(BaseModel):
@@ -74,11 +127,42 @@ class DeleteProductRequest(BaseModel):
 async def delete_product(
     product: DeleteProductRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_product = db.query(Product).filter(Product.id == product.product_id).first()
+    db_product = (
+        await db.scalars(select(Product).filter(Product.id == product.product_id))
+    ).first()
 
     if not db_product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    return delete_record(db, Product, db_product.id)
+    return await delete_record(db, Product, db_product.id)
+
+
+class ProductBatch(BaseModel):
+    create: list[ProductRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    update: list[ProductRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    delete: list[int] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+
+
+@router.post(
+    "/product/batch",
+    response_model=BatchResult[ProductOut],
+    response_model_exclude_unset=True,
+)
+async def batch_products(
+    batch: ProductBatch,
+    _: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_async_db),
+):
+    return await write_batch(
+        db,
+        Product,
+        create=[product.model_dump() for product in batch.create],
+        update=[product.model_dump(exclude_unset=True) for product in batch.update],
+        delete=batch.delete,
+    )
@@ -1,21 +1,34 @@
 import datetime
+from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.auth.database import get_db
+from backend.auth.database import get_async_db
 from backend.auth.models import Product
 from backend.auth.models import Request as DatabaseRequest
 from backend.auth.models import User
 from backend.auth.user_manager import UserManager
+from backend.constants import MAX_BATCH_SIZE, MAX_PAGE_SIZE
 from backend.database.database import (
     create_record,
     delete_record,
+    paginate_from_db,
     read_all_from_db,
     read_from_db,
-    update_record,
+    update_records,
+    write_batch,
 )
+from backend.database.export import ExportFormat, export_response
+from backend.database.inventory import apply_stock_changes
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.database.rollup import Bucket, fold_buckets, read_rollup, summarize
+from backend.database.routing import get_read_db
+from backend.database.schemas import BatchResult, Page, RequestOut
+from backend.database.transactions import run_transaction
+from backend.metrics import MeteredJSONResponse
 
 router = APIRouter()
 
@@ -38,31 +51,89 @@ class RequestRequest(BaseModel):
     item_name: str | None = None
 
 
-@router.get("/request")
+@router.get("/request", response_model=list[RequestOut])
 async def get_request(
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_from_db(db, user, DatabaseRequest, sort=True)
+    return MeteredJSONResponse(await read_from_db(db, user, DatabaseRequest, sort=True))
 
 
-@router.get("/request/all")
+@router.get("/request/all", response_model=list[RequestOut] | Page[RequestOut])
 async def get_all_requests(
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    status: str | None = None,
+    request_type: str | None = None,
+    user_id: int | None = None,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_all_from_db(db, DatabaseRequest, sort=True)
+    filters = {"status": status, "request_type": request_type, "user_id": user_id}
+
+    # Rows are already plain dicts, so skip FastAPI's encoding pass.
+    if cursor is None and limit is None and not any(filters.values()):
+        return MeteredJSONResponse(
+            await read_all_from_db(db, DatabaseRequest, sort=True)
+        )
+
+    return MeteredJSONResponse(
+        await paginate_from_db(
+            db, DatabaseRequest, cursor=cursor, limit=limit, **filters
+        )
+    )
+
+
+@router.get("/request/export")
+async def export_requests(
+    format: ExportFormat = "ndjson",
+    fields: str | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+):
+    return export_response(DatabaseRequest, format, fields)
+
+
+@router.get("/request/analytics/summary")
+async def get_request_summary(
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_read_db),
+):
+    totals = await read_rollup(db, (), start, end)
+    by_status = await read_rollup(db, ("status",), start, end)
+    by_request_type = await read_rollup(db, ("request_type",), start, end)
+
+    return {
+        **summarize(totals),
+        "by_status": [{"status": row.status, **summarize([row])} for row in by_status],
+        "by_request_type": [
+            {"request_type": row.request_type, **summarize([row])}
+            for row in by_request_type
+        ],
+    }
+
+
+@router.get("/request/analytics/timeseries")
+async def get_request_timeseries(
+    bucket: Bucket = "day",
+    start: datetime.date | None = None,
+    end: datetime.date | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_read_db),
+):
+    return fold_buckets(await read_rollup(db, ("day", "status"), start, end), bucket)
 
 
-@router.post("/request")
+@router.post("/request", response_model=RequestOut)
 async def create_request(
     request: RequestRequest,
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     request.user_id = user.id
 
-    return create_record(db, DatabaseRequest, request.model_dump())
+    return await create_record(db, DatabaseRequest, request.model_dump())
 
 
 class UpdateRequestRequest(RequestRequest):
@@ -70,33 +141,33 @@ class UpdateRequestRequest(RequestRequest):
     amount: int | None = None
 
 
-@router.put("/request")
+@router.put("/request", response_model=RequestOut)
 async def update_request(
     request: UpdateRequestRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_request = (
-        db.query(DatabaseRequest).filter(DatabaseRequest.id == request.id).first()
-    )
-
-    if not db_request:
-        raise HTTPException(status_code=404, detail="Request not found")
+    data = request.model_dump(exclude_unset=True)
 
-    if request.status == "delivered" and request.item_name and request.amount:
-        product = db.query(Product).filter(Product.title == request.item_name).first()
+    # Stock, reservation and request changes all commit together.
+    async def work(db: AsyncSession) -> dict[str, Any]:
+        failures = await apply_stock_changes(db, [data])
 
-        if product:
-            product.stock += (  # pyright: ignore[reportAttributeAccessIsssue]
-                request.amount
-            )
-        else:
+        if failures:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        db.commit()
-        db.refresh(product)
+        [result] = await update_records(db, DatabaseRequest, [data])
 
-    return update_record(db, DatabaseRequest, request.model_dump())
+        if result["status"] == "not_found":
+            raise HTTPException(status_code=404, detail="Request not found")
+
+        return result
+
+    result = await run_transaction(db, work, "update_request")
+    await RESPONSE_CACHE.invalidate(DatabaseRequest.__tablename__)
+    await RESPONSE_CACHE.invalidate(Product.__tablename__)
+
+    return result["item"]
 
 
 class DeleteRequestRequest(BaseModel):
@@ -107,15 +178,53 @@ class DeleteRequestRequest(BaseModel):
 async def delete_request(
     request: DeleteRequestRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     db_request = (
-        db.query(DatabaseRequest)
-        .filter(DatabaseRequest.id == request.request_id)
-        .first()
-    )
+        await db.scalars(
+            select(DatabaseRequest).filter(DatabaseRequest.id == request.request_id)
+        )
+    ).first()
 
     if not db_request:
         raise HTTPException(status_code=404, detail="Request not found")
 
-    return delete_record(db, DatabaseRequest, db_request.id)
+    return await delete_record(db, DatabaseRequest, db_request.id)
+
+
+class RequestBatch(BaseModel):
+    create: list[RequestRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    update: list[UpdateRequestRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    delete: list[int] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+
+
+@router.post(
+    "/request/batch",
+    response_model=BatchResult[RequestOut],
+    response_model_exclude_unset=True,
+)
+async def batch_requests(
+    batch: RequestBatch,
+    user: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_async_db),
+):
+    for request in batch.create:
+        request.user_id = user.id
+
+    updates = [request.model_dump(exclude_unset=True) for request in batch.update]
+
+    results = await write_batch(
+        db,
+        DatabaseRequest,
+        create=[request.model_dump() for request in batch.create],
+        update=updates,
+        delete=batch.delete,
+        prepare=lambda db: apply_stock_changes(db, updates),
+    )
+    await RESPONSE_CACHE.invalidate(Product.__tablename__)
+
+    return results
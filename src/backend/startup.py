@@ -1,13 +1,111 @@
-from backend.auth.database import get_db
-from backend.data_creation.data_creation import (
-    create_fake_data,
-    create_test_users,
-    insert_test_data,
+import fcntl
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from sqlalchemy.schema import CreateIndex
+
+from backend.auth.database import SessionLocal, engine
+from backend.auth.models import (  # models registers every table on Base
+    Base,
+    SeedMarker,
 )
+from backend.constants import (
+    AUTO_CREATE_SCHEMA,
+    SEED_DATA,
+    STARTUP_LOCK_KEY,
+    STARTUP_LOCK_PATH,
+)
+from backend.database.rollup import rebuild_request_rollup
+from backend.database.search import ProductSearch
+
+# Bump to rebuild the request rollup from scratch on the next start.
+ROLLUP_VERSION = "1"
+
+
+def create_schema():
+    Base.metadata.create_all(bind=engine)
+
+    # create_all skips existing tables, so add indexes introduced since then.
+    # IF NOT EXISTS rather than checkfirst, whose reflection cannot see
+    # expression indexes on SQLite.
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                _ = connection.execute(CreateIndex(index, if_not_exists=True))
+
+    ProductSearch.create_indexes(engine)
+
+
+def backfill_rollups():
+    with SessionLocal() as db:
+        marker = db.get(SeedMarker, "request_rollup")
+
+        if marker is None or marker.content_hash != ROLLUP_VERSION:
+            rebuild_request_rollup(db)
+            _ = db.merge(SeedMarker(name="request_rollup", content_hash=ROLLUP_VERSION))
+            db.commit()
+
+
+@contextmanager
+def startup_lock() -> Iterator[None]:
+    """
+    Hold a lock across every process starting against this database: a
+    PostgreSQL advisory lock, which also covers other hosts, or else an
+    exclusive lock on STARTUP_LOCK_PATH, which covers this host only.
+    """
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as connection:
+            _ = connection.execute(
+                text("SELECT pg_advisory_lock(:key)"), {"key": STARTUP_LOCK_KEY}
+            )
+
+            try:
+                yield
+            finally:
+                _ = connection.execute(
+                    text("SELECT pg_advisory_unlock(:key)"), {"key": STARTUP_LOCK_KEY}
+                )
+
+        return
+
+    with open(STARTUP_LOCK_PATH, "a") as file:
+        fcntl.flock(file, fcntl.LOCK_EX)
+
+        try:
+            yield
+        finally:
+            fcntl.flock(file, fcntl.LOCK_UN)
+
+
+_started = False
 
 
 def on_startup():
-    db = next(get_db())
-    create_test_users(db)
-    insert_test_data(db)
-    create_fake_data(db, 50)
+    """
+    Create the schema, seed and backfill, once per process and one process
+    at a time. `python -m backend` runs this before forking its workers, so
+    their lifespans find it done; workers started any other way (uvicorn
+    --workers) take turns, and all but the first find nothing left to do.
+    """
+    global _started
+
+    if _started:
+        return
+
+    with startup_lock():
+        if AUTO_CREATE_SCHEMA:
+            create_schema()
+
+        if SEED_DATA:
+            # Deferred so that Faker and the seed data are only loaded when
+            # seeding.
+            from backend.data_creation.data_creation import seed_database
+
+            with SessionLocal() as db:
+                seed_database(db, 50)
+
+        if AUTO_CREATE_SCHEMA:
+            backfill_rollups()
+
+    _started = True
@@ -1,19 +1,28 @@
 import datetime
 
-from fastapi import APIRouter, Depends, HTTPException
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.auth.database import get_db
+from backend.auth.database import get_async_db
 from backend.auth.models import Suggestion, User
 from backend.auth.user_manager import UserManager
+from backend.constants import MAX_BATCH_SIZE, MAX_PAGE_SIZE
 from backend.database.database import (
     create_record,
     delete_record,
+    paginate_from_db,
     read_all_from_db,
     read_from_db,
     update_record,
+    write_batch,
 )
+from backend.database.export import ExportFormat, export_response
+from backend.database.response_cache import RESPONSE_CACHE
+from backend.database.routing import get_read_db
+from backend.database.schemas import BatchResult, Page, SuggestionOut
+from backend.metrics import MeteredJSONResponse
 
 router = APIRouter()
 
@@ -30,46 +39,69 @@ class SuggestionRequest(BaseModel):
     is_anonymous: bool | None = None
 
 
-@router.get("/suggestion")
+@router.get("/suggestion", response_model=list[SuggestionOut])
 async def get_suggestion(
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_from_db(db, user, Suggestion, sort=True)
+    return MeteredJSONResponse(await read_from_db(db, user, Suggestion, sort=True))
 
 
-@router.get("/suggestion/all")
+@router.get("/suggestion/all", response_model=list[SuggestionOut] | Page[SuggestionOut])
 async def get_all_suggestions(
+    request: Request,
+    cursor: str | None = None,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    user_id: int | None = None,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    return read_all_from_db(db, Suggestion, sort=True)
+    async def build():
+        if cursor is None and limit is None and user_id is None:
+            return await read_all_from_db(db, Suggestion, sort=True)
 
+        return await paginate_from_db(
+            db, Suggestion, cursor=cursor, limit=limit, user_id=user_id
+        )
 
-@router.post("/suggestion")
+    return await RESPONSE_CACHE.respond(request, Suggestion.__tablename__, build)
+
+
+@router.get("/suggestion/export")
+async def export_suggestions(
+    format: ExportFormat = "ndjson",
+    fields: str | None = None,
+    _: User = Depends(UserManager.get_user_from_header),
+):
+    return export_response(Suggestion, format, fields)
+
+
+@router.post("/suggestion", response_model=SuggestionOut)
 async def create_suggestion(
     suggestion: SuggestionRequest,
     user: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     suggestion.user_id = user.id
     suggestion.user_name = user.username
 
-    return create_record(db, Suggestion, suggestion.model_dump())
+    return await create_record(db, Suggestion, suggestion.model_dump())
 
 
-@router.put("/suggestion")
+@router.put("/suggestion", response_model=SuggestionOut)
 async def update_suggestion(
     suggestion: SuggestionRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db_suggestion = db.query(Suggestion).filter(Suggestion.id == suggestion.id).first()
+    db_suggestion = (
+        await db.scalars(select(Suggestion).filter(Suggestion.id == suggestion.id))
+    ).first()
 
     if not db_suggestion:
         raise HTTPException(status_code=404, detail="Suggestion not found")
 
-    return update_record(db, Suggestion, suggestion.model_dump())
+    return await update_record(db, Suggestion, suggestion.model_dump())
 
 
 class DeleteSuggestionRequest(BaseModel):
@@ -80,13 +112,50 @@ class DeleteSuggestionRequest(BaseModel):
 async def delete_suggestion(
     request: DeleteSuggestionRequest,
     _: User = Depends(UserManager.get_user_from_header),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     db_suggestion = (
-        db.query(Suggestion).filter(Suggestion.id == request.suggestion_id).first()
-    )
+        await db.scalars(
+            select(Suggestion).filter(Suggestion.id == request.suggestion_id)
+        )
+    ).first()
 
     if not db_suggestion:
         raise HTTPException(status_code=404, detail="Suggestion not found")
 
-    return delete_record(db, Suggestion, db_suggestion.id)
+    return await delete_record(db, Suggestion, db_suggestion.id)
+
+
+class SuggestionBatch(BaseModel):
+    create: list[SuggestionRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    update: list[SuggestionRequest] = Field(
+        default_factory=list, max_length=MAX_BATCH_SIZE
+    )
+    delete: list[int] = Field(default_factory=list, max_length=MAX_BATCH_SIZE)
+
+
+@router.post(
+    "/suggestion/batch",
+    response_model=BatchResult[SuggestionOut],
+    response_model_exclude_unset=True,
+)
+async def batch_suggestions(
+    batch: SuggestionBatch,
+    user: User = Depends(UserManager.get_user_from_header),
+    db: AsyncSession = Depends(get_async_db),
+):
+    for suggestion in batch.create:
+        suggestion.user_id = user.id
+        suggestion.user_name = user.username
+
+    return await write_batch(
+        db,
+        Suggestion,
+        create=[suggestion.model_dump() for suggestion in batch.create],
+        update=[
+            suggestion.model_dump(exclude_unset=True) for suggestion in batch.update
+        ],
+        delete=batch.delete,
+    )
@@ -0,0 +1,91 @@
+"""
+The suite runs against a throwaway SQLite database. backend reads its
+settings at import time, so they are set here, before any test imports it.
+"""
+
+import hashlib
+import os
+import tempfile
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+import pytest_asyncio
+
+_directory = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_directory, 'test.db')}"
+os.environ["STARTUP_LOCK_PATH"] = os.path.join(_directory, "startup.lock")
+os.environ["AUTO_CREATE_SCHEMA"] = "true"
+os.environ["SEED_DATA"] = "false"
+os.environ.setdefault("JWT_SECRET", "test-secret-that-is-long-enough-for-hs256")
+
+for name in ("ASYNC_DATABASE_URL", "READ_REPLICA_URL", "FOLLOWER_READS"):
+    _ = os.environ.pop(name, None)
+
+from backend.app import app  # noqa: E402
+from backend.auth.database import SessionLocal  # noqa: E402
+from backend.auth.models import User  # noqa: E402
+from backend.data_creation.data_creation import insert_ignore  # noqa: E402
+from backend.startup import create_schema  # noqa: E402
+
+# Test users, by role; each one's password is its name.
+ROLES = ("admin", "employee")
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    # Run every test on the session's event loop, as the fixtures are.
+    marker = pytest.mark.asyncio(loop_scope="session")
+
+    for item in items:
+        if pytest_asyncio.is_async_test(item):
+            item.add_marker(marker, append=False)
+
+
+@pytest.fixture(scope="session")
+def schema() -> None:
+    create_schema()
+
+
+@pytest.fixture(scope="session")
+async def client(schema: None) -> AsyncIterator[httpx.AsyncClient]:
+    transport = httpx.ASGITransport(app=app)
+
+    async with (
+        app.router.lifespan_context(app),
+        httpx.AsyncClient(transport=transport, base_url="http://test") as client,
+    ):
+        yield client
+
+
+@pytest.fixture(scope="session")
+async def headers(client: httpx.AsyncClient) -> dict[str, dict[str, str]]:
+    """
+    Authorization headers for a fresh login as each of ROLES.
+    """
+    with SessionLocal() as db:
+        insert_ignore(
+            db,
+            User,
+            [
+                {
+                    "username": role,
+                    "email": f"{role}@example.com",
+                    "hashed_password": hashlib.sha256(role.encode()).hexdigest(),
+                    "credits": 100,
+                    "role": role,
+                }
+                for role in ROLES
+            ],
+        )
+        db.commit()
+
+    headers: dict[str, dict[str, str]] = {}
+
+    for role in ROLES:
+        response = await client.post(
+            "/login", data={"username": role, "password": role}
+        )
+        response.raise_for_status()
+        headers[role] = {"Authorization": f"Bearer {response.cookies['access_token']}"}
+
+    return headers
@@ -0,0 +1,52 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete, select
+
+from backend.auth.credit_ledger import CreditLedger
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.models import User
+from backend.auth.user_manager import UserManager
+
+CREDITS = 50
+CALLS = 200
+
+
+async def create_user(credits: int) -> int:
+    async with AsyncSessionLocal() as db:
+        user = User(username=f"credit-test-{uuid.uuid4().hex}", credits=credits)
+        db.add(user)
+        await db.commit()
+        return user.id
+
+
+async def remove_user(user_id: int) -> int:
+    async with AsyncSessionLocal() as db:
+        credits = await db.scalar(select(User.credits).filter(User.id == user_id))
+        _ = await db.execute(delete(User).filter(User.id == user_id))
+        await db.commit()
+        return credits
+
+
+@pytest.mark.parametrize("mode", ["atomic", "batched"])
+async def test_concurrent_spends_never_overspend(schema: None, mode: str):
+    user_id = await create_user(CREDITS)
+    ledger = CreditLedger(lease_size=10, idle_seconds=0)
+
+    async def spend() -> bool:
+        async with AsyncSessionLocal() as db:
+            if mode == "batched":
+                return await ledger.spend(db, user_id) is not None
+
+            return await UserManager.decrement_user_credits(db, user_id) is not None
+
+    spent = sum(await asyncio.gather(*(spend() for _ in range(CALLS))))
+
+    async with AsyncSessionLocal() as db:
+        await ledger.flush(db, idle_only=False)
+
+    left = await remove_user(user_id)
+
+    assert spent == CREDITS
+    assert left == 0
@@ -0,0 +1,55 @@
+import httpx
+from sqlalchemy import update
+
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.models import Suggestion
+
+
+async def test_pages_include_rows_without_created_at(
+    client: httpx.AsyncClient, headers: dict[str, dict[str, str]]
+):
+    response = await client.post(
+        "/suggestion/batch",
+        json={"create": [{"suggestion": f"page {i}"} for i in range(20)]},
+        headers=headers["employee"],
+    )
+    response.raise_for_status()
+    created = [result["item"]["id"] for result in response.json()["created"]]
+
+    async with AsyncSessionLocal() as db:
+        _ = await db.execute(
+            update(Suggestion)
+            .filter(Suggestion.id == created[5])
+            .values(created_at=None)
+        )
+        await db.commit()
+
+    seen: list[int] = []
+    cursor = None
+
+    while True:
+        params = {
+            "limit": 7,
+            "user_id": response.json()["created"][0]["item"]["user_id"],
+        }
+
+        if cursor:
+            params["cursor"] = cursor
+
+        page = await client.get(
+            "/suggestion/all", params=params, headers=headers["employee"]
+        )
+        page.raise_for_status()
+        seen += [item["id"] for item in page.json()["items"]]
+        cursor = page.json()["next_cursor"]
+
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(created)
+    assert seen[-1] == created[5]
+
+    response = await client.post(
+        "/suggestion/batch", json={"delete": created}, headers=headers["employee"]
+    )
+    response.raise_for_status()
@@ -0,0 +1,83 @@
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import pytest
+
+from backend.metrics import QUERY_INSPECTOR
+
+ROWS = 50
+
+# Statements allowed per request, including authentication. Paths are
+# formatted with the id of the first fixture product.
+ROUTE_BUDGETS = {
+    "/product?product_id={product_id}": 2,
+    "/product/all": 2,
+    "/product/all?limit=50": 2,
+    "/product/search?q=chair": 6,
+    "/product/export": 2,
+    "/request": 2,
+    "/request/all": 2,
+    "/request/all?limit=50": 2,
+    "/request/export": 2,
+    "/request/analytics/summary": 4,
+    "/request/analytics/timeseries": 2,
+    "/suggestion": 2,
+    "/suggestion/all": 2,
+    "/suggestion/all?limit=50": 2,
+    "/suggestion/export": 2,
+}
+
+FIXTURES: dict[str, Any] = {
+    "/product/batch": lambda i: {"title": f"budget chair {i}", "stock": i},
+    "/request/batch": lambda i: {"request": f"budget {i}", "item_name": "chair"},
+    "/suggestion/batch": lambda i: {"suggestion": f"budget {i}"},
+}
+
+
+@pytest.fixture(scope="module")
+async def created(
+    client: httpx.AsyncClient, headers: dict[str, dict[str, str]]
+) -> AsyncIterator[dict[str, list[int]]]:
+    """
+    ROWS of each of FIXTURES, enough for an N+1 to repeat its statement.
+    """
+    created: dict[str, list[int]] = {}
+
+    for path, build in FIXTURES.items():
+        response = await client.post(
+            path,
+            json={"create": [build(i) for i in range(ROWS)]},
+            headers=headers["admin"],
+        )
+        response.raise_for_status()
+        created[path] = [result["item"]["id"] for result in response.json()["created"]]
+
+    yield created
+
+    for path, ids in created.items():
+        response = await client.post(
+            path, json={"delete": ids}, headers=headers["admin"]
+        )
+        response.raise_for_status()
+
+
+@pytest.mark.parametrize(("route", "budget"), ROUTE_BUDGETS.items())
+async def test_route_stays_within_query_budget(
+    client: httpx.AsyncClient,
+    headers: dict[str, dict[str, str]],
+    created: dict[str, list[int]],
+    monkeypatch: pytest.MonkeyPatch,
+    route: str,
+    budget: int,
+):
+    # As with QUERY_INSPECTION=raise: the request fails with
+    # QueryInspectionError past its budget, or when a statement repeats once
+    # per row returned.
+    monkeypatch.setattr(QUERY_INSPECTOR, "mode", "raise")
+    monkeypatch.setattr(QUERY_INSPECTOR, "budget", budget)
+    monkeypatch.setattr(QUERY_INSPECTOR, "repeat_threshold", 5)
+
+    path = route.format(product_id=created["/product/batch"][0])
+    response = await client.get(path, headers=headers["admin"])
+    response.raise_for_status()
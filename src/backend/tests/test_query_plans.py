@@ -0,0 +1,228 @@
+"""
+Query plan regression checks: runs the helpers behind the hot routes against
+a large seeded database, EXPLAINs every statement they issue and fails if
+one reads a whole table. Uses a throwaway SQLite database; point
+QUERY_PLANS_DATABASE_URL at an empty Postgres/CockroachDB database to check
+those planners.
+"""
+
+import json
+import os
+import tempfile
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timedelta
+from random import choice, randint
+from typing import Any
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import Engine, event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from backend.auth.database import to_async_url
+from backend.auth.models import (
+    APIKey,
+    Base,
+    Blacklist,
+    Product,
+    Request,
+    Suggestion,
+    User,
+)
+from backend.auth.user_manager import UserManager
+from backend.database.database import encode_cursor, paginate_from_db, read_from_db
+from backend.database.engine import make_async_engine, make_engine
+from backend.database.inventory import product_ids_by_title, replace_reservations
+from backend.database.search import ProductSearch
+
+ROWS = 20_000
+STATUSES = ["pending", "approved", "denied", "delivered"]
+START = datetime(2024, 1, 1)
+CURSOR = encode_cursor([START + timedelta(minutes=ROWS // 2), ROWS // 2])
+
+# Anything else in a plan, such as the catalog or the product_fts virtual
+# table, may be scanned.
+TABLES = set(Base.metadata.tables)
+
+USER = User(id=42)
+SEARCH = ProductSearch("auto", ttl=3600)
+
+Case = Callable[[AsyncSession], Awaitable[Any]]
+
+
+async def authenticate(db: AsyncSession) -> None:
+    try:
+        _ = await UserManager.authenticate_user(db, "user-42", "wrong")
+    except HTTPException:
+        pass
+
+
+# The helpers behind the hot routes, as the routers call them.
+HOT_QUERIES: dict[str, Case] = {
+    "request: read_from_db(sort=True)": lambda db: read_from_db(
+        db, USER, Request, sort=True
+    ),
+    "request: paginate_from_db": lambda db: paginate_from_db(db, Request),
+    "request: paginate_from_db(cursor)": lambda db: paginate_from_db(
+        db, Request, cursor=CURSOR
+    ),
+    "request: paginate_from_db(status)": lambda db: paginate_from_db(
+        db, Request, status="pending"
+    ),
+    "suggestion: read_from_db(sort=True)": lambda db: read_from_db(
+        db, USER, Suggestion, sort=True
+    ),
+    "suggestion: paginate_from_db(cursor)": lambda db: paginate_from_db(
+        db, Suggestion, cursor=CURSOR
+    ),
+    "product: paginate_from_db(category)": lambda db: paginate_from_db(
+        db, Product, category="category-4"
+    ),
+    "product: search": lambda db: SEARCH.search(db, "product 42"),
+    "product: search(category)": lambda db: SEARCH.search(
+        db, "product", category="category-4"
+    ),
+    "product: by title": lambda db: product_ids_by_title(db, {"Product 42"}),
+    "stock_reservation: replace": lambda db: replace_reservations(
+        db, {42: (1, 1)}, "reserved"
+    ),
+    "user: by id": lambda db: UserManager.get_user_from_db(db, 42),
+    "user: by username": authenticate,
+    "api_key: by api_key": lambda db: UserManager.get_user_from_api_key(db, "key-42"),
+}
+
+
+def seed(engine: Engine, rows: int, chunk_size: int = 10_000):
+    users = max(rows // 100, 100)
+    products = max(rows // 10, 100)
+
+    def chunks(count: int, make: Callable[[int], dict[str, Any]]):
+        for offset in range(0, count, chunk_size):
+            yield [make(i) for i in range(offset, min(offset + chunk_size, count))]
+
+    tables: list[tuple[Any, int, Callable[[int], dict[str, Any]]]] = [
+        (User, users, lambda i: {"id": i + 1, "username": f"user-{i}"}),
+        (APIKey, users, lambda i: {"user_id": i + 1, "api_key": f"key-{i}"}),
+        (Blacklist, rows, lambda i: {"jti": f"jti-{i}", "expires_at": START}),
+        (
+            Product,
+            products,
+            lambda i: {
+                "title": f"Product {i}",
+                "category": f"category-{i % 20}",
+                "stock": randint(0, 100),
+            },
+        ),
+        (
+            Request,
+            rows,
+            lambda i: {
+                "user_id": randint(1, users),
+                "status": choice(STATUSES),
+                "created_at": START + timedelta(minutes=i),
+            },
+        ),
+        (
+            Suggestion,
+            rows,
+            lambda i: {
+                "user_id": randint(1, users),
+                "created_at": START + timedelta(minutes=i),
+            },
+        ),
+    ]
+
+    with engine.begin() as connection:
+        for model, count, make in tables:
+            for chunk in chunks(count, make):
+                _ = connection.execute(insert(model), chunk)
+
+        _ = connection.exec_driver_sql("ANALYZE")
+
+
+@pytest.fixture(scope="module")
+async def plans_engine() -> AsyncIterator[AsyncEngine]:
+    url = os.environ.get("QUERY_PLANS_DATABASE_URL")
+
+    if url is None:
+        url = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'query_plans.db')}"
+
+    engine = make_engine(url)
+    Base.metadata.create_all(bind=engine)
+    ProductSearch.create_indexes(engine)
+    seed(engine, ROWS)
+    engine.dispose()
+
+    async_engine = make_async_engine(to_async_url(url))
+    yield async_engine
+    await async_engine.dispose()
+
+
+async def explain(engine: AsyncEngine, statement: str, parameters: Any) -> list[str]:
+    async with engine.connect() as connection:
+        if engine.dialect.name == "sqlite":
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN QUERY PLAN {statement}", parameters
+            )
+            return [row[-1] for row in result]
+
+        if engine.dialect.name == "cockroachdb":
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN {statement}", parameters
+            )
+            return [row[0] for row in result]
+
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {statement}", parameters
+        )
+        plan = result.scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+
+        nodes: list[str] = []
+        stack = [plan[0]["Plan"]]
+
+        while stack:
+            node = stack.pop()
+            nodes.append(f"{node['Node Type']} {node.get('Relation Name', '')}".strip())
+            stack.extend(node.get("Plans", []))
+
+        return nodes
+
+
+def is_full_scan(dialect: str, line: str) -> bool:
+    words = line.split()
+
+    if dialect == "sqlite":
+        return words[0] == "SCAN" and words[1] in TABLES and "USING" not in line
+
+    if dialect == "cockroachdb":
+        return "FULL SCAN" in line
+
+    return line.startswith("Seq Scan") and words[-1] in TABLES
+
+
+@pytest.mark.parametrize("name", HOT_QUERIES)
+async def test_hot_query_uses_an_index(plans_engine: AsyncEngine, name: str):
+    issued: list[tuple[str, Any]] = []
+
+    def capture(_conn, _cursor, statement, parameters, _context, executemany):
+        if not executemany:
+            issued.append((statement, parameters))
+
+    sync_engine = plans_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", capture)
+
+    try:
+        async with async_sessionmaker(plans_engine)() as db:
+            _ = await HOT_QUERIES[name](db)
+            await db.rollback()
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", capture)
+
+    assert issued
+
+    for statement, parameters in issued:
+        plan = await explain(plans_engine, statement, parameters)
+        scans = [line for line in plan if is_full_scan(plans_engine.dialect.name, line)]
+
+        assert not scans, f"{statement}\n" + "\n".join(plan)
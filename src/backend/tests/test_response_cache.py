@@ -0,0 +1,47 @@
+import httpx
+import pytest
+
+from backend.database.response_cache import etag_matches
+
+ETAG = '"0123456789abcdef"'
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        (ETAG, True),
+        (f"W/{ETAG}", True),
+        (f'"other", {ETAG}', True),
+        (f'"other",W/{ETAG} ', True),
+        ("*", True),
+        ('"other"', False),
+        ('"0123456789"', False),
+        (ETAG[1:-1], False),
+        (f'"prefix{ETAG[1:]}', False),
+        ("", False),
+    ],
+)
+def test_etag_matches(if_none_match: str, matches: bool):
+    assert etag_matches(if_none_match, ETAG) is matches
+
+
+async def test_revalidation_returns_not_modified(
+    client: httpx.AsyncClient, headers: dict[str, dict[str, str]]
+):
+    response = await client.get("/product/all", headers=headers["employee"])
+    response.raise_for_status()
+    etag = response.headers["etag"]
+
+    for if_none_match, status in (
+        (etag, 304),
+        (f"W/{etag}", 304),
+        ("*", 304),
+        (f'"stale", {etag}', 304),
+        ('"stale"', 200),
+        (f'"x{etag[1:]}', 200),
+    ):
+        response = await client.get(
+            "/product/all",
+            headers={**headers["employee"], "If-None-Match": if_none_match},
+        )
+        assert response.status_code == status, if_none_match
@@ -0,0 +1,43 @@
+import uuid
+from typing import Any
+
+import httpx
+from sqlalchemy import event
+
+from backend.auth.database import async_engine
+from backend.auth.principal_cache import PRINCIPAL_CACHE
+
+
+async def test_read_on_principal_cache_miss_holds_one_connection(
+    client: httpx.AsyncClient, headers: dict[str, dict[str, str]]
+):
+    checked_out = 0
+    most = 0
+
+    def checkout(*_: Any) -> None:
+        nonlocal checked_out, most
+        checked_out += 1
+        most = max(most, checked_out)
+
+    def checkin(*_: Any) -> None:
+        nonlocal checked_out
+        checked_out -= 1
+
+    pool = async_engine.sync_engine.pool
+    event.listen(pool, "checkout", checkout)
+    event.listen(pool, "checkin", checkin)
+    # Authentication and the handler both need the database.
+    PRINCIPAL_CACHE.clear()
+
+    try:
+        response = await client.get(
+            "/request/all",
+            params={"limit": 7, "request_type": uuid.uuid4().hex},
+            headers=headers["admin"],
+        )
+    finally:
+        event.remove(pool, "checkout", checkout)
+        event.remove(pool, "checkin", checkin)
+
+    response.raise_for_status()
+    assert most == 1
@@ -0,0 +1,112 @@
+import asyncio
+import uuid
+from collections import Counter
+from typing import Any
+
+import httpx
+from sqlalchemy import delete, select, text
+
+from backend.auth.database import AsyncSessionLocal
+from backend.auth.models import Product, StockReservation
+
+REQUESTS = 100
+DUPLICATES = 3
+# FTS5's structure record, rewritten by every change to the search index.
+FTS_STRUCTURE = text("SELECT block FROM product_fts_data WHERE id = 10")
+
+
+async def put_all(
+    client: httpx.AsyncClient, headers: dict[str, str], bodies: list[dict[str, Any]]
+) -> Counter[int]:
+    async def put(body: dict[str, Any]) -> int:
+        response = await client.put("/request", json=body, headers=headers)
+        return response.status_code
+
+    return Counter(await asyncio.gather(*(put(body) for body in bodies)))
+
+
+async def test_concurrent_deliveries_add_stock_once(
+    client: httpx.AsyncClient, headers: dict[str, dict[str, str]]
+):
+    """
+    Approves and then delivers many supply requests for one product
+    concurrently, each one several times over.
+    """
+    admin = headers["admin"]
+    # Created through the API so the request rollup stays consistent.
+    title = f"stock-test-{uuid.uuid4().hex}"
+
+    response = await client.post(
+        "/product", json={"title": title, "stock": 0}, headers=admin
+    )
+    response.raise_for_status()
+    product_id = response.json()["id"]
+
+    response = await client.post(
+        "/request/batch",
+        json={
+            "create": [
+                {
+                    "request": f"restock {i}",
+                    "request_type": "supply",
+                    "status": "pending",
+                    "item_name": title,
+                    "requested_amount": i % 5 + 1,
+                }
+                for i in range(REQUESTS)
+            ]
+        },
+        headers=admin,
+    )
+    response.raise_for_status()
+    request_ids = [result["item"]["id"] for result in response.json()["created"]]
+
+    approvals = await put_all(
+        client, admin, [{"id": id, "status": "approved"} for id in request_ids]
+    )
+    async with AsyncSessionLocal() as db:
+        fts_before = await db.scalar(FTS_STRUCTURE)
+
+    deliveries = await put_all(
+        client,
+        admin,
+        [
+            {"id": id, "status": "delivered", "item_name": title}
+            for id in request_ids
+            for _ in range(DUPLICATES)
+        ],
+    )
+
+    async with AsyncSessionLocal() as db:
+        stock = await db.scalar(select(Product.stock).filter(Product.id == product_id))
+        fts_after = await db.scalar(FTS_STRUCTURE)
+        uncommitted = await db.scalar(
+            select(StockReservation.id)
+            .filter(
+                StockReservation.request_id.in_(request_ids),
+                StockReservation.status != "committed",
+            )
+            .limit(1)
+        )
+
+    for path, body in (
+        ("/request/batch", {"delete": request_ids}),
+        ("/product/batch", {"delete": [product_id]}),
+    ):
+        response = await client.post(path, json=body, headers=admin)
+        response.raise_for_status()
+
+    async with AsyncSessionLocal() as db:
+        _ = await db.execute(
+            delete(StockReservation).filter(
+                StockReservation.request_id.in_(request_ids)
+            )
+        )
+        await db.commit()
+
+    assert set(approvals) == {200}
+    assert 500 not in deliveries
+    assert stock == sum(i % 5 + 1 for i in range(REQUESTS))
+    assert uncommitted is None
+    # Stock changes leave the search index alone.
+    assert fts_before is not None and fts_after == fts_before
@@ -3,6 +3,6 @@
 if [ "$APP_MODE" = "dev" ]; then
     pdm run python -m uvicorn src.backend.app:app --reload --host 0.0.0.0 --port 8000
 else
-    pdm run python -m uvicorn src.backend.app:app --host 0.0.0.0 --port 8000
+    pdm run backend --host 0.0.0.0 --port 8000
 fi
 